@@ -0,0 +1,105 @@
+"""
+Shared Binance client and a per-cycle account snapshot.
+
+get_account() is a weight-heavy call, so it is made at most once per cycle:
+the bot calls invalidate() when a cycle starts and the first balance read
+fetches a fresh snapshot. Fills made during the cycle are applied locally
+with apply_fill() so later reads stay accurate without another call.
+
+reconcile() diffs every pool position in the state against the snapshot in
+a single pass and reports drift per asset.
+"""
+import os
+import threading
+import time
+
+import telemetry
+from config import BINANCE_API_URL
+
+DRIFT_TOLERANCE = 0.02   # 2% of the expected amount (fees, rounding)
+
+_lock = threading.RLock()  # Pool workers share the client and snapshot
+_client = None
+_snapshot = None         # {'ts': float, 'balances': {asset: {'free': float, 'locked': float}}}
+
+# --- CLIENT ---
+def get_client():
+    """One authenticated client for the whole process."""
+    global _client
+    with _lock:
+        if _client is not None:
+            return _client
+        from binance.client import Client
+        from dotenv import load_dotenv
+        load_dotenv()
+        if BINANCE_API_URL != "https://api.binance.com":  # Local stand-in (mock_exchange.py)
+            Client = type('Client', (Client,), {'API_URL': f"{BINANCE_API_URL}/api"})
+        _client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
+        return _client
+
+# --- SNAPSHOT ---
+def refresh():
+    """Fetch balances with a single get_account call."""
+    global _snapshot
+    with telemetry.span("account_snapshot"):
+        account = get_client().get_account()
+    telemetry.incr('account_snapshots_total')
+    balances = {}
+    for b in account['balances']:
+        free, locked = float(b['free']), float(b['locked'])
+        if free or locked:
+            balances[b['asset']] = {'free': free, 'locked': locked}
+    _snapshot = {'ts': time.time(), 'balances': balances}
+    return _snapshot
+
+def invalidate():
+    """Mark the snapshot stale; the next read fetches a new one."""
+    global _snapshot
+    _snapshot = None
+
+def snapshot():
+    with _lock:  # Concurrent first reads still make a single call
+        return _snapshot if _snapshot is not None else refresh()
+
+def free(asset):
+    return snapshot()['balances'].get(asset, {}).get('free', 0.0)
+
+def total(asset):
+    bal = snapshot()['balances'].get(asset, {})
+    return bal.get('free', 0.0) + bal.get('locked', 0.0)
+
+def apply_fill(asset, delta):
+    """Book a fill (+bought / -sold) into the snapshot without refetching."""
+    with _lock:
+        if _snapshot is None:
+            return
+        bal = _snapshot['balances'].setdefault(asset, {'free': 0.0, 'locked': 0.0})
+        bal['free'] = max(bal['free'] + delta, 0.0)
+
+# --- RECONCILIATION ---
+def reconcile(state, symbol_for, tolerance=DRIFT_TOLERANCE):
+    """
+    Diff state positions against exchange balances in one sweep.
+    symbol_for(token_id, pos) -> exchange asset (e.g. 'CAKE').
+    Returns: list of drift rows {asset, expected, actual, diff, pools}, worst first.
+    """
+    expected = {}
+    pools = {}
+    for pool_name, pool in state.items():
+        if not isinstance(pool, dict):
+            continue
+        for token_id, pos in pool.get('positions', {}).items():
+            asset = symbol_for(token_id, pos).upper()
+            expected[asset] = expected.get(asset, 0.0) + pos['amount']
+            pools.setdefault(asset, []).append(pool_name)
+
+    balances = snapshot()['balances']
+    drift = []
+    for asset, want in expected.items():
+        bal = balances.get(asset, {})
+        have = bal.get('free', 0.0) + bal.get('locked', 0.0)
+        if abs(have - want) > tolerance * max(want, 1e-12):
+            drift.append({'asset': asset, 'expected': want, 'actual': have,
+                          'diff': have - want, 'pools': pools[asset]})
+    drift.sort(key=lambda d: abs(d['diff']) / max(d['expected'], 1e-12), reverse=True)
+    return drift
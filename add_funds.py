@@ -1,13 +1,9 @@
 import json
 import os
 import sys
-from binance.client import Client
-from dotenv import load_dotenv
 
-# Load Env
-load_dotenv()
-API_KEY = os.getenv('BINANCE_API_KEY')
-API_SECRET = os.getenv('BINANCE_SECRET')
+import account  # Shared client; python-binance and .env load on first use
+from config import POOLS
 
 STATE_FILE = "strategic_state.json"
 
@@ -26,8 +22,7 @@ def add_funds():
     
     # 1. Connect to Binance
     try:
-        client = Client(API_KEY, API_SECRET)
-        bal = client.get_asset_balance(asset='USDC')
+        bal = account.get_client().get_asset_balance(asset='USDC')
         real_cash = float(bal['free'])
         print(f"🏦 Real Binance Balance: ${real_cash:.2f}")
     except Exception as e:
@@ -40,11 +35,12 @@ def add_funds():
         print("❌ strategic_state.json not found!")
         return
     
-    echo_cash = state['echo']['cash']
-    nia_cash = state['nia']['cash']
-    bot_cash = echo_cash + nia_cash
+    # Every pool in the ledger counts, including ones no longer in config.POOLS
+    pools = {name: pool for name, pool in state.items() if isinstance(pool, dict) and 'cash' in pool}
+    bot_cash = sum(pool['cash'] for pool in pools.values())
+    breakdown = " | ".join(f"{name.upper()}: ${pool['cash']:.2f}" for name, pool in pools.items())
     
-    print(f"🤖 Bot Internal Cash:   ${bot_cash:.2f} (Echo: ${echo_cash:.2f} | NIA: ${nia_cash:.2f})")
+    print(f"🤖 Bot Internal Cash:   ${bot_cash:.2f} ({breakdown})")
     
     # 3. Calculate Surplus
     surplus = real_cash - bot_cash
@@ -57,37 +53,36 @@ def add_funds():
     print(f"\n💰 FRESH CAPITAL DETECTED: ${surplus:.2f}")
     
     # 4. Allocation Interface
+    # Configured pools the bot has already created in the ledger
+    targets = [cfg for cfg in POOLS if cfg['name'] in pools]
+    if not targets:
+        print("❌ No configured pool found in strategic_state.json. Run the bot once first.")
+        return
     print("\nHow would you like to allocate these funds?")
-    print("1. 50/50 Split (Balanced)")
-    print("2. 100% to Echo (Types 'safe')")
-    print("3. 100% to NIA (Type 'risk')")
-    
-    choice = input("\nEnter choice [1/2/3]: ").strip()
+    print(f"1. Even Split across {len(targets)} pools (Balanced)")
+    for i, cfg in enumerate(targets, start=2):
+        print(f"{i}. 100% to {cfg['name'].upper()} ({cfg.get('label', cfg['strategy'])})")
     
-    alloc_echo = 0.0
-    alloc_nia = 0.0
+    choice = input(f"\nEnter choice [1-{len(targets) + 1}]: ").strip()
     
     if choice == '1':
-        alloc_echo = surplus * 0.5
-        alloc_nia = surplus * 0.5
-    elif choice == '2':
-        alloc_echo = surplus
-    elif choice == '3':
-        alloc_nia = surplus
+        allocations = {cfg['name']: surplus / len(targets) for cfg in targets}
+    elif choice.isdigit() and 2 <= int(choice) <= len(targets) + 1:
+        allocations = {targets[int(choice) - 2]['name']: surplus}
     else:
         print("❌ Invalid choice. Aborting.")
         return
         
     # 5. Execute
     print(f"\nUpdating Ledger...")
-    state['echo']['cash'] += alloc_echo
-    state['nia']['cash'] += alloc_nia
+    for name, amount in allocations.items():
+        state[name]['cash'] += amount
     
     save_state(state)
     
     print(f"✅ SUCCESS! Funds Added.")
-    print(f"   New Echo Cash: ${state['echo']['cash']:.2f}")
-    print(f"   New NIA Cash:  ${state['nia']['cash']:.2f}")
+    for name in allocations:
+        print(f"   New {name.upper()} Cash: ${state[name]['cash']:.2f}")
     print("\nThe bot will use these funds on the next hourly run.")
 
 if __name__ == "__main__":
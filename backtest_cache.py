@@ -0,0 +1,234 @@
+"""
+Persistent, content-addressed cache for dashboard backtest results.
+
+Every (token, strategy) cell is stored under a key derived from:
+  - the SHA-256 of the token's CSV contents,
+  - the source of the strategy's module (plus strategies/base.py, the
+    repo helper modules they import, e.g. indicators.py, and the
+    backtest_system harness),
+  - the strategy's constructor parameters.
+Edit a CSV, a strategy or helper file or a parameter and only the affected cells miss;
+everything else is a pickle read (or an in-memory hit on Streamlit reruns).
+Missing cells are recomputed by a background thread so the page never blocks.
+
+Usage:
+    python backtest_cache.py           # Warm the cache (recompute stale cells)
+    python backtest_cache.py --clear   # Drop every cached result
+"""
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import backtest_system
+
+# --- CONFIG ---
+CACHE_DIR = "backtest_cache"
+CACHE_VERSION = 1        # Bump to invalidate everything when the stored layout changes
+
+_lock = threading.Lock()
+_memo = {}               # key -> cell result (survives Streamlit reruns)
+_file_hashes = {}        # path -> (mtime_ns, size, sha256)
+_source_hashes = {}      # strategy class -> sha256 of its code
+_worker = None
+_progress = {'total': 0, 'done': 0, 'current': None, 'started': None}
+
+# --- KEYS ---
+def _sha(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def file_hash(path):
+    """SHA-256 of a data file, re-read only when its mtime/size change."""
+    st = os.stat(path)
+    cached = _file_hashes.get(path)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    _file_hashes[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+def _helper_modules(module):
+    """Repo modules outside strategies/ that a strategy module imports from (e.g. indicators)."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    found = {}
+    for value in vars(module).values():
+        helper = value if inspect.ismodule(value) else inspect.getmodule(value)
+        path = getattr(helper, '__file__', None)
+        if (helper is None or path is None or helper.__name__.startswith('strategies')
+                or os.path.dirname(os.path.abspath(path)) != root):
+            continue
+        found[helper.__name__] = helper
+    return [found[name] for name in sorted(found)]
+
+def strategy_hash(strat):
+    """Hash of everything that decides a strategy's output besides the data."""
+    cls = type(strat)
+    if cls not in _source_hashes:
+        modules = [sys.modules[base.__module__] for base in cls.__mro__ if base.__module__.startswith('strategies')]
+        helpers = {h.__name__: h for m in modules for h in _helper_modules(m)}
+        sources = [inspect.getsource(m) for m in modules]
+        sources += [inspect.getsource(helpers[name]) for name in sorted(helpers)]
+        sources.append(inspect.getsource(backtest_system.run_strategy))
+        _source_hashes[cls] = _sha(*sources)
+    params = sorted((k, repr(v)) for k, v in vars(strat).items())
+    return _sha(_source_hashes[cls], params)
+
+def cell_key(data_hash, strat):
+    return _sha(CACHE_VERSION, data_hash, strategy_hash(strat))
+
+def debug_key(data_hash):
+    return _sha(CACHE_VERSION, data_hash, 'debug')
+
+# --- STORAGE ---
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.pkl")
+
+def _load(key):
+    if key in _memo:
+        return _memo[key]
+    try:
+        with open(_path(key), 'rb') as f:
+            value = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError):
+        return None
+    _memo[key] = value
+    return value
+
+def _store(key, value):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, _path(key))  # Readers never see a half-written file
+    _memo[key] = value
+
+def clear():
+    """Drop every cached result (disk and memory)."""
+    with _lock:
+        _memo.clear()
+        _file_hashes.clear()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+# --- STATS ---
+def equity_stats(equity_curve):
+    """Trade stats derived from the equity curve."""
+    equity = np.asarray(equity_curve, dtype=float)
+    if len(equity) < 2:
+        return {'final_equity': float(equity[-1]) if len(equity) else 0.0, 'max_dd': 0.0, 'exposure_pct': 0.0}
+    peaks = np.maximum.accumulate(equity)
+    dd = (peaks - equity) / np.where(peaks > 0, peaks, 1)
+    # Flat equity bar-to-bar means the strategy was in cash
+    exposure = np.count_nonzero(np.diff(equity)) / (len(equity) - 1)
+    return {
+        'final_equity': float(equity[-1]),
+        'max_dd': float(dd.max()) * 100,
+        'exposure_pct': exposure * 100,
+    }
+
+def compute_cell(strat, df):
+    result = backtest_system.run_strategy(strat, df)
+    result.update(equity_stats(result['equity_curve']))
+    return result
+
+# --- LOOKUP ---
+def get_results(files=None, strategies=None):
+    """
+    Cached results in run_all_strategies() shape, without touching the data
+    unless the file changed. Cells not yet computed are marked 'pending'.
+    Returns: (results, stale) where stale = [(path, [strategy_index, ...]), ...]
+    """
+    files = files if files is not None else backtest_system.data_files()
+    strategies = strategies or backtest_system.make_strategies()
+
+    results = {}
+    stale = []
+    for path in files:
+        data_hash = file_hash(path)
+        symbol = backtest_system.symbol_for(path)
+        results[symbol] = {}
+        missing = []
+        for i, strat in enumerate(strategies):
+            cell = _load(cell_key(data_hash, strat))
+            if cell is None:
+                missing.append(i)
+                cell = {'roi': 0.0, 'equity_curve': pd.Series(dtype=float), 'pending': True}
+            results[symbol][strat.name] = cell
+        debug = _load(debug_key(data_hash))
+        results[symbol]['_debug'] = debug or {}
+        if missing or debug is None:
+            stale.append((path, missing))  # refresh() always rewrites the debug entry
+    return results, stale
+
+def refresh(stale, strategies=None):
+    """Recompute the stale cells. Each file is loaded once, whatever the number of misses."""
+    strategies = strategies or backtest_system.make_strategies()
+    with _lock:
+        _progress.update(total=sum(max(len(idx), 1) for _, idx in stale), done=0, started=time.time())
+    for path, indices in stale:
+        data_hash = file_hash(path)
+        symbol = backtest_system.symbol_for(path)
+        df = backtest_system.load_csv(path)
+        _store(debug_key(data_hash), backtest_system.debug_info(df))
+        if not indices:
+            with _lock:
+                _progress['done'] += 1
+        for i in indices:
+            strat = strategies[i]
+            with _lock:
+                _progress['current'] = f"{symbol} / {strat.name}"
+            # Strategies add indicator columns in place; give each its own frame
+            _store(cell_key(data_hash, strat), compute_cell(strat, df.copy()))
+            with _lock:
+                _progress['done'] += 1
+    with _lock:
+        _progress['current'] = None
+
+def refresh_async(stale, strategies=None):
+    """Start a background refresh unless one is already running. Returns True if started."""
+    global _worker
+    with _lock:
+        if _worker is not None and _worker.is_alive():
+            return False
+        _worker = threading.Thread(target=refresh, args=(stale, strategies), name="backtest-cache", daemon=True)
+        _worker.start()
+        return True
+
+def is_busy():
+    return _worker is not None and _worker.is_alive()
+
+def progress():
+    with _lock:
+        return dict(_progress)
+
+def main():
+    if "--clear" in sys.argv:
+        clear()
+        print(f"Cleared {CACHE_DIR}/")
+        return
+
+    start = time.perf_counter()
+    results, stale = get_results()
+    cells = sum(len(v) - 1 for v in results.values())
+    misses = sum(len(idx) for _, idx in stale)
+    print(f"{cells} cells: {cells - misses} cached, {misses} stale ({time.perf_counter() - start:.3f}s lookup)")
+    if stale:
+        start = time.perf_counter()
+        refresh(stale)
+        print(f"Recomputed {misses} cells in {time.perf_counter() - start:.1f}s")
+    print(f"Cache: {len(glob.glob(os.path.join(CACHE_DIR, '*.pkl')))} entries in {CACHE_DIR}/")
+
+if __name__ == "__main__":
+    main()
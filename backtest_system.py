@@ -9,37 +9,83 @@ from strategies.ler import LERStrategy
 
 DATA_DIR = 'data'
 
+def symbol_for(path):
+    """ "data/CAKE_history.csv" -> "CAKE" """
+    return os.path.basename(path).replace('_history.csv', '')
+
+def data_files():
+    return sorted(glob.glob(f"{DATA_DIR}/*_history.csv"))
+
+def load_csv(path):
+    """Loads and normalizes one *_history.csv into a date-indexed frame."""
+    df = pd.read_csv(path)
+    
+    # 1. Normalize columns to lowercase (Fixes High/High/HIGH issues)
+    df.columns = [c.lower() for c in df.columns]
+    
+    df['date'] = pd.to_datetime(df['date'])
+    df.set_index('date', inplace=True)
+    # Force numeric types (handle strings from CSV) for ALL columns
+    for col in ['price', 'volume', 'high', 'low', 'open']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    # Alias 'volume' to 'total_volume' for ECHO/LER compatibility
+    if 'volume' in df.columns:
+        df['total_volume'] = df['volume']
+        
+    # Drop rows with NaN prices
+    df.dropna(subset=['price'], inplace=True)
+    
+    df.sort_index(inplace=True)
+    return df
+
 def load_all_data():
     """Loads all CSVs from data/ directory."""
     print(f"DEBUG: CWD is {os.getcwd()}")
-    data_map = {}
-    files = glob.glob(f"{DATA_DIR}/*_history.csv")
+    files = data_files()
     print(f"DEBUG: Found {len(files)} files in {DATA_DIR}/*_history.csv")
-    for f in files:
-        # Extract symbol from filename "data\\CAKE_history.csv"
-        symbol = os.path.basename(f).replace('_history.csv', '')
-        df = pd.read_csv(f)
-        
-        # 1. Normalize columns to lowercase (Fixes High/High/HIGH issues)
-        df.columns = [c.lower() for c in df.columns]
-        
-        df['date'] = pd.to_datetime(df['date'])
-        df.set_index('date', inplace=True)
-        # Force numeric types (handle strings from CSV) for ALL columns
-        for col in ['price', 'volume', 'high', 'low', 'open']:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        # Alias 'volume' to 'total_volume' for ECHO/LER compatibility
-        if 'volume' in df.columns:
-            df['total_volume'] = df['volume']
-            
-        # Drop rows with NaN prices
-        df.dropna(subset=['price'], inplace=True)
+    return {symbol_for(f): load_csv(f) for f in files}
+
+def make_strategies():
+    """The strategy line-up shown on the dashboard."""
+    return [
+        EchoStrategy(),
+        NIAStrategy(),
+        LERStrategy(),
+        DipBuyStrategy(), # Baseline
+        RSIStrategy()     # Baseline
+    ]
+
+def run_strategy(strat, df):
+    """One (token, strategy) cell: {'roi', 'equity_curve'} or an 'error' entry."""
+    try:
+        # Pre-check for required columns (Soft check)
+        if strat.name == 'Narrative Ignition Asymmetry' and 'high' not in df.columns:
+            raise ValueError("Missing High/Low data for NIA")
         
-        df.sort_index(inplace=True)
-        data_map[symbol] = df
-    return data_map
+        roi, equity_curve = strat.run(df)
+        return {
+            'roi': roi,
+            'equity_curve': equity_curve
+        }
+    except Exception as e:
+        # Log error but don't crash dashboard
+        return {
+            'roi': 0.0,
+            'equity_curve': pd.Series(),
+            'error': str(e)  # Pass error to UI
+        }
+
+def debug_info(df):
+    """Data diagnostics shown in the dashboard's debug expander."""
+    return {
+        'columns': df.columns.tolist(),
+        'rows': len(df),
+        'first_date': str(df.index[0]) if not df.empty else "N/A",
+        'last_date': str(df.index[-1]) if not df.empty else "N/A",
+        'sample_data': df.iloc[-1].to_dict() if not df.empty else {}
+    }
 
 def run_all_strategies():
     """
@@ -47,15 +93,7 @@ def run_all_strategies():
     Returns a dictionary structure: results[token][strategy_name] = (roi, equity_curve)
     """
     data_map = load_all_data()
-    
-    # Instantiate Strategies
-    strategies = [
-        EchoStrategy(),
-        NIAStrategy(),
-        LERStrategy(),
-        DipBuyStrategy(), # Baseline
-        RSIStrategy()     # Baseline
-    ]
+    strategies = make_strategies()
     
     results = {}
     
@@ -63,42 +101,10 @@ def run_all_strategies():
         print(f"Running Backtest on: {symbol} ({len(df)} rows)")
         results[symbol] = {}
         for strat in strategies:
-            try:
-                # Pre-check for required columns (Soft check)
-                if strat.name == 'Narrative Ignition Asymmetry' and 'high' not in df.columns:
-                    raise ValueError("Missing High/Low data for NIA")
-                
-                # DEBUG: Trace Execution
-                if symbol == 'SOL':
-                    print(f"[{strat.name}] Running on SOL. Rows: {len(df)}")
-                    if 'total_volume' not in df.columns:
-                        print(f"  ⚠️ MISSING total_volume!")
-                
-                roi, equity_curve = strat.run(df)
-                
-                if symbol == 'SOL':
-                     print(f"  -> Result ROI: {roi}% Equity Ends: {equity_curve.iloc[-1] if not equity_curve.empty else 'EMPTY'}")
-
-                results[symbol][strat.name] = {
-                    'roi': roi,
-                    'equity_curve': equity_curve
-                }
-            except Exception as e:
-                # Log error but don't crash dashboard
-                results[symbol][strat.name] = {
-                    'roi': 0.0,
-                    'equity_curve': pd.Series(),
-                    'error': str(e)  # Pass error to UI
-                }
+            results[symbol][strat.name] = run_strategy(strat, df)
         
         # Inject Debug Info for Dashboard
-        results[symbol]['_debug'] = {
-            'columns': df.columns.tolist(),
-            'rows': len(df),
-            'first_date': str(df.index[0]) if not df.empty else "N/A",
-            'last_date': str(df.index[-1]) if not df.empty else "N/A",
-            'sample_data': df.iloc[-1].to_dict() if not df.empty else {}
-        }
+        results[symbol]['_debug'] = debug_info(df)
             
     return results
 
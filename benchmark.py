@@ -0,0 +1,415 @@
+"""
+Offline performance benchmark for the bot's hot paths.
+
+Times indicators, strategies, screener scoring and state I/O at 100 / 1k / 10k
+bars (or tokens) on synthetic data, and compares against a saved baseline so
+regressions are caught before deploy. No network calls.
+
+Also profiles import-time startup of the CLI tools in fresh interpreters
+(python -X importtime) against STARTUP_BUDGET_S and flags any heavy
+dependency (pandas, web3, ...) that a light tool pulls in eagerly.
+
+Usage:
+    python benchmark.py                  # Run + compare against baseline
+    python benchmark.py --save-baseline  # Run + store results as the new baseline
+    python benchmark.py --quick          # Skip the 10k size
+    python benchmark.py --startup        # Only the import-time startup profile
+
+End-to-end cycle (paper mode, scratch directory; see http_replay.py):
+    python benchmark.py --record runs/cycle.jsonl.gz   # One live cycle, every HTTP call archived
+    python benchmark.py --replay runs/cycle.jsonl.gz   # Same cycle offline, deterministic
+        [--latency 0.2] [--throttle coingecko=30/60] [--fast]  # inject latency / 429s; --fast = no pacing
+"""
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import http_client
+import http_replay
+import indicators
+import telemetry
+import monte_carlo
+import screener
+import strategic_bot
+from strategies.aamr import AAMRStrategy
+from strategies.echo import EchoStrategy
+from strategies.nia import NIAStrategy
+from strategies.ler import LERStrategy
+from strategies.dip_buy import DipBuyStrategy
+from strategies.rsi_strategy import RSIStrategy
+
+# --- CONFIG ---
+SIZES = [100, 1_000, 10_000]
+REPEATS = 5
+SEED = 42
+RESULTS_FILE = "bench_results.json"
+BASELINE_FILE = "bench_baseline.json"
+REGRESSION_THRESHOLD = 0.25  # Flag anything >25% slower than baseline
+NOISE_FLOOR_S = 0.002        # ...unless it's under 2ms slower (timer/scheduler jitter)
+DATA_DIR = 'data'
+
+TIERS = ['large', 'upper_mid', 'core_mid', 'lower_mid', 'small']
+
+# Startup targets: name -> import statement run in a fresh interpreter.
+# dashboard_live is the Live Monitor's own imports (streamlit itself excluded).
+STARTUP_TARGETS = {
+    'check_status': "import check_status",
+    'add_funds': "import add_funds",
+    'dashboard_live': "import config, event_feed, metrics_server, price_snapshot",
+    'strategic_bot': "import strategic_bot",
+}
+STARTUP_BUDGET_S = 0.200     # Light tools (everything but strategic_bot) must start under this
+HEAVY_MODULES = ['pandas', 'matplotlib', 'web3', 'binance', 'streamlit', 'dotenv']
+
+# --- SYNTHETIC DATA ---
+def load_csv_returns():
+    """Daily returns from every CSV in data/ (real market texture for the synthetic series)."""
+    returns = []
+    for f in sorted(glob.glob(f"{DATA_DIR}/*.csv")):
+        df = pd.read_csv(f)
+        df.columns = [c.lower() for c in df.columns]
+        prices = pd.to_numeric(df['price'], errors='coerce').dropna().values
+        if len(prices) > 1:
+            returns.append(np.diff(prices) / prices[:-1])
+    return np.concatenate(returns) if returns else np.array([0.0])
+
+def make_bars(n, csv_returns=None):
+    """
+    Build an n-bar OHLCV frame in 'Cloud Paper Mode' format (high=low=open=close).
+    Stitches backtest.generate_price_curve() paths together, interleaved with
+    bootstrapped returns from the CSVs in data/ when available.
+    """
+    random.seed(SEED)
+    prices = []
+    level = 100.0
+    while len(prices) < n:
+        curve, _ = backtest.generate_price_curve()
+        prices.extend(level * p for p in curve[1:])
+        level = prices[-1]
+        if csv_returns is not None and len(csv_returns) > 1:
+            rng = np.random.default_rng(SEED + len(prices))
+            for r in rng.choice(csv_returns, size=min(365, n)):
+                level = max(level * (1 + r), 1e-6)
+                prices.append(level)
+    close = np.asarray(prices[:n], dtype=float)
+
+    rng = np.random.default_rng(SEED)
+    df = pd.DataFrame({
+        'price': close,
+        'total_volume': rng.lognormal(mean=15, sigma=1, size=n),
+    }, index=pd.date_range('2020-01-01', periods=n, freq='D'))
+    df['high'] = df['price']
+    df['low'] = df['price']
+    df['open'] = df['price']
+    df['close'] = df['price']
+    return df
+
+def make_candidates(n):
+    """Synthetic screener candidates (same keys screen_candidates() attaches)."""
+    rng = random.Random(SEED)
+    return [{
+        'id': f"token-{i}",
+        'symbol': f"TK{i}",
+        'tier': rng.choice(TIERS),
+        'dip_pct': rng.uniform(0, 95),
+        'dev_score': rng.choice([None, 0, rng.uniform(0, 100)]),
+        'liq_score': rng.uniform(0, 100),
+        'is_flash_crash': rng.random() < 0.1,
+        'age_years': rng.uniform(0, 8),
+    } for i in range(n)]
+
+def make_state(n):
+    """Unified state with n open positions split 70/30 across Echo/NIA."""
+    state = {'echo': {'cash': 700.0, 'positions': {}}, 'nia': {'cash': 300.0, 'positions': {}}}
+    for i in range(n):
+        pool = 'echo' if i % 10 < 7 else 'nia'
+        state[pool]['positions'][f"token-{i}"] = {
+            'entry_price': 1.0 + i * 0.01,
+            'highest_price': 1.1 + i * 0.01,
+            'amount': 10.0,
+            'timestamp': 1700000000.0 + i,
+            'regime_at_entry': 'NEUTRAL',
+            'use_bnb_fees': True
+        }
+    return state
+
+# --- TIMING ---
+def time_call(fn, setup=None, repeats=REPEATS):
+    """Run fn(setup()) `repeats` times. Returns list of wall-clock seconds (setup untimed)."""
+    timings = []
+    for _ in range(repeats):
+        arg = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn(arg)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def record(results, name, n, timings):
+    results[name] = {
+        'n': n,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'repeats': len(timings)
+    }
+    print(f"  {name:<45} {min(timings) * 1000:>10.2f} ms")
+
+# --- BENCHMARKS ---
+def bench_indicators(results, sizes, csv_returns):
+    print("\n[INDICATORS]")
+    for n in sizes:
+        bars = make_bars(n, csv_returns)
+        timings = time_call(indicators.calculate_indicators, setup=lambda: bars.copy())
+        record(results, f"indicators.calculate_indicators/{n}", n, timings)
+
+def bench_strategies(results, sizes, csv_returns):
+    print("\n[STRATEGIES]")
+    live = [EchoStrategy(), NIAStrategy(), AAMRStrategy()]
+    backtest_only = [LERStrategy(), DipBuyStrategy(), RSIStrategy()]
+    ctx = {'symbol': 'BENCH', 'debug': False, 'dev_score': 80, 'age_years': 3.0, 'categories': ['defi']}
+
+    for n in sizes:
+        bars = make_bars(n, csv_returns)
+        for strat in live + backtest_only:
+            key = strat.__class__.__name__
+            if hasattr(strat, 'calculate_indicators'):
+                timings = time_call(strat.calculate_indicators, setup=lambda: bars.copy())
+                record(results, f"{key}.calculate_indicators/{n}", n, timings)
+
+            timings = time_call(strat.run, setup=lambda: bars.copy())
+            record(results, f"{key}.run/{n}", n, timings)
+
+        # Live signal path: one entry evaluation on the latest bar
+        for strat in live:
+            key = strat.__class__.__name__
+            if isinstance(strat, AAMRStrategy):
+                signal = lambda df, s=strat: s.get_signal(df)
+            else:
+                signal = lambda df, s=strat: s.get_signal(df, None, None, context=ctx)
+            timings = time_call(signal, setup=lambda: bars.copy())
+            record(results, f"{key}.get_signal/{n}", n, timings)
+
+def bench_screener(results, sizes):
+    print("\n[SCREENER]")
+    for n in sizes:
+        candidates = make_candidates(n)
+        timings = time_call(lambda cs: [screener.score_candidate(c) for c in cs], setup=lambda: candidates)
+        record(results, f"screener.score_candidate/{n}", n, timings)
+
+        timings = time_call(screener.score_candidates, setup=lambda: candidates)
+        record(results, f"screener.score_candidates/{n}", n, timings)
+
+        timings = time_call(screener.balance_watchlist, setup=lambda: [dict(c) for c in candidates])
+        record(results, f"screener.balance_watchlist/{n}", n, timings)
+
+def bench_monte_carlo(results, sizes):
+    print("\n[MONTE CARLO]")
+    for n in sizes:
+        timings = time_call(lambda _: monte_carlo.sweep([2.0, 3.0], [0.7, 0.8], n, seed=SEED))
+        record(results, f"monte_carlo.sweep/{n}", n, timings)
+
+def bench_state_io(results, sizes):
+    print("\n[STATE I/O]")
+    original_file = strategic_bot.STATE_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        strategic_bot.STATE_FILE = os.path.join(tmp, "strategic_state.json")
+        try:
+            for n in sizes:
+                state = make_state(n)
+                timings = time_call(strategic_bot.save_state, setup=lambda: state)
+                record(results, f"strategic_bot.save_state/{n}", n, timings)
+
+                timings = time_call(lambda _: strategic_bot.load_state())
+                record(results, f"strategic_bot.load_state/{n}", n, timings)
+        finally:
+            strategic_bot.STATE_FILE = original_file
+
+def _import_profile(code):
+    """Run code under -X importtime in a fresh interpreter: (wall_s, {module: cumulative_s})."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.perf_counter() - start
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative) / 1e6
+    if proc.returncode != 0:
+        modules['<error>'] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else '?'
+    return wall, modules
+
+def bench_startup(results):
+    print("\n[STARTUP]")
+    bare = [_import_profile("pass") for _ in range(REPEATS)]  # Interpreter + site startup
+    base = min(wall for wall, _ in bare)
+    for name, code in STARTUP_TARGETS.items():
+        runs = [_import_profile(code) for _ in range(REPEATS)]
+        timings = [max(wall - base, 0.0) for wall, _ in runs]
+        record(results, f"startup.{name}", 1, timings)
+        modules = runs[-1][1]
+        if '<error>' in modules:
+            print(f"      ⚠️  import failed: {modules.pop('<error>')}")
+        heavy = [m for m in HEAVY_MODULES if m in modules]
+        top = sorted(((s, m) for m, s in modules.items() if '.' not in m and m not in bare[0][1]),
+                     reverse=True)[:3]
+        print(f"      heaviest: {', '.join(f'{m} {s * 1000:.0f}ms' for s, m in top)}"
+              + (f" | loads {', '.join(heavy)}" if heavy else ""))
+        if name != 'strategic_bot' and min(timings) > STARTUP_BUDGET_S:
+            print(f"      ❌ over the {STARTUP_BUDGET_S * 1000:.0f} ms startup budget")
+
+def run_cycle(archive, mode, latency=0.0, throttle=None, fast=False):
+    """
+    One watchlist update + fleet cycle in paper mode inside a scratch directory,
+    recording to or replaying from archive. Returns the cycle summary dict.
+    """
+    archive = os.path.abspath(archive)
+    if mode == 'record':
+        recorder, player = http_replay.Recorder(archive), None
+    else:
+        recorder, player = None, http_replay.Player(archive, latency, http_replay.parse_rules(throttle))
+    saved = (strategic_bot.PAPER_MODE, dict(http_client.RATE_LIMITS), os.getcwd())
+    http_client.set_replay(recorder, player)
+    strategic_bot.PAPER_MODE = True   # Never place real orders from a benchmark
+    if fast:
+        http_client.RATE_LIMITS.clear()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    strategic_bot.update_watchlist()
+                    strategic_bot.run_fleet()
+                wall = time.perf_counter() - start
+            finally:
+                os.chdir(saved[2])
+    finally:
+        http_client.set_replay(None, None)
+        strategic_bot.PAPER_MODE = saved[0]
+        http_client.RATE_LIMITS.clear()
+        http_client.RATE_LIMITS.update(saved[1])
+        if recorder:
+            recorder.close()
+
+    summary = dict(telemetry.last_cycle or {}, total_wall_s=round(wall, 3))
+    counters, _ = telemetry.metrics_snapshot()
+    limited = sum(v for (n, _), v in counters.items() if n == 'api_rate_limited_total')
+    print(f"  cycle wall {wall:.2f}s (fleet {summary.get('wall_s', 0):.2f}s: work {summary.get('work_s', 0):.2f}s,"
+          f" sleep {summary.get('sleep_s', 0):.2f}s) | 429s seen: {limited:.0f}")
+    print(f"  {player.summary() if player else f'recorded {recorder.count} exchanges to {archive}'}")
+    return summary
+
+def arg_value(flag, default=None):
+    if flag in sys.argv and sys.argv.index(flag) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(flag) + 1]
+    return default
+
+# --- REPORTING ---
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print a comparison table. Returns the list of regressed benchmark names."""
+    print(f"\n=== COMPARISON vs BASELINE ({baseline['meta'].get('timestamp', '?')}) ===")
+    print(f"{'BENCHMARK':<45} | {'BASE ms':>10} | {'NOW ms':>10} | {'RATIO':>6}")
+    print("-" * 82)
+
+    regressions = []
+    for name, res in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            print(f"{name:<45} | {'-':>10} | {res['min'] * 1000:>10.2f} | {'NEW':>6}")
+            continue
+        ratio = res['min'] / base['min'] if base['min'] > 0 else 1.0
+        flag = ""
+        if ratio > 1 + threshold and (res['min'] - base['min']) > NOISE_FLOOR_S:
+            flag = "  <-- REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  (faster)"
+        print(f"{name:<45} | {base['min'] * 1000:>10.2f} | {res['min'] * 1000:>10.2f} | {ratio:>5.2f}x{flag}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {threshold:.0%}.")
+    else:
+        print(f"\n✅ No regressions above {threshold:.0%}.")
+    return regressions
+
+def save_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def run_benchmarks(sizes=SIZES):
+    print(f"--- PIGEON BENCHMARK (sizes: {sizes}, repeats: {REPEATS}) ---")
+    csv_returns = load_csv_returns()
+    results = {}
+
+    bench_indicators(results, sizes, csv_returns)
+    bench_strategies(results, sizes, csv_returns)
+    bench_screener(results, sizes)
+    bench_monte_carlo(results, sizes)
+    bench_state_io(results, sizes)
+    bench_startup(results)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'sizes': sizes,
+            'repeats': REPEATS
+        },
+        'results': results
+    }
+
+def main():
+    for mode in ('record', 'replay'):
+        archive = arg_value(f'--{mode}')
+        if archive:
+            print(f"--- PIGEON CYCLE ({mode.upper()}) ---")
+            run_cycle(archive, mode, float(arg_value('--latency', 0)), arg_value('--throttle'), '--fast' in sys.argv)
+            return 0
+    if '--startup' in sys.argv:
+        bench_startup({})
+        return 0
+    sizes = [s for s in SIZES if s < 10_000] if '--quick' in sys.argv else SIZES
+    current = run_benchmarks(sizes)
+    save_json(RESULTS_FILE, current)
+    print(f"\nResults saved to {RESULTS_FILE}")
+
+    if '--save-baseline' in sys.argv:
+        save_json(BASELINE_FILE, current)
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+
+    baseline = load_json(BASELINE_FILE)
+    if not baseline:
+        print("No baseline found. Run `python benchmark.py --save-baseline` to create one.")
+        return 0
+
+    regressions = compare(current, baseline)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
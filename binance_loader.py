@@ -1,4 +1,4 @@
-import requests
+import http_client
 import pandas as pd
 import datetime
 import os
@@ -38,7 +38,7 @@ def fetch_binance_history(symbol, pair, start_str, end_str, tag):
         }
         
         try:
-            r = requests.get(url, params=params, timeout=10)
+            r = http_client.get(url, params=params, timeout=10)
             if r.status_code != 200:
                 print(f"Error {r.status_code}: {r.text}")
                 break
@@ -1,14 +1,32 @@
+import asyncio
+import sys
 import time
-import requests
+import http_client
 import json
-from web3 import Web3
+from collections import deque
 from datetime import datetime
 import config
+import dex_prices
+import event_feed
+import metrics_server
+import onchain_prices
+import pair_index
+import safety
 
 # --- SETUP ACCESS TO CONFIG ---
 PAPER_MODE = config.PAPER_MODE
 RPC_URL = config.BSC_RPC_URL
-web3 = Web3(Web3.HTTPProvider(RPC_URL))
+_web3 = None
+
+def get_web3():
+    """BSC node connection, created (and web3 imported) on first use."""
+    global _web3
+    if _web3 is None:
+        from web3 import Web3
+        _web3 = Web3(Web3.HTTPProvider(RPC_URL))
+    return _web3
+
+TRADE_FEED = "trade_events.jsonl"  # Structured trades for visualize.py / dashboard
 
 # --- GLOBAL STATE ---
 positions = {}  # {token_address: {'entry_price': float, 'amount': float, 'symbol': str, 'timestamp': float}}
@@ -24,47 +42,16 @@ def log_trade(message):
 # --- UTILS ---
 def get_token_price(token_address):
     """
-    Fetches price of a token in USD from DexScreener.
+    Fetches price of a token in USD from DexScreener (batched + cached, see dex_prices.py).
     """
-    try:
-        url = f"{config.DEXSCREENER_API_URL}{token_address}"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        if data.get("pairs"):
-            # Get the first pair (usually the most liquid one)
-            pair = data["pairs"][0]
-            price_usd = pair.get("priceUsd")
-            return float(price_usd) if price_usd else None
-    except Exception as e:
-        print(f"Error fetching price for {token_address}: {e}")
-    return None
+    return dex_prices.get_price(token_address)
 
 def check_safety(token_address):
     """
-    Checks if a token is a honeypot using Honeypot.is API.
+    Checks if a token is a honeypot using Honeypot.is API (cached, see safety.py).
     Returns: (is_safe, reason)
     """
-    try:
-        url = f"{config.HONEYPOT_API_URL}?address={token_address}&chainID=56"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        # Honeypot.is returns 'honeypotResult' key
-        # If 'isHoneypot' is True, it's unsafe.
-        if "honeypotResult" in data:
-            result = data["honeypotResult"]
-            if result.get("isHoneypot"):
-                return False, "HONEYPOT DETECTED"
-            else:
-                return True, "SAFE"
-        else:
-            # If API fails or data is weird, assume unsafe to be cautious
-            # Debug: print keys to see what happened
-            return False, f"UNKNOWN/API ERROR. Data keys: {list(data.keys())}"
-            
-    except Exception as e:
-        return False, f"CHECK FAILED: {e}"
+    return safety.check_many([token_address])[token_address]
 
 # --- TRADING LOGIC ---
 def buy_token(token_address, token_symbol="TOKEN"):
@@ -87,21 +74,34 @@ def buy_token(token_address, token_symbol="TOKEN"):
             'symbol': token_symbol,
             'timestamp': time.time()
         }
+        event_feed.emit('trade', feed=TRADE_FEED, side='BUY', symbol=token_symbol, addr=token_address,
+                        price=price, amount_bnb=amount_bnb, paper=True)
         return price
     else:
         log_trade("REAL TRADE NOT IMPLEMENTED YET - SAFETY LOCK")
 
-def monitor_positions():
+def monitor_positions(max_age=dex_prices.PRICE_TTL):
     """
     Checks active positions for take-profit or stop-loss.
+    Prices younger than max_age seconds are reused.
     """
     if not positions:
         return
 
+    if config.MONITOR_PRICE_SOURCE == 'onchain':
+        # One RPC batch of pair reserves for every position; DexScreener for the rest
+        prices = onchain_prices.get_prices(list(positions))
+        missing = [addr for addr, price in prices.items() if not price]
+        if missing:
+            prices.update(dex_prices.get_prices(missing, max_age))
+    else:
+        # One batched lookup for every position (BATCH_SIZE addresses per request)
+        prices = dex_prices.get_prices(list(positions), max_age)
+    
     # Create a copy of keys to modify dict during iteration
     for token_address in list(positions.keys()):
         data = positions[token_address]
-        current_price = get_token_price(token_address)
+        current_price = prices.get(token_address)
         
         if not current_price:
             continue
@@ -113,124 +113,234 @@ def monitor_positions():
         multiplier = current_price / entry_price
         
         # Take Profit: 2x (2.0) | Stop Loss: -20% (0.8)
+        action = None
         if multiplier >= 2.0:
-            log_trade(f"[PAPER SELL] TAKE PROFIT: {symbol} at ${current_price} ({multiplier:.2f}x)")
-            del positions[token_address]
+            action = 'TAKE PROFIT'
         elif multiplier <= 0.8:
-            log_trade(f"[PAPER SELL] STOP LOSS: {symbol} at ${current_price} ({multiplier:.2f}x)")
+            action = 'STOP LOSS'
+
+        if action:
+            log_trade(f"[PAPER SELL] {action}: {symbol} at ${current_price} ({multiplier:.2f}x)")
+            event_feed.emit('trade', feed=TRADE_FEED, side='SELL', symbol=symbol, addr=token_address,
+                            price=current_price, action=action, multiplier=round(multiplier, 4),
+                            profit_pct=round((multiplier - 1) * 100, 2), paper=True)
             del positions[token_address]
         # else:
         #     # Optional: Log status every now and then? warning: spammy
         #     pass
 
 # --- MAIN SCANNER ---
+SCAN_INTERVAL = 60       # Seconds between DexScreener searches
+MAX_BUYS_PER_SCAN = 5    # Limit buys per scan window to avoid blowing up limits
+
+def fetch_scan_pairs():
+    """One DexScreener search for WBNB pairs. Returns the raw pair list (may be empty)."""
+    # Note: DexScreener /search/ mainly takes 'q' - strict key=value filtering isn't
+    # available, so we fetch results and FILTER MANUALLY for liquidity/volume.
+    # Using the search endpoint to find WBNB pairs specifically
+    url = f"{config.DEXSCREENER_SEARCH}WBNB"
+    # Add a timestamp to avoid caching
+    url += f"&ts={int(time.time())}"
+    
+    response = http_client.get(url)
+    pairs = response.json().get("pairs") or []
+    dex_prices.remember(pairs)  # buy_token reuses these instead of refetching
+    return pairs
+
+def screen_pair(pair, liquidity, volume):
+    """Chain / liquidity / volume filters for one pair. Returns (verdict, reason)."""
+    # 1. Platform/Chain Filter
+    if pair.get('chainId') != 'bsc':
+        return pair_index.REJECTED, f"chain {pair.get('chainId')}"
+
+    # 2. Liquidity Filter (> $10k)
+    if liquidity < 10000:
+        return pair_index.REJECTED, f"liquidity ${liquidity}"
+
+    # 3. Volume Filter (> $5k)
+    if volume < 5000:
+        return pair_index.REJECTED, f"volume ${volume}"
+    return pair_index.PASSED, "FILTERS PASS"
+
+def filter_pairs(pairs):
+    """
+    Chain / liquidity / volume filters. Returns {token_address: (symbol, liquidity, volume)} in scan order.
+    Pairs judged recently on similar metrics reuse their verdict (see pair_index.py).
+    """
+    candidates = {}
+    now = time.time()
+    for pair in pairs:
+        liquidity = (pair.get('liquidity') or {}).get('usd') or 0
+        volume = (pair.get('volume') or {}).get('h24') or 0
+        token_address = (pair.get('baseToken') or {}).get('address')
+
+        seen = pair_index.lookup(pair.get('pairAddress'), liquidity, volume, now)
+        if seen is None:
+            seen = screen_pair(pair, liquidity, volume)
+            pair_index.record(pair.get('pairAddress'), token_address, *seen, liquidity, volume, now)
+        if seen[0] != pair_index.PASSED:
+            continue
+        
+        # Avoid re-buying if we already hold it; known honeypots are out in O(1)
+        if token_address in positions or safety.is_honeypot(token_address):
+            continue
+        
+        candidates.setdefault(token_address, (pair['baseToken']['symbol'], liquidity, volume))
+    pair_index.save()
+    return candidates
+
 def scan_and_trade():
     """
-    Main loop to find new opportunites.
-    For this demo, we will check a specific 'hot' list or just search for recently updated tokens 
-    via DexScreener to simulate finding something 'new'.
+    Blocking scanner (python bot.py --sync): scan, screen, buy, then monitor,
+    once per SCAN_INTERVAL. run_async() is the default runtime.
     """
     log_trade("Bot started in scanning mode...")
     
     # In a real sniper, we might listen to Mempool or specific factory events.
-    # For this simpler version, let's fetch 'latest' profiles or search for a generic term 
-    # to find active tokens, OR just user can input a token to 'test' the safety check.
-    
-    # Let's simulate scanning by asking the user to input a token, 
-    # OR we can just fetch some trending tokens to test the logic.
-    
-    # DEMO: Fetch some trending tokens from DexScreener to 'simulate' finding them
-    # Updated Scanner with Filters
+    # For this simpler version we search DexScreener for active WBNB pairs.
     while True:
         try:
-            # User defined filters
-            params = {
-                "q": "WBNB", # Search for pairs with WBNB
-                # Note: DexScreener search API is a bit limited, strict key=value filtering 
-                # might need to happen post-fetch or via specific endpoint if documented.
-                # However, the user provided a 'search' style URL pattern.
-                # Let's try to construct a search query that implies some order if possible, 
-                # but DexScreener /search/ mainly takes 'q'. 
-                # We will fetch results and FILTER MANUALLY for liquidity/volume to be sure.
-            }
-            
-            # Using the search endpoint to find WBNB pairs specifically
-            url = f"{config.DEXSCREENER_SEARCH}WBNB"
-            # Add a timestamp to avoid caching
-            url += f"&ts={int(time.time())}"
-            
-            response = requests.get(url)
-            data = response.json()
-            
-            if not data.get("pairs"):
+            pairs = fetch_scan_pairs()
+            if not pairs:
                  log_trade("No tokens found in scan.")
                  time.sleep(10)
                  continue # Wait and retry
 
-            pairs = data['pairs']
             log_trade(f"Found {len(pairs)} pairs. Filtering...")
-            
+            candidates = filter_pairs(pairs)
             filtered_count = 0
             
-            for pair in pairs:
-                # 1. Platform/Chain Filter
-                if pair.get('chainId') != 'bsc':
-                    continue
-                    
-                # 2. Liquidity Filter (> $10k)
-                liquidity = pair.get('liquidity', {}).get('usd', 0)
-                if liquidity < 10000:
-                    continue
-                    
-                # 3. Volume Filter (> $5k)
-                volume = pair.get('volume', {}).get('h24', 0)
-                if volume < 5000:
-                    continue
-
-                token_address = pair['baseToken']['address']
-                token_symbol = pair['baseToken']['symbol']
-                
-                # Avoid re-buying if we already hold it
-                if token_address in positions:
-                    continue
-                
-                log_trade(f"Analyzing {token_symbol} ({token_address}) | Liq: ${liquidity} | Vol: ${volume}")
-                
-                # 4. Safety Check
-                is_safe, reason = check_safety(token_address)
+            # 4. Safety Check - whole batch at once: cached verdicts are reused,
+            # only new/expired tokens hit Honeypot.is (a few at a time)
+            verdicts = safety.check_many(list(candidates))
+            pair_index.record_safety(verdicts)  # Unchanged unsafe pairs are skipped next scan
+            
+            for token_address, (token_symbol, liquidity, volume) in candidates.items():
+                is_safe, reason = verdicts[token_address]
                 if not is_safe:
                     # log_trade(f"SKIPPING {token_symbol}: {reason}") # Reduce spam
                     continue
                 
-                log_trade(f"SAFETY PASS: {token_symbol} is marked safe. Buying...")
+                log_trade(f"SAFETY PASS: {token_symbol} ({token_address}) | Liq: ${liquidity} | Vol: ${volume}. Buying...")
                 
                 # 5. Buy (Paper)
                 buy_token(token_address, token_symbol)
                 filtered_count += 1
                 
-                # Limit to buying a few per scan loop to avoid blowing up limits
-                if filtered_count >= 5:
+                if filtered_count >= MAX_BUYS_PER_SCAN:
                     break
-                
-                time.sleep(1)
 
             # Monitor positions after the scan
             log_trade(f"Scan complete. Monitoring {len(positions)} positions...")
-            # Simple loop to monitor for a bit (e.g. 1 minute) before rescanning
-            # in a real bot this would be async or a separate thread.
-            # For this script, we'll just check once per main loop iteration.
             monitor_positions()
             
-            time.sleep(60) # Wait 60s before next scan to mimic a regular interval
+            time.sleep(SCAN_INTERVAL) # Wait before next scan to mimic a regular interval
 
         except Exception as e:
             log_trade(f"Scan loop error: {e}")
             time.sleep(10)
 
+# --- ASYNC RUNTIME ---
+# Discovery, safety screening, execution and monitoring run as independent
+# asyncio tasks, so positions are checked every MONITOR_INTERVAL instead of
+# once per scan. Blocking calls run in worker threads via asyncio.to_thread
+# and all share http_client's single keep-alive Session (one connection pool,
+# one rate limiter). Bounded queues give back-pressure: discovery waits when
+# the safety checkers fall SAFETY_QUEUE_SIZE tokens behind.
+MONITOR_INTERVAL = 10    # Seconds between position checks
+SAFETY_QUEUE_SIZE = 20
+EXECUTION_QUEUE_SIZE = 10
+RETRY_DELAY = 10         # Seconds a loop backs off after an error
+
+async def discovery_loop(safety_queue, in_flight):
+    """Search for pairs every SCAN_INTERVAL and queue unseen candidates for screening."""
+    while True:
+        try:
+            pairs = await asyncio.to_thread(fetch_scan_pairs)
+            candidates = await asyncio.to_thread(filter_pairs, pairs)  # Saves the pair index to disk
+            fresh = [(a, meta) for a, meta in candidates.items() if a not in in_flight]
+            log_trade(f"Found {len(pairs)} pairs, {len(candidates)} pass filters, {len(fresh)} queued for safety checks")
+            for token_address, meta in fresh:
+                in_flight.add(token_address)
+                await safety_queue.put((token_address, meta))  # Waits while the checkers are behind
+        except Exception as e:
+            log_trade(f"Discovery loop error: {e}")
+            await asyncio.sleep(RETRY_DELAY)
+            continue
+        await asyncio.sleep(SCAN_INTERVAL)
+
+async def safety_worker(safety_queue, execution_queue, in_flight):
+    """Screen queued tokens one at a time (safety.MAX_WORKERS of these run in parallel)."""
+    while True:
+        token_address, meta = await safety_queue.get()
+        try:
+            is_safe, reason = await asyncio.to_thread(check_safety, token_address)
+            if not is_safe:
+                await asyncio.to_thread(pair_index.record_safety, {token_address: (is_safe, reason)})
+            if is_safe:
+                await execution_queue.put((token_address, meta))
+                continue  # Stays in flight until executed
+        except Exception as e:
+            log_trade(f"Safety worker error for {token_address}: {e}")
+        finally:
+            safety_queue.task_done()
+        in_flight.discard(token_address)
+
+async def execution_loop(execution_queue, in_flight):
+    """Buy tokens that passed screening, at most MAX_BUYS_PER_SCAN per SCAN_INTERVAL."""
+    recent = deque()     # Buy times within the last SCAN_INTERVAL
+    while True:
+        token_address, (token_symbol, liquidity, volume) = await execution_queue.get()
+        try:
+            now = time.time()
+            while recent and now - recent[0] >= SCAN_INTERVAL:
+                recent.popleft()
+            if token_address in positions or len(recent) >= MAX_BUYS_PER_SCAN:
+                continue  # Held already / buy budget spent: re-discovered next scan
+            log_trade(f"SAFETY PASS: {token_symbol} ({token_address}) | Liq: ${liquidity} | Vol: ${volume}. Buying...")
+            await asyncio.to_thread(buy_token, token_address, token_symbol)
+            recent.append(now)
+        except Exception as e:
+            log_trade(f"Execution error for {token_symbol}: {e}")
+        finally:
+            in_flight.discard(token_address)
+            execution_queue.task_done()
+
+async def monitor_loop():
+    """Check every position for take-profit / stop-loss each MONITOR_INTERVAL."""
+    while True:
+        try:
+            if positions:
+                await asyncio.to_thread(monitor_positions, MONITOR_INTERVAL)
+        except Exception as e:
+            log_trade(f"Monitor loop error: {e}")
+        await asyncio.sleep(MONITOR_INTERVAL)
+
+async def run_async():
+    log_trade("Bot started in scanning mode (async runtime)...")
+    safety_queue = asyncio.Queue(maxsize=SAFETY_QUEUE_SIZE)
+    execution_queue = asyncio.Queue(maxsize=EXECUTION_QUEUE_SIZE)
+    in_flight = set()    # Tokens queued / being screened / awaiting execution
+    tasks = [
+        asyncio.create_task(discovery_loop(safety_queue, in_flight), name="discovery"),
+        asyncio.create_task(execution_loop(execution_queue, in_flight), name="execution"),
+        asyncio.create_task(monitor_loop(), name="monitor"),
+    ] + [asyncio.create_task(safety_worker(safety_queue, execution_queue, in_flight), name=f"safety-{i}")
+         for i in range(safety.MAX_WORKERS)]
+    await asyncio.gather(*tasks)
+
 if __name__ == "__main__":
-    if web3.is_connected():
+    if metrics_server.start(port=metrics_server.SNIPER_METRICS_PORT):
+        print(f"Metrics endpoint: http://{metrics_server.METRICS_HOST}:{metrics_server.SNIPER_METRICS_PORT}/metrics")
+    if get_web3().is_connected():
         print("Connected to BSC Node!")
     else:
         print("Failed to connect to BSC Node.")
         
-    scan_and_trade()
+    if "--sync" in sys.argv:
+        scan_and_trade()
+    else:
+        try:
+            asyncio.run(run_async())
+        except KeyboardInterrupt:
+            log_trade("Bot stopped.")
@@ -0,0 +1,139 @@
+"""
+LRU cache bounded by the bytes its values actually hold.
+
+Sized from numpy nbytes (CandleSeries.nbytes, dicts of arrays), not entry
+counts, so a 400-day hourly history weighs what it really costs. Entries
+whose token is pinned (open positions) are never evicted and are accounted
+separately from the budget; everything else is evicted least-recently-used
+first once the unpinned bytes exceed it.
+
+Keys are token ids or tuples starting with one ((token_id, timeframe)).
+Hits, misses and evictions go to telemetry as <name>_hits_total etc.;
+summary() is a one-line report for the logs.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import telemetry
+
+def sizeof(value):
+    """Bytes held by a cached value: .nbytes, a dict of arrays, or sys.getsizeof."""
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+def _token(key):
+    return key[0] if isinstance(key, tuple) else key
+
+class ByteLRU:
+    def __init__(self, name, budget_bytes, ttl=None):
+        self.name = name
+        self.budget = int(budget_bytes)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (stored_at, value, nbytes); oldest first
+        self._pinned = frozenset()
+        self.bytes = 0                  # Unpinned bytes (counted against the budget)
+        self.pinned_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    # --- ACCESS ---
+    def get(self, key, record=True):
+        """
+        Value, or None on miss / expiry. A hit marks the entry most recently used.
+        record=False skips the hit / miss counters (internal lookups).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self.ttl is not None and time.time() - entry[0] >= self.ttl:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                if record:
+                    self.misses += 1
+                    telemetry.incr(f'{self.name}_misses_total')
+                return None
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+                telemetry.incr(f'{self.name}_hits_total')
+            return entry[1]
+
+    def put(self, key, value, nbytes=None):
+        nbytes = sizeof(value) if nbytes is None else int(nbytes)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.time(), value, nbytes)
+            if _token(key) in self._pinned:
+                self.pinned_bytes += nbytes
+            else:
+                self.bytes += nbytes
+            self._evict()
+        self._publish()
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def discard_token(self, token_id):
+        """Drop every entry for a token (all timeframes)."""
+        with self._lock:
+            for key in [k for k in self._entries if _token(k) == token_id]:
+                self._drop(key)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- PINNING ---
+    def pin(self, token_ids):
+        """Replace the pinned set (e.g. tokens with open positions); unpinned ones become evictable."""
+        with self._lock:
+            self._pinned = frozenset(token_ids)
+            self.bytes = self.pinned_bytes = 0
+            for key, (_, _, nbytes) in self._entries.items():
+                if _token(key) in self._pinned:
+                    self.pinned_bytes += nbytes
+                else:
+                    self.bytes += nbytes
+            self._evict()
+        self._publish()
+
+    # --- INTERNALS ---
+    def _drop(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        if _token(key) in self._pinned:
+            self.pinned_bytes -= nbytes
+        else:
+            self.bytes -= nbytes
+
+    def _evict(self):
+        if self.bytes <= self.budget:
+            return
+        for key in list(self._entries):
+            if self.bytes <= self.budget:
+                break
+            if _token(key) in self._pinned:
+                continue
+            self._drop(key)
+            self.evictions += 1
+            telemetry.incr(f'{self.name}_evictions_total')
+
+    def _publish(self):
+        telemetry.set_gauge(f'{self.name}_bytes', self.bytes + self.pinned_bytes)
+        telemetry.set_gauge(f'{self.name}_entries', len(self._entries))
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        ratio = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        return (f"{self.name}: {len(self._entries)} entries, {self.bytes / 2**20:.1f}/{self.budget / 2**20:.0f} MB"
+                f" + {self.pinned_bytes / 2**20:.1f} MB pinned | hits {self.hits} ({ratio}),"
+                f" misses {self.misses}, evictions {self.evictions}")
@@ -0,0 +1,294 @@
+"""
+Hourly candle store with an on-the-fly OHLCV resampler.
+
+The live bot used CoinGecko daily closes with high = low = open = close, so
+ATR was close-to-close movement and stops reacted days late. This module
+keeps real 1h OHLCV bars per token (Binance klines for the token's
+{SYMBOL}USDC pair, no API key) and serves any coarser timeframe from them:
+
+    candles.ingest(token_id, "CAKE")      # incremental: only bars since the last one
+    series = candles.get_series(token_id, "4h")   # compact; .to_frame() for pandas
+
+Bars live in CANDLE_DIR/<token_id>.npz as parallel numpy columns. Resampling
+is a handful of vectorized reduceat calls (first open, max high, min low,
+last close, summed volume) and each (token, timeframe) result is cached as a
+compact CandleSeries until new bars arrive, so one hourly ingest serves every
+timeframe without extra downloads. That series cache is the only one in the
+process: strategic_bot uses it as CANDLE_CACHE (cached_series / put_series,
+including its CoinGecko fallback series), so every series counts against
+CANDLE_CACHE_MB once. The newest bucket is partial (it ends at
+the latest close), the same way CoinGecko's last daily point is the current
+price.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+import http_client
+from byte_cache import ByteLRU
+from config import BINANCE_API_URL, CANDLE_CACHE_MB, CANDLE_STORE_MB
+
+KLINES_URL = f"{BINANCE_API_URL}/api/v3/klines"
+CANDLE_DIR = "candles"
+BASE_INTERVAL = "1h"
+BASE_SECONDS = 3600
+HISTORY_DAYS = 250           # Backfill depth on first ingest (Echo needs 200 daily bars)
+MAX_BARS = 400 * 24          # Hourly bars kept per token (365d rolling highs + slack)
+KLINES_LIMIT = 1000          # Max bars per klines request
+SERIES_TTL = 3600            # Seconds a cached series is served without re-checking the bars
+
+TIMEFRAMES = {'1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '12h': 43200, '1d': 86400, '1w': 604800}
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+_lock = threading.RLock()
+# token_id -> {col: np.ndarray}; ts = bar open (unix seconds). Reloaded from disk after eviction.
+_bars = ByteLRU('candle_store', CANDLE_STORE_MB * 2**20)
+# (token_id, timeframe) -> (n_bars, last_ts, CandleSeries); n_bars / last_ts are None
+# for series built elsewhere (put_series). Hit / miss counters come from cached_series().
+SERIES_CACHE = ByteLRU('candle_cache', CANDLE_CACHE_MB * 2**20, ttl=SERIES_TTL)
+
+def timeframe_seconds(timeframe):
+    """'4h' -> 14400. Also accepts any '<n>m' / '<n>h' / '<n>d' multiple of the base bar."""
+    if timeframe in TIMEFRAMES:
+        return TIMEFRAMES[timeframe]
+    unit = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}.get(timeframe[-1:])
+    if unit is None or not timeframe[:-1].isdigit():
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    seconds = int(timeframe[:-1]) * unit
+    if seconds % BASE_SECONDS:
+        raise ValueError(f"{timeframe} is finer than the {BASE_INTERVAL} base bars")
+    return seconds
+
+# --- SERIES ---
+class CandleSeries:
+    """
+    Compact OHLCV columns for one token at one timeframe.
+
+    Contiguous arrays instead of a DataFrame: int64 bar-open timestamps,
+    float64 prices, float32 volume, plus optional float32 `extra` columns.
+    About 10x smaller than the equivalent indicator DataFrame. Columns and
+    tail() are zero-copy views; to_frame() builds a fresh DataFrame for the
+    pandas-based strategies (and for debugging).
+    """
+    __slots__ = ('ts', 'open', 'high', 'low', 'close', 'volume', 'extra')
+
+    ALIASES = {'price': 'close', 'total_volume': 'volume'}
+
+    def __init__(self, ts, open, high, low, close, volume, extra=None):
+        self.ts = np.ascontiguousarray(ts, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.float32)
+        self.extra = {k: np.ascontiguousarray(v, dtype=np.float32) for k, v in (extra or {}).items()}
+
+    @classmethod
+    def from_bars(cls, bars):
+        return cls(bars['ts'], bars['open'], bars['high'], bars['low'], bars['close'], bars['volume'])
+
+    @classmethod
+    def from_frame(cls, df, extra=()):
+        """From a strategy-layout DataFrame (date index, price/high/low/open, total_volume)."""
+        import pandas as pd
+        close = df['close'] if 'close' in df.columns else df['price']
+        ts = df.index.asi8 // 10**9 if isinstance(df.index, pd.DatetimeIndex) else df['timestamp'].to_numpy() // 1000
+        return cls(ts, df.get('open', close), df.get('high', close), df.get('low', close), close,
+                   df['total_volume'] if 'total_volume' in df.columns else np.zeros(len(df)),
+                   {name: df[name].to_numpy(dtype=np.float32) for name in extra})
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, name):
+        """Column view by name ('close', 'price', 'volume', 'total_volume', or an extra)."""
+        name = self.ALIASES.get(name, name)
+        if name in self.extra:
+            return self.extra[name]
+        if name in self.__slots__[:6]:
+            return getattr(self, name)
+        raise KeyError(name)
+
+    def last(self, name):
+        return self[name][-1].item()
+
+    def tail(self, n):
+        """The last n bars; shares memory with this series."""
+        cut = slice(max(len(self) - n, 0), None)
+        return CandleSeries(self.ts[cut], self.open[cut], self.high[cut], self.low[cut],
+                            self.close[cut], self.volume[cut], {k: v[cut] for k, v in self.extra.items()})
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, c).nbytes for c in self.__slots__[:6]) + sum(v.nbytes for v in self.extra.values())
+
+    def to_frame(self):
+        """Fresh DataFrame in the layout the strategies use (date index, price = close)."""
+        import pandas as pd  # Lazy: the store itself is numpy-only
+        df = pd.DataFrame({
+            'timestamp': self.ts * 1000,
+            'price': self.close,
+            'total_volume': self.volume.astype(np.float64),
+            'high': self.high,
+            'low': self.low,
+            'open': self.open,
+            'close': self.close,
+        })
+        for name, values in self.extra.items():
+            df[name] = values.astype(np.float64)
+        df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('date', inplace=True)
+        return df
+
+# --- STORAGE ---
+def _path(token_id):
+    return os.path.join(CANDLE_DIR, f"{token_id}.npz")
+
+def _empty():
+    return {c: np.empty(0, dtype=np.int64 if c == 'ts' else np.float64) for c in COLUMNS}
+
+def load_bars(token_id):
+    """Hourly bars for a token ({col: array}); empty arrays if none stored."""
+    with _lock:
+        bars = _bars.get(token_id)
+        if bars is not None:
+            return bars
+        try:
+            with np.load(_path(token_id)) as npz:
+                bars = {c: npz[c] for c in COLUMNS}
+        except (OSError, KeyError, ValueError):
+            bars = _empty()
+        _bars.put(token_id, bars)
+        return bars
+
+def _save_bars(token_id, bars):
+    os.makedirs(CANDLE_DIR, exist_ok=True)
+    tmp = f"{_path(token_id)}.tmp"
+    with open(tmp, 'wb') as f:
+        np.savez(f, **bars)
+    os.replace(tmp, _path(token_id))
+
+def merge_bars(bars, new):
+    """Append new bars; a re-fetched bar (same ts, e.g. the open hour) replaces the old one."""
+    if not len(new['ts']):
+        return bars
+    keep = bars['ts'] < new['ts'][0]
+    merged = {c: np.concatenate([bars[c][keep], new[c]]) for c in COLUMNS}
+    if len(merged['ts']) > MAX_BARS:
+        merged = {c: v[-MAX_BARS:] for c, v in merged.items()}
+    return merged
+
+# --- INGEST ---
+def _parse_klines(rows):
+    """Binance kline rows -> columns. Volume is quote volume (USDC), like CoinGecko's USD volume."""
+    if not rows:
+        return _empty()
+    raw = np.array([r[:8] for r in rows], dtype=np.float64)
+    return {'ts': (raw[:, 0] // 1000).astype(np.int64), 'open': raw[:, 1], 'high': raw[:, 2],
+            'low': raw[:, 3], 'close': raw[:, 4], 'volume': raw[:, 7]}
+
+def _fetch_klines(pair, start_ts):
+    """All 1h klines from start_ts (seconds) to now, paging KLINES_LIMIT at a time."""
+    pages = []
+    start_ms = int(start_ts) * 1000
+    while True:
+        r = http_client.get(KLINES_URL, params={'symbol': pair, 'interval': BASE_INTERVAL,
+                                                'startTime': start_ms, 'limit': KLINES_LIMIT}, timeout=15)
+        r.raise_for_status()
+        rows = r.json()
+        pages.append(_parse_klines(rows))
+        if len(rows) < KLINES_LIMIT:
+            break
+        start_ms = int(rows[-1][0]) + BASE_SECONDS * 1000
+    return {c: np.concatenate([p[c] for p in pages]) for c in COLUMNS}
+
+def ingest(token_id, symbol, quote="USDC"):
+    """
+    Bring a token's hourly bars up to date (backfills HISTORY_DAYS on first use).
+    Returns the number of bars now stored. Raises on network/API errors.
+    """
+    with _lock:
+        bars = load_bars(token_id)
+        now = time.time()
+        if len(bars['ts']):
+            if now - bars['ts'][-1] < BASE_SECONDS / 2:
+                return len(bars['ts'])  # Already current
+            start = bars['ts'][-1]      # Re-fetch the last (possibly partial) bar
+        else:
+            start = now - HISTORY_DAYS * 86400
+
+    new = _fetch_klines(f"{symbol.upper()}{quote}", start)
+
+    with _lock:
+        bars = merge_bars(load_bars(token_id), new)
+        _bars.put(token_id, bars)
+        _save_bars(token_id, bars)
+        return len(bars['ts'])
+
+# --- RESAMPLING ---
+def resample(bars, timeframe):
+    """Aggregate hourly bars to timeframe. Returns columns in the same layout."""
+    seconds = timeframe_seconds(timeframe)
+    ts = bars['ts']
+    if seconds == BASE_SECONDS or not len(ts):
+        return bars
+    bucket = ts - ts % seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.append(starts[1:], len(ts)) - 1
+    return {
+        'ts': bucket[starts],
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+
+def get_series(token_id, timeframe="1d"):
+    """
+    CandleSeries for a token at timeframe, or None if no bars are stored.
+    Cached per (token, timeframe) until the hourly bars change; treat it as read-only.
+    """
+    with _lock:
+        bars = load_bars(token_id)
+        n = len(bars['ts'])
+        if not n:
+            return None
+        key = (token_id, timeframe)
+        hit = SERIES_CACHE.get(key, record=False)
+        if hit and hit[0] == n and hit[1] == bars['ts'][-1]:
+            return hit[2]
+        series = CandleSeries.from_bars(resample(bars, timeframe))
+        SERIES_CACHE.put(key, (n, bars['ts'][-1], series), series.nbytes)
+        return series
+
+def cached_series(token_id, timeframe="1d"):
+    """A series cached within SERIES_TTL (any source), without touching the bar store. None on miss."""
+    hit = SERIES_CACHE.get((token_id, timeframe))  # Counts candle_cache hits / misses
+    return hit[2] if hit else None
+
+def put_series(token_id, timeframe, series):
+    """Cache a series built elsewhere (e.g. CoinGecko daily closes) under the same budget."""
+    SERIES_CACHE.put((token_id, timeframe), (None, None, series), series.nbytes)
+
+def get_frame(token_id, timeframe="1d"):
+    """get_series() as a fresh DataFrame (None if no bars are stored)."""
+    series = get_series(token_id, timeframe)
+    return series.to_frame() if series is not None else None
+
+def forget(token_id):
+    """Drop a token's bars from memory (the .npz stays on disk)."""
+    with _lock:
+        _bars.discard(token_id)
+        SERIES_CACHE.discard_token(token_id)
+
+def pin(token_ids):
+    """Keep these tokens' bars and series in memory (open positions) regardless of budget."""
+    _bars.pin(token_ids)
+    SERIES_CACHE.pin(token_ids)
+
+def cache_summaries():
+    """One log line per in-memory cache."""
+    return [_bars.summary(), SERIES_CACHE.summary()]
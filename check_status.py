@@ -1,43 +1,79 @@
 import json
 import os
 import time
-import subprocess
 from datetime import datetime
 
+from config import POOLS
+import coordinator
+import metrics_server
+import price_snapshot
+
 STATE_FILE = "strategic_state.json"
-LOG_FILE = "bot.log"
+CYCLE_INTERVAL = 3600  # run_fleet is scheduled hourly
 
-def get_process_status():
-    try:
-        # Check if strategic_bot.py is running
-        res = subprocess.check_output(["pgrep", "-f", "strategic_bot.py"])
-        return True, res.decode().strip().replace('\n', ', ')
-    except:
-        return False, None
-
-def get_log_freshness():
-    if not os.path.exists(LOG_FILE):
-        return "Missing"
-    
-    mtime = os.path.getmtime(LOG_FILE)
-    ago = time.time() - mtime
+def get_bot_metrics():
+    """Scrape the bot's local metrics endpoint. None means the bot isn't serving (stopped/hung)."""
+    return metrics_server.fetch_metrics()
+
+def get_cycle_freshness(metrics):
+    last = metrics_server.value(metrics, 'last_cycle_timestamp_seconds', default=None)
+    if last is None:
+        return "⏳ Waiting for first cycle"
+
+    ago = time.time() - last
+    if ago < CYCLE_INTERVAL * 1.25: return f"🟢 Active (last cycle {int(ago / 60)}m ago)"
+    if ago < CYCLE_INTERVAL * 2: return f"🟡 Slow (last cycle {int(ago / 60)}m ago)"
+    return f"🔴 STALLED (last cycle {int(ago / 60)}m ago)"
+
+def print_throughput(metrics):
+    m = metrics_server
+    print(f"   Cycle:  {m.value(metrics, 'cycle_duration_seconds'):.0f}s wall | "
+          f"{m.value(metrics, 'cycle_work_seconds'):.0f}s work | "
+          f"{m.value(metrics, 'cycle_sleep_seconds'):.0f}s sleep | "
+          f"{m.value(metrics, 'cycle_tokens_evaluated'):.0f} tokens")
+
+    calls = m.by_label(metrics, 'api_requests_total', 'upstream')
+    limited = m.by_label(metrics, 'api_rate_limited_total', 'upstream')
+    for upstream, n in sorted(calls.items()):
+        print(f"   API:    {upstream:<16} {n:>6.0f} calls | {limited.get(upstream, 0):>4.0f} x 429")
+
+    ratio = m.value(metrics, 'candle_cache_hit_ratio', default=None)
+    if ratio is not None:
+        print(f"   Cache:  {ratio:.0%} candle hit ratio")
+    write = m.value(metrics, 'state_write_latency_seconds', default=None, quantile='0.9')
+    if write is not None:
+        print(f"   State:  {write * 1000:.1f}ms p90 write")
+
+def print_pool(title, pool, prices):
+    """Print one pool with positions marked from the price snapshot. Returns (cash, positions_value)."""
+    cash = pool.get('cash', 0)
+    print(f"\n{title}")
+    print(f"   Cash:      ${cash:.2f}")
     
-    if ago < 120: return f"🟢 Active ({int(ago)}s ago)"
-    if ago < 600: return f"🟡 Slow ({int(ago)}s ago)"
-    return f"🔴 STALLED ({int(ago/60)}m ago)"
+    pos_val, rows, _ = price_snapshot.value_positions(pool.get('positions', {}), prices)
+    if not rows:
+        print("   (No Positions)")
+    for row in rows:
+        mark = f"{row['age_s'] / 60:.0f}m old" if row['age_s'] is not None else "no mark, at entry"
+        print(f"   - {row['token'].upper():<6} {row['amount']:<8.4f} units @ ${row['entry']:<6.2f} "
+              f"-> ${row['price']:<8.4f} {row['pnl_pct']:+6.1f}% (Value: ${row['value']:.2f}, {mark})")
+    return cash, pos_val
 
 def check_status():
     print("\n=== 🦅 PIGEON TRADER HEALTH CHECK ===")
     print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # 1. SYSTEM HEALTH
-    is_running, pids = get_process_status()
-    log_status = get_log_freshness()
+    metrics = get_bot_metrics()
+    is_running = metrics is not None
     
     print("\n[SYSTEM]")
-    print(f"   Status: {'✅ RUNNING' if is_running else '❌ STOPPED'}")
-    if pids: print(f"   PID(s): {pids}")
-    print(f"   Logs:   {log_status}")
+    print(f"   Status: {'✅ RUNNING' if is_running else '❌ STOPPED (metrics endpoint unreachable)'}")
+    if is_running:
+        uptime = time.time() - metrics_server.value(metrics, 'start_time_seconds', default=time.time())
+        print(f"   Uptime: {uptime / 3600:.1f}h")
+        print(f"   Cycles: {get_cycle_freshness(metrics)}")
+        print_throughput(metrics)
 
     # 2. STRATEGY HEALTH
     if not os.path.exists(STATE_FILE):
@@ -50,46 +86,27 @@ def check_status():
             
         total_equity = 0
         total_cash = 0
+        prices = price_snapshot.load()
         
-        # ECHO
-        echo = state.get('echo', {})
-        print(f"\n[ECHO POOL] (Safe Core)")
-        print(f"   Cash:      ${echo.get('cash', 0):.2f}")
-        total_cash += echo.get('cash', 0)
-        
-        positions = echo.get('positions', {})
-        pos_val = 0
-        if positions:
-            for sym, data in positions.items():
-                amt = data['amount']
-                entry = data['entry_price']
-                curr_val = amt * entry # Approx
-                pos_val += curr_val
-                print(f"   - {sym.upper():<6} {amt:<8.4f} units @ ${entry:<6.2f} (Est: ${curr_val:.2f})")
-        else:
-            print("   (No Positions)")
-        
-        total_equity += (echo.get('cash', 0) + pos_val)
+        labels = {cfg['name']: cfg['label'] for cfg in POOLS}
+        for mode, pool in state.items():
+            if not isinstance(pool, dict) or 'cash' not in pool:
+                continue
+            title = f"[{mode.upper()} POOL]" + (f" ({labels[mode]})" if mode in labels else "")
+            cash, pos_val = print_pool(title, pool, prices)
+            total_cash += cash
+            total_equity += cash + pos_val
 
-        # NIA
-        nia = state.get('nia', {})
-        print(f"\n[NIA POOL] (Alpha Hunter)")
-        print(f"   Cash:      ${nia.get('cash', 0):.2f}")
-        total_cash += nia.get('cash', 0)
-        
-        positions = nia.get('positions', {})
-        pos_val = 0
-        if positions:
-            for sym, data in positions.items():
-                amt = data['amount']
-                entry = data['entry_price']
-                curr_val = amt * entry 
-                pos_val += curr_val
-                print(f"   - {sym.upper():<6} {amt:<8.4f} units @ ${entry:<6.2f} (Est: ${curr_val:.2f})")
-        else:
-            print("   (No Positions)")
-            
-        total_equity += (nia.get('cash', 0) + pos_val)
+        # Sharded workers (strategic_bot.py --sharded)
+        if os.path.exists(coordinator.COORD_DB):
+            coord = coordinator.status()
+            print("\n[WORKERS]")
+            for w in coord['workers']:
+                print(f"   {'🟢' if w['live'] else '🔴'} {w['worker_id']} (heartbeat {w['age']:.0f}s ago)")
+            for name, owner in sorted(coord['leases'].items()):
+                print(f"   {name}: {owner}")
+            if coord['intents']:
+                print("   Intents: " + ", ".join(f"{k}={v}" for k, v in sorted(coord['intents'].items())))
 
         # 3. SCALING ADVICE
         print("\n[SCALING ADVICE]")
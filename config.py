@@ -1,7 +1,14 @@
 # Config for Pigeon Trader
+import os
 
 # --- API ENDPOINTS ---
-BSC_RPC_URL = "https://bsc-dataseed.binance.org/"  # Official public node
+# Market data / exchange base URLs. Override with env vars to point the bot at
+# a local stand-in (see mock_exchange.py) for load tests.
+COINGECKO_API_URL = os.getenv("PIGEON_COINGECKO_URL", "https://api.coingecko.com/api/v3")
+BINANCE_API_URL = os.getenv("PIGEON_BINANCE_URL", "https://api.binance.com")
+BINANCE_FUTURES_URL = os.getenv("PIGEON_BINANCE_FUTURES_URL", "https://fapi.binance.com")
+
+BSC_RPC_URL = os.getenv("PIGEON_BSC_RPC_URL", "https://bsc-dataseed.binance.org/")  # Official public node
 # Alternative: "https://1rpc.io/bnb" or "https://bscrpc.com"
 
 # DexScreener API for scanning new pairs and fetching prices
@@ -21,17 +28,56 @@ SLIPPAGE = 10  # 10% slippage tolerance
 PANCAKE_ROUTER_ADDRESS = "0x10ED43C718714eb63d5aA57B78B54704E256024E"
 # WBNB Address
 WBNB_ADDRESS = "0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c"
+# PancakeSwap V2 Factory (getPair lookups for on-chain pricing)
+PANCAKE_FACTORY_ADDRESS = "0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73"
+# Binance-Peg USDT (18 decimals on BSC); its WBNB pair gives the BNB/USD price
+USDT_ADDRESS = "0x55d398326f99059fF775485246999027B3197955"
+
+# bot.py position prices: 'onchain' (pair reserves, one RPC batch per tick,
+# DexScreener for tokens without a WBNB pair) or 'dexscreener'
+MONITOR_PRICE_SOURCE = "onchain"
 
 # --- NOTIFICATIONS ---
 # Security: Load from .env file to prevent git leaks
-import os
-from dotenv import load_dotenv
+# Loaded on first access (module __getattr__), so tools that only need the
+# constants above don't import dotenv.
+_ENV_SETTINGS = {'TELEGRAM_TOKEN': "", 'TELEGRAM_CHAT_ID': ""}
+_env_loaded = False
+
+def load_env():
+    """Load .env once; don't crash if it (or python-dotenv) is missing."""
+    global _env_loaded
+    if not _env_loaded:
+        _env_loaded = True
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
 
-# Try to load .env, but don't crash if missing (fallback to empty)
-load_dotenv()
+def __getattr__(name):
+    if name in _ENV_SETTINGS:
+        load_env()
+        return os.getenv(name, _ENV_SETTINGS[name])
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
 
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+# --- STRATEGY POOLS ---
+# Each pool runs as its own worker every cycle, with its own cash and positions.
+#   strategy:  'echo' | 'nia' | 'aamr' (see strategic_bot.get_strategy_for_mode)
+#   universe:  which screener list it trades ('echo' or 'nia')
+#   allocation: share of INITIAL_CAPITAL when the pool is first created
+INITIAL_CAPITAL = 1000.0
+POOLS = [
+    {'name': 'echo', 'label': 'Safe Core', 'strategy': 'echo', 'universe': 'echo',
+     'allocation': 0.70, 'max_positions': 10, 'min_history': 200},
+    {'name': 'nia', 'label': 'Alpha Hunter', 'strategy': 'nia', 'universe': 'nia',
+     'allocation': 0.30, 'max_positions': 5, 'min_history': 30},
+]
 
 # --- SYSTEM ---
 WATCHLIST_FILE = "watchlist.json" # For Dashboard Visibility
+
+# In-process candle memory ceilings (byte_cache.ByteLRU, sized from array nbytes).
+# Tokens with open positions are pinned on top of these.
+CANDLE_CACHE_MB = 16   # Per-timeframe CandleSeries (candles.SERIES_CACHE, shared with strategic_bot)
+CANDLE_STORE_MB = 64   # Raw hourly bars loaded from candles/*.npz
@@ -0,0 +1,185 @@
+"""
+Shared coordination store for running several strategic_bot workers.
+
+Backed by one SQLite file (WAL mode) that every worker opens:
+  - workers:  heartbeats. A worker is live while its heartbeat is younger
+              than LEASE_TTL; a dead worker simply drops out.
+  - sharding: each token goes to the live worker with the highest
+              rendezvous hash score, so slices are disjoint, cover the whole
+              watchlist, and only the dead worker's tokens move on rebalance.
+  - leases:   named, expiring locks. "executor:<pool>" makes exactly one
+              worker the execution owner of a pool; "watchlist" elects the
+              one worker that runs the screener.
+  - intents:  BUY/SELL signals found by non-owners, queued for the pool's
+              execution owner to place.
+  - kv:       small shared JSON blobs (the published watchlist).
+
+Usage (every worker, same machine or a shared filesystem):
+    python strategic_bot.py --sharded
+    PIGEON_WORKER_ID=worker-2 python strategic_bot.py --sharded
+"""
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+COORD_DB = os.getenv("PIGEON_COORD_DB", "coordinator.db")
+WORKER_ID = os.getenv("PIGEON_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+LEASE_TTL = 180          # Seconds a heartbeat / lease stays valid without renewal
+INTENT_TTL = 900         # Older pending intents are dropped as stale (price moved)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, host TEXT, pid INTEGER, started REAL, heartbeat REAL);
+CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL);
+CREATE TABLE IF NOT EXISTS intents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, pool TEXT, token_id TEXT, side TEXT, payload TEXT,
+    submitted_by TEXT, created REAL, status TEXT DEFAULT 'pending', claimed_by TEXT, result TEXT);
+CREATE INDEX IF NOT EXISTS intents_pending ON intents (pool, status);
+CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, updated REAL);
+"""
+
+_local = threading.local()
+
+def _db():
+    """One connection per thread (sqlite3 connections aren't shared across threads)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != COORD_DB:
+        conn = sqlite3.connect(COORD_DB, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        _local.conn, _local.path = conn, COORD_DB
+    return conn
+
+@contextmanager
+def _tx():
+    """Write transaction that takes the DB write lock up front (no upgrade deadlocks)."""
+    conn = _db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+# --- MEMBERSHIP ---
+def heartbeat():
+    now = time.time()
+    with _tx() as conn:
+        conn.execute(
+            "INSERT INTO workers VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+            (WORKER_ID, socket.gethostname(), os.getpid(), now, now))
+        # Keep every lease this worker holds alive as long as it is
+        conn.execute("UPDATE leases SET expires = ? WHERE owner = ?", (now + LEASE_TTL, WORKER_ID))
+
+def leave():
+    """Clean shutdown: drop out of the shard ring and hand back leases immediately."""
+    with _tx() as conn:
+        conn.execute("DELETE FROM workers WHERE worker_id = ?", (WORKER_ID,))
+        conn.execute("DELETE FROM leases WHERE owner = ?", (WORKER_ID,))
+
+def live_workers():
+    rows = _db().execute("SELECT worker_id FROM workers WHERE heartbeat > ? ORDER BY worker_id",
+                         (time.time() - LEASE_TTL,)).fetchall()
+    return [r['worker_id'] for r in rows]
+
+# --- SHARDING ---
+def _score(worker, key):
+    return int.from_bytes(hashlib.blake2b(f"{worker}|{key}".encode(), digest_size=8).digest(), 'big')
+
+def owner_of(key, workers):
+    return max(workers, key=lambda w: _score(w, key))
+
+def shard(keys, workers=None, me=None):
+    """The subset of keys this worker owns under rendezvous hashing over live workers."""
+    me = me or WORKER_ID
+    workers = workers if workers is not None else live_workers()
+    if me not in workers:
+        workers = workers + [me]
+    return [k for k in keys if owner_of(k, workers) == me]
+
+# --- LEASES ---
+def acquire_lease(name, ttl=LEASE_TTL):
+    """Take or renew a named lease. True if this worker holds it afterwards."""
+    now = time.time()
+    with _tx() as conn:
+        row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+        if row and row['owner'] != WORKER_ID and row['expires'] > now:
+            return False
+        conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (name, WORKER_ID, now + ttl))
+        return True
+
+def release_lease(name):
+    with _tx() as conn:
+        conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, WORKER_ID))
+
+def lease_owner(name):
+    row = _db().execute("SELECT owner FROM leases WHERE name = ? AND expires > ?", (name, time.time())).fetchone()
+    return row['owner'] if row else None
+
+@contextmanager
+def mutex(name, ttl=30, poll=0.05):
+    """Cross-process critical section built on a short lease (survives a crashed holder)."""
+    while not acquire_lease(f"mutex:{name}", ttl):
+        time.sleep(poll)
+    try:
+        yield
+    finally:
+        release_lease(f"mutex:{name}")
+
+# --- INTENTS ---
+def submit_intent(pool, token_id, side, **payload):
+    """Queue a signal for the pool's execution owner. Duplicate pending intents are ignored."""
+    with _tx() as conn:
+        dup = conn.execute("SELECT 1 FROM intents WHERE pool = ? AND token_id = ? AND side = ? AND status = 'pending'",
+                           (pool, token_id, side)).fetchone()
+        if dup:
+            return False
+        conn.execute("INSERT INTO intents (pool, token_id, side, payload, submitted_by, created) VALUES (?, ?, ?, ?, ?, ?)",
+                     (pool, token_id, side, json.dumps(payload), WORKER_ID, time.time()))
+        return True
+
+def claim_intents(pool, limit=50):
+    """Atomically claim pending intents for a pool (oldest first). Stale ones are expired, not returned."""
+    now = time.time()
+    with _tx() as conn:
+        conn.execute("UPDATE intents SET status = 'stale' WHERE pool = ? AND status = 'pending' AND created < ?",
+                     (pool, now - INTENT_TTL))
+        rows = conn.execute("SELECT * FROM intents WHERE pool = ? AND status = 'pending' ORDER BY id LIMIT ?",
+                            (pool, limit)).fetchall()
+        conn.executemany("UPDATE intents SET status = 'claimed', claimed_by = ? WHERE id = ?",
+                         [(WORKER_ID, r['id']) for r in rows])
+    return [dict(r, payload=json.loads(r['payload'])) for r in rows]
+
+def finish_intent(intent_id, status="done", result=None):
+    with _tx() as conn:
+        conn.execute("UPDATE intents SET status = ?, result = ? WHERE id = ?", (status, result, intent_id))
+
+# --- KV ---
+def put(key, value):
+    with _tx() as conn:
+        conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, json.dumps(value), time.time()))
+
+def get(key):
+    """Returns (value, updated_ts) or (None, None)."""
+    row = _db().execute("SELECT value, updated FROM kv WHERE key = ?", (key,)).fetchone()
+    return (json.loads(row['value']), row['updated']) if row else (None, None)
+
+# --- STATUS ---
+def status():
+    """Snapshot for check_status: workers, leases and intent counts."""
+    conn = _db()
+    now = time.time()
+    workers = [dict(r, age=now - r['heartbeat'], live=now - r['heartbeat'] < LEASE_TTL)
+               for r in conn.execute("SELECT * FROM workers ORDER BY worker_id")]
+    leases = {r['name']: r['owner'] for r in conn.execute(
+        "SELECT name, owner FROM leases WHERE expires > ? AND name NOT LIKE 'mutex:%'", (now,))}
+    intents = {f"{r['pool']}:{r['status']}": r['n'] for r in conn.execute(
+        "SELECT pool, status, COUNT(*) AS n FROM intents GROUP BY pool, status")}
+    return {'workers': workers, 'leases': leases, 'intents': intents}
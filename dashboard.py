@@ -1,15 +1,19 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import json
 import os
 import time
-from backtest_system import run_all_strategies, load_all_data
+from collections import deque
+import event_feed
+import metrics_server
+import price_snapshot
 
 st.set_page_config(page_title="Pigeon Trader Dashboard", layout="wide")
 
 st.title("🐦 Pigeon Trader - Command Center")
 
+EVENT_BUFFER = 200  # Events kept in the Live Monitor session
+
 # --- LIVE MONITOR FUNCTIONS ---
 def load_json_safe(filepath):
     if os.path.exists(filepath):
@@ -20,6 +24,10 @@ def load_json_safe(filepath):
             return None
     return None
 
+def state_pools(state):
+    """(name, pool) for every strategy pool in the state file."""
+    return [(name, pool) for name, pool in state.items() if isinstance(pool, dict) and 'cash' in pool]
+
 # Sidebar
 st.sidebar.header("Configuration")
 page_mode = st.sidebar.radio("Mode", ["Live Monitor", "Strategy Backtest", "Historical Stress Test"])
@@ -47,6 +55,22 @@ if page_mode == "Live Monitor":
 
     st.caption(f"Last updated: {time.strftime('%H:%M:%S')}")
 
+    # Bot Health (scraped from the bot's local metrics endpoint)
+    metrics = metrics_server.fetch_metrics()
+    h1, h2, h3, h4 = st.columns(4)
+    if metrics:
+        last_cycle = metrics_server.value(metrics, 'last_cycle_timestamp_seconds', default=None)
+        h1.metric("Bot", "🟢 Running", f"last cycle {int((time.time() - last_cycle) / 60)}m ago" if last_cycle else "no cycle yet")
+        h2.metric("Cycle Time", f"{metrics_server.value(metrics, 'cycle_duration_seconds'):.0f}s",
+                  f"{metrics_server.value(metrics, 'cycle_sleep_seconds'):.0f}s sleeping", delta_color="off")
+        h3.metric("Tokens / Cycle", f"{metrics_server.value(metrics, 'cycle_tokens_evaluated'):.0f}")
+        limited = metrics_server.value(metrics, 'api_rate_limited_total')
+        h4.metric("API Calls", f"{metrics_server.value(metrics, 'api_requests_total'):.0f}", f"{limited:.0f} x 429",
+                  delta_color="inverse" if limited else "off")
+    else:
+        h1.metric("Bot", "🔴 Unreachable")
+        st.warning(f"Metrics endpoint not responding on port {metrics_server.METRICS_PORT}. Is strategic_bot.py running?")
+
     # Load State
     state = load_json_safe("strategic_state.json")
     watchlist = load_json_safe("watchlist.json")
@@ -55,13 +79,13 @@ if page_mode == "Live Monitor":
     
     with col1:
         st.subheader("💰 Fleet Status")
-        if state:
-            echo_cash = state.get('echo', {}).get('cash', 0)
-            nia_cash = state.get('nia', {}).get('cash', 0)
-            total_cash = echo_cash + nia_cash
-            st.metric("Total Free Cash", f"${total_cash:.2f}")
-            st.metric("Echo Pool", f"${echo_cash:.2f}")
-            st.metric("NIA Pool", f"${nia_cash:.2f}")
+        pool_cash = metrics_server.by_label(metrics, 'pool_cash_usd', 'pool') if metrics else {}
+        if not pool_cash and state:
+            pool_cash = {name: pool['cash'] for name, pool in state_pools(state)}
+        if pool_cash:
+            st.metric("Total Free Cash", f"${sum(pool_cash.values()):.2f}")
+            for name, cash in pool_cash.items():
+                st.metric(f"{name.upper()} Pool", f"${cash:.2f}")
         else:
             st.error("Bot State not found (Run bot first)")
 
@@ -92,46 +116,72 @@ if page_mode == "Live Monitor":
     with col3:
         st.subheader("📦 Open Positions")
         if state:
+            # Marked to market from the bot's price snapshot (no API calls)
+            prices = price_snapshot.load()
             all_pos = []
-            for mode in ['echo', 'nia']:
-                positions = state.get(mode, {}).get('positions', {})
-                for tid, pos in positions.items():
-                    pos['mode'] = mode
-                    pos['token'] = tid
-                    all_pos.append(pos)
+            for mode, pool in state_pools(state):
+                positions = pool.get('positions', {})
+                _, rows, _ = price_snapshot.value_positions(positions, prices)
+                for row in rows:
+                    row['mode'] = mode
+                    row['mark_age_min'] = round(row.pop('age_s') / 60) if row['age_s'] is not None else None
+                    all_pos.append(row)
             
             if all_pos:
-                st.dataframe(pd.DataFrame(all_pos))
+                df_pos = pd.DataFrame(all_pos)
+                st.metric("Positions Value", f"${df_pos['value'].sum():.2f}")
+                st.dataframe(df_pos[['mode', 'token', 'amount', 'entry', 'price', 'value', 'pnl_pct', 'mark_age_min']])
             else:
                 st.info("No active trades.")
                 
     st.divider()
-    st.subheader("Recent Logs (bot.log)")
-    log_file = "bot.log"
-    if os.path.exists(log_file):
-        with open(log_file, "r") as f:
-            lines = f.readlines()
-            # Filter for meaningful lines (skip empty/boring http logs if needed)
-            # For now, just show the last 50 lines to catch "EXIT CHECK"
-            st.code("".join(lines[-50:]), language='text') 
+    st.subheader("Recent Events")
+    # Keep a rolling buffer in the session and only parse what the bot appended
+    # since the last refresh, so render cost doesn't grow with the feed.
+    if os.path.exists(event_feed.EVENTS_FILE):
+        if 'event_offset' not in st.session_state:
+            events, st.session_state.event_offset = event_feed.tail(EVENT_BUFFER)
+            st.session_state.events = deque(events, maxlen=EVENT_BUFFER)
+        else:
+            events, st.session_state.event_offset = event_feed.read_since(st.session_state.event_offset)
+            st.session_state.events.extend(events)
+
+        buffered = list(st.session_state.events)
+        trades = [e for e in buffered if e.get('kind') == 'trade']
+        if trades:
+            st.dataframe(pd.DataFrame(trades).drop(columns=['t', 'kind'], errors='ignore').iloc[::-1])
+        st.code("\n".join(event_feed.format_event(e) for e in buffered[-50:]), language='text')
     else:
-        st.warning(f"Log file {log_file} not found. (Is nohup running?)")
+        # Older bots without the event feed: read only the end of bot.log
+        log_file = "bot.log"
+        lines = event_feed.tail_lines(log_file, 50)
+        if lines:
+            st.code("\n".join(lines), language='text')
+        else:
+            st.warning(f"No {event_feed.EVENTS_FILE} or {log_file} found. (Is the bot running?)")
 
 elif page_mode == "Strategy Backtest":
-    # Run Analysis (Cache this in a real app)
-    # Removing cache temporarily to ensure fresh debugging
-    # @st.cache_data 
-    def get_results():
-        return run_all_strategies()
+    # Backtest stack (strategies, matplotlib) loads only on this page,
+    # so the Live Monitor starts fast.
+    import backtest_cache
+    import matplotlib.pyplot as plt
     
+    # Results come from backtest_cache: only (token, strategy) cells whose CSV,
+    # strategy code or params changed are recomputed, in a background thread.
     if st.sidebar.button("🧹 Clear/Reload Data"):
-        st.cache_data.clear()
+        backtest_cache.clear()
         st.rerun()
 
-    results = get_results()
+    results, stale = backtest_cache.get_results()
+    if stale:
+        backtest_cache.refresh_async(stale)
     
     # --- Debug / Health Check ---
     st.sidebar.info(f"Loaded {len(results)} Tokens from Data")
+    if backtest_cache.is_busy():
+        prog = backtest_cache.progress()
+        st.sidebar.progress(prog['done'] / max(prog['total'], 1),
+                            text=f"Recomputing {prog['current'] or '...'} ({prog['done']}/{prog['total']})")
 
     # --- Category Filter ---
     # Detailed Mapping for the Pigeon Shortlist + Benchmarks
@@ -177,9 +227,14 @@ elif page_mode == "Strategy Backtest":
             metrics = []
             for name, res in strats.items():
                 if name == '_debug': continue
+                if res.get('pending'):
+                    metrics.append({"Strategy": name, "ROI %": "⏳", "Max DD %": "⏳", "Exposure %": "⏳"})
+                    continue
                 metrics.append({
                     "Strategy": name,
-                    "ROI %": f"{res['roi']:.2f}%"
+                    "ROI %": f"{res['roi']:.2f}%",
+                    "Max DD %": f"{res.get('max_dd', 0):.1f}%",
+                    "Exposure %": f"{res.get('exposure_pct', 0):.0f}%"
                 })
             st.table(pd.DataFrame(metrics))
             
@@ -227,6 +282,11 @@ elif page_mode == "Strategy Backtest":
             ax.grid(True)
             st.pyplot(fig)
 
+    # Poll until the background refresh fills in the pending cells
+    if backtest_cache.is_busy():
+        time.sleep(1)
+        st.rerun()
+
 elif page_mode == "Historical Stress Test":
     st.header("Historical Stress Test (2022 vs 2024)")
     
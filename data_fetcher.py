@@ -1,4 +1,4 @@
-import requests
+import http_client
 import pandas as pd
 import os
 import time
@@ -32,7 +32,7 @@ def fetch_history(token_id, token_symbol, start_date=None, end_date=None, days=3
         params['interval'] = 'daily'
     
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = http_client.get(url, params=params, timeout=15)
         
         # Rate limit handling
         if response.status_code == 429:
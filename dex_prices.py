@@ -0,0 +1,92 @@
+"""
+Batched DexScreener USD prices for the bot.py sniper.
+
+The tokens endpoint takes up to BATCH_SIZE comma-separated addresses, so
+prices for every held and candidate token are resolved in as few requests
+as possible instead of one per token:
+
+    prices = dex_prices.get_prices(list(positions))   # 50 positions -> 2 requests
+
+Each address is priced from its most liquid pair where it is the *base*
+token (priceUsd is the base token's price). Prices are cached per address
+(lower-cased) for PRICE_TTL; remember() seeds the cache from pairs the
+scanner already downloaded (search results carry priceUsd too), so buying
+right after a scan costs no extra request.
+"""
+import threading
+import time
+
+import config
+import http_client
+import telemetry
+
+BATCH_SIZE = 30          # DexScreener's max addresses per tokens/ request
+PRICE_TTL = 15           # Seconds a price is reused (monitor ticks, buy after scan)
+
+_lock = threading.Lock()
+_prices = {}             # address -> (price, fetched_at)
+
+def _best_prices(pairs):
+    """{base_address: (price, liquidity)} from the most liquid pair per base token."""
+    best = {}
+    for pair in pairs or []:
+        try:
+            addr = pair['baseToken']['address'].lower()
+            price = float(pair['priceUsd'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        liquidity = float((pair.get('liquidity') or {}).get('usd') or 0)
+        if addr not in best or liquidity > best[addr][1]:
+            best[addr] = (price, liquidity)
+    return best
+
+def remember(pairs, now=None):
+    """Cache prices embedded in already-fetched pairs (e.g. the scanner's search results)."""
+    now = now or time.time()
+    with _lock:
+        # Scans bring new tokens every minute; expired prices are never served again
+        for addr in [a for a, (_, ts) in _prices.items() if now - ts >= PRICE_TTL]:
+            del _prices[addr]
+        for addr, (price, _) in _best_prices(pairs).items():
+            _prices[addr] = (price, now)
+
+def _fetch(addresses):
+    """One tokens/ request for up to BATCH_SIZE addresses. Returns {address: price}."""
+    try:
+        response = http_client.get(f"{config.DEXSCREENER_API_URL}{','.join(addresses)}", timeout=10)
+        return {addr: price for addr, (price, _) in _best_prices(response.json().get('pairs')).items()}
+    except Exception as e:
+        print(f"Error fetching prices for {len(addresses)} tokens: {e}")
+        return {}
+
+def get_prices(token_addresses, max_age=PRICE_TTL):
+    """
+    {address: price or None} keyed as given. Cached prices younger than
+    max_age are reused; the rest are fetched BATCH_SIZE per request.
+    """
+    now = time.time()
+    result, missing = {}, []
+    with _lock:
+        for address in dict.fromkeys(token_addresses):
+            hit = _prices.get(address.lower())
+            if hit and now - hit[1] < max_age:
+                result[address] = hit[0]
+            else:
+                missing.append(address)
+    if result:
+        telemetry.incr('dex_price_cache_hits_total', len(result))
+
+    for i in range(0, len(missing), BATCH_SIZE):
+        batch = missing[i:i + BATCH_SIZE]
+        fetched = _fetch([a.lower() for a in batch])
+        fetched_at = time.time()
+        with _lock:
+            for address in batch:
+                price = fetched.get(address.lower())
+                if price is not None:
+                    _prices[address.lower()] = (price, fetched_at)
+                result[address] = price
+    return result
+
+def get_price(token_address, max_age=PRICE_TTL):
+    return get_prices([token_address], max_age)[token_address]
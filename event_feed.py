@@ -0,0 +1,153 @@
+"""
+Append-only structured event feed (JSONL + byte-offset index).
+
+Every event is one JSON line in <feed>.jsonl. <feed>.idx holds the byte
+offset at which each line starts, as fixed-width 8-byte little-endian
+integers, so the reader can jump straight to "the last N events" or
+"everything after byte X" without scanning the file. Reading cost depends
+on how many new events there are, not on how long the bot has been running.
+
+Writers:  emit('trade', side='BUY', symbol='CAKE', price=2.1)
+Readers:  tail(50)                     -> last 50 events
+          read_since(offset)           -> (new_events, next_offset)
+"""
+import json
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl  # Serialize appends across processes (POSIX only)
+except ImportError:
+    fcntl = None
+
+EVENTS_FILE = "events.jsonl"
+OFFSET = struct.Struct("<Q")
+
+_lock = threading.Lock()
+
+def index_path(feed):
+    return os.path.splitext(feed)[0] + ".idx"
+
+# --- WRITING ---
+def emit(kind, msg=None, feed=EVENTS_FILE, **fields):
+    """Append one event. Never raises: the feed must not take the bot down."""
+    event = {'ts': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 't': round(time.time(), 3), 'kind': kind}
+    if msg is not None:
+        event['msg'] = msg
+    event.update(fields)
+    line = (json.dumps(event, separators=(',', ':'), default=str) + "\n").encode()
+    try:
+        with _lock, open(feed, "ab") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(line)
+                f.flush()
+                with open(index_path(feed), "ab") as idx:
+                    idx.write(OFFSET.pack(offset))
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    except OSError as e:
+        print(f"Event feed write failed: {e}")
+    return event
+
+def rebuild_index(feed=EVENTS_FILE):
+    """Regenerate <feed>.idx from the data file (after a crash or manual edit)."""
+    offsets = []
+    with open(feed, "rb") as f:
+        pos = 0
+        for line in f:
+            if line.endswith(b"\n"):
+                offsets.append(pos)
+            pos += len(line)
+    with open(index_path(feed), "wb") as idx:
+        idx.write(b"".join(OFFSET.pack(o) for o in offsets))
+    return len(offsets)
+
+# --- READING ---
+def count(feed=EVENTS_FILE):
+    """Number of indexed events."""
+    try:
+        return os.path.getsize(index_path(feed)) // OFFSET.size
+    except OSError:
+        return 0
+
+def _parse(chunk):
+    """Decode complete lines from a bytes chunk. Returns (events, bytes_consumed)."""
+    end = chunk.rfind(b"\n") + 1  # Ignore a trailing line that is still being written
+    events = []
+    for line in chunk[:end].splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events, end
+
+def read_since(offset=0, feed=EVENTS_FILE, max_bytes=None):
+    """
+    Events appended after byte `offset`.
+    Returns: (events, next_offset) - pass next_offset back in on the next call.
+    If the feed was truncated/rotated below `offset`, reading restarts at 0.
+    """
+    try:
+        size = os.path.getsize(feed)
+    except OSError:
+        return [], 0
+    if offset > size:
+        offset = 0
+    if offset == size:
+        return [], offset
+    with open(feed, "rb") as f:
+        f.seek(offset)
+        chunk = f.read(max_bytes) if max_bytes else f.read()
+    events, consumed = _parse(chunk)
+    return events, offset + consumed
+
+def tail(n=50, feed=EVENTS_FILE):
+    """
+    Last n events via the offset index.
+    Returns: (events, next_offset) so callers can continue with read_since().
+    """
+    total = count(feed)
+    if total == 0 or n <= 0:
+        return [], _size(feed)
+    first = max(total - n, 0)
+    with open(index_path(feed), "rb") as idx:
+        idx.seek(first * OFFSET.size)
+        (start,) = OFFSET.unpack(idx.read(OFFSET.size))
+    return read_since(start, feed)
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def tail_lines(path, n=50, block=8192):
+    """Last n lines of a plain text file, reading backwards from the end."""
+    size = _size(path)
+    if size == 0:
+        return []
+    data = b""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return [line.decode(errors="replace") for line in data.splitlines()[-n:]]
+
+def format_event(event):
+    """One log-style line for an event."""
+    if event.get('kind') == 'log':
+        return f"[{event['ts']}] {event.get('msg', '')}"
+    fields = " ".join(f"{k}={v}" for k, v in event.items() if k not in ('ts', 't', 'kind', 'msg'))
+    text = f"{event.get('msg', '')} {fields}".strip()
+    return f"[{event['ts']}] {event['kind'].upper()} {text}"
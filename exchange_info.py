@@ -0,0 +1,147 @@
+"""
+Cached Binance exchangeInfo index for local pair validation and rounding.
+
+One public /api/v3/exchangeInfo call (no API key) is condensed to the
+TRADING pairs quoted in QUOTE_ASSET and their order filters, cached in
+memory and on disk for CACHE_TTL. The bot uses it to:
+  - drop watchlist tokens that have no {SYMBOL}USDC pair before any signal work,
+  - skip BUYs on missing pairs instead of waiting for a -1121 rejection,
+  - floor SELL quantities to LOT_SIZE and check min notional locally.
+
+If exchangeInfo can't be fetched and there is no cache, every check passes
+through (the exchange stays the final judge, as before). After a failed
+fetch the stale index (or None) is served for RETRY_BACKOFF before trying
+again, and one lock keeps concurrent pool workers to a single fetch.
+"""
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN
+
+import http_client
+from config import BINANCE_API_URL
+
+EXCHANGE_INFO_URL = f"{BINANCE_API_URL}/api/v3/exchangeInfo"
+CACHE_FILE = "exchange_info.json"
+CACHE_TTL = 24 * 3600   # Listings/filters change rarely
+QUOTE_ASSET = "USDC"
+RETRY_BACKOFF = 5 * 60  # Seconds between refresh attempts while Binance is failing
+
+_lock = threading.Lock()
+_index = None           # {pair: {...filters}}
+_fetched_at = 0.0
+_failed_at = 0.0
+
+# --- INDEX ---
+def _filters(symbol_info):
+    out = {'step': None, 'min_qty': 0.0, 'min_notional': 0.0}
+    for f in symbol_info.get('filters', []):
+        kind = f.get('filterType')
+        if kind == 'LOT_SIZE':
+            out['step'] = f['stepSize']
+            out['min_qty'] = float(f['minQty'])
+        elif kind == 'MARKET_LOT_SIZE' and out['step'] is None:
+            out['step'] = f['stepSize']
+        elif kind in ('NOTIONAL', 'MIN_NOTIONAL'):
+            out['min_notional'] = float(f.get('minNotional', 0))
+    return out
+
+def build_index(raw, quote=QUOTE_ASSET):
+    """Condense a raw exchangeInfo payload to {pair: {base, step, min_qty, min_notional}}."""
+    index = {}
+    for s in raw.get('symbols', []):
+        if s.get('quoteAsset') != quote or s.get('status') != 'TRADING':
+            continue
+        index[s['symbol']] = {'base': s['baseAsset'], **_filters(s)}
+    return index
+
+def _load_cache():
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            cached = json.load(f)
+        return cached['fetched_at'], cached['pairs']
+    except (OSError, ValueError, KeyError):
+        return 0.0, None
+
+def _fetch():
+    r = http_client.get(EXCHANGE_INFO_URL, timeout=15)
+    r.raise_for_status()
+    return build_index(r.json())
+
+def _stale(now):
+    return _index is None or now - _fetched_at > CACHE_TTL
+
+def get_index(force=False):
+    """
+    The pair index, refreshed once CACHE_TTL has passed. None if never available.
+    A failed refresh isn't retried for RETRY_BACKOFF (unless force).
+    """
+    global _index, _fetched_at, _failed_at
+    now = time.time()
+    if not force and not _stale(now):
+        return _index
+    with _lock:
+        if _index is None and not force:
+            _fetched_at, _index = _load_cache()
+        # Another worker may have refreshed (or failed) while we waited
+        if not force and (not _stale(now) or now - _failed_at < RETRY_BACKOFF):
+            return _index
+        try:
+            _index = _fetch()
+            _fetched_at = now
+            tmp = f"{CACHE_FILE}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump({'fetched_at': now, 'pairs': _index}, f, separators=(',', ':'))
+            os.replace(tmp, CACHE_FILE)
+        except Exception as e:
+            # Keep serving the stale index rather than none at all
+            _failed_at = time.time()
+            print(f"exchangeInfo refresh failed: {e}")
+        return _index
+
+# --- LOOKUPS ---
+def pair_for(symbol, quote=QUOTE_ASSET):
+    return f"{symbol.upper()}{quote}"
+
+def is_tradeable(pair):
+    index = get_index()
+    return True if index is None else pair in index
+
+def filter_tradeable(candidates, keep_ids=()):
+    """
+    Drop candidates (screener dicts with 'id'/'symbol') that have no tradeable pair.
+    Ids in keep_ids (open positions) are always kept so they can still be sold.
+    Returns: (kept, dropped_symbols)
+    """
+    index = get_index()
+    if index is None:
+        return list(candidates), []
+    kept, dropped = [], []
+    for c in candidates:
+        if c['id'] in keep_ids or pair_for(c['symbol']) in index:
+            kept.append(c)
+        else:
+            dropped.append(c['symbol'].upper())
+    return kept, dropped
+
+def round_qty(pair, qty):
+    """Floor qty to the pair's LOT_SIZE step (unchanged if the pair/step is unknown)."""
+    index = get_index()
+    info = index.get(pair) if index else None
+    if not info or not info['step']:
+        return qty
+    step = Decimal(info['step']).normalize()
+    return float((Decimal(str(qty)) / step).to_integral_value(rounding=ROUND_DOWN) * step)
+
+def check_order(pair, qty, price):
+    """Local pre-flight for a MARKET order. Returns None if OK, else the reason."""
+    index = get_index()
+    info = index.get(pair) if index else None
+    if not info:
+        return None if index is None else f"{pair} not tradeable"
+    if qty < info['min_qty'] or qty <= 0:
+        return f"qty {qty} below LOT_SIZE min {info['min_qty']}"
+    if qty * price < info['min_notional']:
+        return f"notional ${qty * price:.2f} below min ${info['min_notional']:.2f}"
+    return None
@@ -0,0 +1,139 @@
+"""
+Single entry point for outbound HTTP calls.
+
+Drop-in for requests.get/post that books every call (and every 429) against
+its upstream in telemetry, so the metrics endpoint can show API pressure per
+provider.
+
+All calls share one keep-alive Session and a per-upstream rate limiter, so
+concurrent pool workers together stay under each provider's quota. GETs can
+opt into a short TTL cache (cache_ttl=...), and concurrent identical GETs
+share a single request.
+
+PIGEON_HTTP_MODE=record|replay captures every call to / serves every call
+from a local archive instead of the network (see http_replay.py).
+"""
+import atexit
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+import requests
+
+import http_replay
+import telemetry
+from config import BINANCE_API_URL, BINANCE_FUTURES_URL, BSC_RPC_URL, COINGECKO_API_URL
+
+UPSTREAMS = {
+    'api.coingecko.com': 'coingecko',
+    'pro-api.coingecko.com': 'coingecko',
+    'api.binance.com': 'binance',
+    'fapi.binance.com': 'binance_futures',
+    'api.dexscreener.com': 'dexscreener',
+    'api.honeypot.is': 'honeypot',
+    'api.telegram.org': 'telegram',
+    'bsc-dataseed.binance.org': 'bsc_rpc',
+}
+# Configured base URLs (e.g. a local mock_exchange.py) keep their upstream's
+# limiter and counters.
+BASE_URLS = {
+    COINGECKO_API_URL: 'coingecko',
+    BINANCE_FUTURES_URL: 'binance_futures',
+    BINANCE_API_URL: 'binance',
+    BSC_RPC_URL: 'bsc_rpc',
+}
+
+# Minimum seconds between calls per upstream (shared by every thread).
+# CoinGecko free tier is ~30 calls/min.
+RATE_LIMITS = {
+    'coingecko': 2.0,
+}
+
+_session = requests.Session()
+_limit_lock = threading.Lock()
+_next_slot = {}          # upstream -> earliest time the next call may start
+_cache_lock = threading.Lock()
+_cache = {}              # key -> (expires_at, response)
+_inflight = {}           # key -> Lock held by the thread fetching it
+_recorder, _player = http_replay.from_env()
+if _recorder is not None:
+    atexit.register(_recorder.close)
+
+def set_replay(recorder=None, player=None):
+    """Switch record/replay programmatically (benchmarks); both None = live network."""
+    global _recorder, _player
+    _recorder, _player = recorder, player
+
+def upstream_for(url):
+    host = urlparse(url).hostname or ''
+    if host in UPSTREAMS:
+        return UPSTREAMS[host]
+    for base, upstream in BASE_URLS.items():
+        if url.startswith(base):
+            return upstream
+    return host or 'unknown'
+
+def throttle(upstream):
+    """Reserve the next call slot for upstream and sleep until it arrives."""
+    interval = RATE_LIMITS.get(upstream)
+    if not interval:
+        return
+    with _limit_lock:
+        now = time.time()
+        slot = max(now, _next_slot.get(upstream, 0.0))
+        _next_slot[upstream] = slot + interval
+    if slot > now:
+        telemetry.sleep(slot - now)
+
+def request(method, url, upstream=None, **kwargs):
+    """requests.request() with per-upstream call / 429 / error counters."""
+    upstream = upstream or upstream_for(url)
+    throttle(upstream)
+    telemetry.incr('api_requests_total', upstream=upstream)
+    if _player is not None:
+        response = _player.respond(method, url, kwargs.get('params'), upstream)
+    else:
+        start = time.perf_counter()
+        try:
+            response = _session.request(method, url, **kwargs)
+        except Exception:
+            telemetry.incr('api_errors_total', upstream=upstream)
+            raise
+        if _recorder is not None:
+            _recorder.record(method, url, kwargs.get('params'), upstream, response, time.perf_counter() - start)
+    if response.status_code == 429:
+        telemetry.incr('api_rate_limited_total', upstream=upstream)
+    return response
+
+def _cache_key(url, params):
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+def get(url, cache_ttl=None, **kwargs):
+    """GET. With cache_ttl, a 200 response is reused for that many seconds."""
+    if not cache_ttl:
+        return request('GET', url, **kwargs)
+
+    key = _cache_key(url, kwargs.get('params'))
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > time.time():
+            telemetry.incr('api_cache_hits_total', upstream=upstream_for(url))
+            return hit[1]
+        flight = _inflight.setdefault(key, threading.Lock())
+
+    with flight:
+        # Another thread may have fetched it while we waited
+        with _cache_lock:
+            hit = _cache.get(key)
+            if hit and hit[0] > time.time():
+                telemetry.incr('api_cache_hits_total', upstream=upstream_for(url))
+                return hit[1]
+        response = request('GET', url, **kwargs)
+        with _cache_lock:
+            if response.status_code == 200:
+                _cache[key] = (time.time() + cache_ttl, response)
+            _inflight.pop(key, None)
+        return response
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
@@ -0,0 +1,178 @@
+"""
+Record / replay of outbound HTTP for offline, deterministic runs.
+
+Every call that goes through http_client can be captured into a gzipped
+JSONL archive, then served back later with no network at all:
+
+    PIGEON_HTTP_MODE=record PIGEON_HTTP_ARCHIVE=runs/cycle.jsonl.gz python strategic_bot.py
+    PIGEON_HTTP_MODE=replay PIGEON_HTTP_ARCHIVE=runs/cycle.jsonl.gz python strategic_bot.py
+
+Replay matches on method + URL + query params, ignoring VOLATILE_PARAMS
+(cache-busters and time windows that differ run to run). Repeated calls for
+the same key get the recorded responses in order; the last one repeats once
+they run out. Unknown requests get a 404 and are counted as misses.
+
+Replay can inject conditions to measure the bot under stress:
+    PIGEON_REPLAY_LATENCY=0.25          # seconds added to every response
+    PIGEON_REPLAY_429=coingecko=30/60   # quota: >30 calls per 60s -> 429
+    PIGEON_REPLAY_429=binance=every:20  # every 20th call -> 429
+    (comma-separate several upstream rules)
+
+Only calls through http_client are covered; python-binance's signed
+endpoints (orders, get_account) are not.
+"""
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+import telemetry
+
+VOLATILE_PARAMS = {'ts', '_', 'startTime', 'endTime', 'from', 'to', 'timestamp'}
+RETRY_AFTER = 5          # Seconds advertised on injected 429s
+
+def request_key(method, url, params=None):
+    """Stable key for a request: method, scheme/host/path and non-volatile params, sorted."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if params:
+        query.update({k: str(v) for k, v in params.items()})
+    query = {k: v for k, v in query.items() if k not in VOLATILE_PARAMS}
+    return f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}?{urlencode(sorted(query.items()))}"
+
+def make_response(status, content=b"", headers=None, url=""):
+    """A real requests.Response, so callers can't tell replay from the network."""
+    r = requests.models.Response()
+    r.status_code = status
+    r._content = content
+    r.headers.update(headers or {})
+    r.url = url
+    r.encoding = 'utf-8'
+    return r
+
+# --- RECORD ---
+class Recorder:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = gzip.open(path, 'at')  # Appending adds a gzip member; readers see one stream
+        self.count = 0
+
+    def record(self, method, url, params, upstream, response, elapsed):
+        entry = {
+            'key': request_key(method, url, params),
+            'upstream': upstream,
+            'status': response.status_code,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() in ('content-type', 'retry-after')},
+            'body': base64.b64encode(response.content).decode(),
+            'elapsed': round(elapsed, 4),
+            't': round(time.time(), 3),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self._file.flush()  # Survive a crash / kill mid-run
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+# --- REPLAY ---
+def parse_rules(spec):
+    """'coingecko=30/60,binance=every:20' -> {upstream: ('quota', 30, 60) | ('every', 20)}."""
+    rules = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(','))):
+        upstream, rule = part.split('=', 1)
+        if rule.startswith('every:'):
+            rules[upstream] = ('every', int(rule[len('every:'):]))
+        else:
+            calls, window = rule.split('/')
+            rules[upstream] = ('quota', int(calls), float(window))
+    return rules
+
+class Quota:
+    """Per-upstream 429 injection from parse_rules() rules (shared with mock_exchange.py)."""
+    def __init__(self, rules=None):
+        self.rules = rules or {}
+        self._calls = {}          # upstream -> call count (every:N)
+        self._window = {}         # upstream -> deque of call times (quota)
+
+    def throttled(self, upstream):
+        """Count a call against upstream; True if it should get a 429. Not thread-safe."""
+        rule = self.rules.get(upstream)
+        if not rule:
+            return False
+        if rule[0] == 'every':
+            self._calls[upstream] = self._calls.get(upstream, 0) + 1
+            return self._calls[upstream] % rule[1] == 0
+        _, calls, window = rule
+        now = time.time()
+        recent = self._window.setdefault(upstream, deque())
+        while recent and now - recent[0] > window:
+            recent.popleft()
+        if len(recent) >= calls:
+            return True
+        recent.append(now)
+        return False
+
+class Player:
+    def __init__(self, path, latency=0.0, rules=None):
+        self.path = path
+        self.latency = latency
+        self.quota = Quota(rules)
+        self._lock = threading.Lock()
+        self._responses = {}      # key -> [entry, ...] in recorded order
+        self._served = {}         # key -> next index
+        self.misses = 0
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses.setdefault(entry['key'], []).append(entry)
+
+    def respond(self, method, url, params, upstream):
+        key = request_key(method, url, params)
+        with self._lock:
+            throttled = self.quota.throttled(upstream)
+            entries = self._responses.get(key)
+            entry = None
+            if entries and not throttled:
+                i = self._served.get(key, 0)
+                entry = entries[min(i, len(entries) - 1)]
+                self._served[key] = i + 1
+            elif not entries:
+                self.misses += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            return make_response(429, b'{"status":{"error_code":429,"error_message":"replay throttle"}}',
+                                 {'Retry-After': str(RETRY_AFTER), 'Content-Type': 'application/json'}, url)
+        if entry is None:
+            telemetry.incr('replay_misses_total', upstream=upstream)
+            return make_response(404, json.dumps({'error': 'not in replay archive', 'key': key}).encode(),
+                                 {'Content-Type': 'application/json'}, url)
+        return make_response(entry['status'], base64.b64decode(entry['body']), entry['headers'], url)
+
+    def summary(self):
+        served = sum(self._served.values())
+        return f"replay {self.path}: {len(self._responses)} keys, {served} served, {self.misses} misses"
+
+# --- SETUP ---
+def from_env():
+    """(recorder, player) per PIGEON_HTTP_MODE; both None in normal live mode."""
+    mode = os.getenv("PIGEON_HTTP_MODE", "").lower()
+    path = os.getenv("PIGEON_HTTP_ARCHIVE", "http_archive.jsonl.gz")
+    if mode == "record":
+        return Recorder(path), None
+    if mode == "replay":
+        return None, Player(path, float(os.getenv("PIGEON_REPLAY_LATENCY", "0") or 0),
+                            parse_rules(os.getenv("PIGEON_REPLAY_429")))
+    return None, None
@@ -1,6 +1,18 @@
 import pandas as pd
 import numpy as np
 
+def true_range(df, price_col='close'):
+    """
+    max(high - low, |high - prev close|, |low - prev close|).
+    With real OHLC (candles.py) this is the classic TR; in Cloud Paper Mode
+    (High=Low=Close) it reduces to abs(close - prev close) as before.
+    """
+    prev = df[price_col].shift(1)
+    if 'high' not in df.columns or 'low' not in df.columns:
+        return (df[price_col] - prev).abs()
+    return pd.concat([df['high'] - df['low'], (df['high'] - prev).abs(), (df['low'] - prev).abs()],
+                     axis=1).max(axis=1, skipna=False)
+
 def calculate_indicators(df):
     """
     Calculate all technical indicators needed by strategies (Echo, NIA, AAMR).
@@ -29,7 +41,7 @@ def calculate_indicators(df):
     # ------------------------------------
     # True Range. If High=Low=Close, TR = Abs(Close - PrevClose)
     # This effectively measures "Daily Move"
-    df['price_change'] = df['close'].diff().abs()
+    df['price_change'] = true_range(df)
     df['atr'] = df['price_change'].rolling(14).mean()
     
     # 3. VOLUME SIGNALS (Echo needs this)
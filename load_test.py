@@ -0,0 +1,239 @@
+"""
+Load test: fleet cycle time, memory and order latency as the watchlist grows.
+
+Starts mock_exchange.py in-process, then runs each watchlist size in a fresh
+interpreter (clean caches and RSS) pointed at it through the PIGEON_*_URL
+base URLs. The child takes the top-N tokens by market cap from the mock's
+/coins/markets, splits them across the Echo / NIA universes and runs
+`--cycles` fleet cycles in a scratch directory: the first is cold (candle
+backfill for every token), the rest are warm.
+
+Per size it reports wall time per cycle, RSS and peak RSS, candle cache
+bytes, and order round-trip latency (ORDER_PROBES buy/sell + get_order
+against the mock; with python-binance installed and --live, the bot's own
+order_submit spans too). Results go to RESULTS_FILE and, if matplotlib is
+installed, a chart in CHART_FILE.
+
+Usage:
+    python load_test.py                              # SIZES, no client-side pacing
+    python load_test.py --sizes 20,200 --cycles 3
+    python load_test.py --quota coingecko=30/60 --latency 0.05 --paced   # provider-like conditions
+    python load_test.py --live                       # real order path (needs python-binance)
+
+Never touches the real APIs, Telegram or your state files.
+"""
+import csv
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = [20, 100, 500, 1000, 2000]
+CYCLES = 2
+ORDER_PROBES = 20
+RESULTS_FILE = "load_test_results.csv"
+CHART_FILE = "load_test.png"
+CHILD_TIMEOUT_S = 3600
+ECHO_SHARE = 2 / 3          # Rest of the watchlist goes to the NIA universe
+
+def arg_value(flag, default=None):
+    if flag in sys.argv:
+        idx = sys.argv.index(flag)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return default
+
+# --- MEASUREMENT (child) ---
+def rss_mb():
+    """(current, peak) resident set size in MB."""
+    try:
+        with open('/proc/self/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return peak, peak
+
+def mock_watchlist(n):
+    """Top-n mock tokens by market cap as (echo, nia) screener-style dicts."""
+    import http_client
+    from config import COINGECKO_API_URL
+    rows, page = [], 1
+    while len(rows) < n:
+        r = http_client.get(f"{COINGECKO_API_URL}/coins/markets",
+                            params={'vs_currency': 'usd', 'order': 'market_cap_desc', 'per_page': 250, 'page': page},
+                            timeout=30)
+        r.raise_for_status()
+        batch = [c for c in r.json() if c['id'] != 'bitcoin']
+        if not batch:
+            break
+        rows.extend(batch)
+        page += 1
+    tokens = [{'id': c['id'], 'symbol': c['symbol'].upper(), 'age_years': 5.0, 'dev_score': 50,
+               'categories': [], 'is_flash_crash': False} for c in rows[:n]]
+    cut = round(len(tokens) * ECHO_SHARE)
+    return tokens[:cut], tokens[cut:]
+
+def probe_orders(count=ORDER_PROBES):
+    """Milliseconds per order round trip (POST /order + GET /order) against the mock."""
+    import http_client
+    import exchange_info
+    from config import BINANCE_API_URL
+    pair = next(iter(exchange_info.get_index() or {}), None)
+    if pair is None:
+        return []
+    timings, bought = [], 0
+    for i in range(count):
+        side = 'BUY' if i % 2 == 0 else 'SELL'
+        qty = {'quoteOrderQty': 10} if side == 'BUY' else {'quantity': bought}
+        start = time.perf_counter()
+        r = http_client.request('POST', f"{BINANCE_API_URL}/api/v3/order", timeout=10,
+                                data={'symbol': pair, 'side': side, 'type': 'MARKET', **qty})
+        order = r.json()
+        http_client.get(f"{BINANCE_API_URL}/api/v3/order", params={'symbol': pair, 'orderId': order.get('orderId')},
+                        timeout=10)
+        timings.append((time.perf_counter() - start) * 1000)
+        bought = order.get('executedQty', 0)
+    return timings
+
+def run_size(n, cycles, live):
+    """Child process: n-token watchlist, `cycles` fleet cycles. Returns one result dict."""
+    import http_client
+    import strategic_bot
+    import telemetry
+
+    if '--paced' not in sys.argv:
+        http_client.RATE_LIMITS.clear()   # The mock's --quota stands in for provider limits
+    strategic_bot.PAPER_MODE = not live
+    echo, nia = mock_watchlist(n)
+    strategic_bot.WATCHLISTS = {'echo': {c['id']: [] for c in echo}, 'nia': {c['id']: [] for c in nia}}
+    strategic_bot.TOKEN_METADATA = {c['id']: {k: c[k] for k in strategic_bot.METADATA_FIELDS} for c in echo + nia}
+
+    result = {'tokens': len(echo) + len(nia), 'mode': 'live' if live else 'paper'}
+    submits = []
+    for c in range(cycles):
+        start = time.perf_counter()
+        strategic_bot.run_fleet()
+        wall = time.perf_counter() - start
+        summary = telemetry.last_cycle or {}
+        stages = summary.get('stages', {})
+        label = 'cold' if c == 0 else f'warm{c}'
+        result[f'{label}_cycle_s'] = round(wall, 3)
+        result[f'{label}_sleep_s'] = summary.get('sleep_s', 0)
+        result[f'{label}_evaluated'] = stages.get('get_signal', {}).get('n', 0)
+        if 'order_submit' in stages:
+            submits.append(stages['order_submit']['p50_ms'])
+
+    rss, peak = rss_mb()
+    cache = strategic_bot.CANDLE_CACHE
+    result.update({
+        'rss_mb': round(rss, 1),
+        'peak_rss_mb': round(peak, 1),
+        'candle_cache_mb': round((cache.bytes + cache.pinned_bytes) / 2**20, 2),
+        'candle_cache_evictions': cache.evictions,
+    })
+    probes = sorted(probe_orders())
+    if probes:
+        result['order_p50_ms'] = round(probes[len(probes) // 2], 2)
+        result['order_max_ms'] = round(probes[-1], 2)
+    if submits:
+        result['bot_order_submit_p50_ms'] = round(max(submits), 2)
+    counters, _ = telemetry.metrics_snapshot()
+    result['api_requests'] = int(sum(v for (name, _), v in counters.items() if name == 'api_requests_total'))
+    result['api_429s'] = int(sum(v for (name, _), v in counters.items() if name == 'api_rate_limited_total'))
+    return result
+
+# --- DRIVER (parent) ---
+def run_all(sizes, cycles, live):
+    import mock_exchange
+    from http_replay import parse_rules
+
+    server = mock_exchange.start(tokens=max(sizes) + 1,
+                                 rules=parse_rules(arg_value('--quota')),
+                                 latency=float(arg_value('--latency', 0)),
+                                 order_latency=float(arg_value('--order-latency', 0)))
+    print(f"Mock exchange: {len(server.universe)} tokens ({len(server.universe.pairs)} USDC pairs) on {server.root}")
+    env = dict(os.environ, **mock_exchange.base_urls(server.root))
+    # Never reach the real account or Telegram from a load test (.env doesn't override these)
+    env.update(BINANCE_API_KEY='mock', BINANCE_SECRET='mock', TELEGRAM_TOKEN='', TELEGRAM_CHAT_ID='')
+    script = os.path.abspath(__file__)
+    passthrough = [a for a in ('--paced',) if a in sys.argv]
+
+    rows = []
+    for n in sizes:
+        print(f"\n--- {n} tokens ---")
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = subprocess.run([sys.executable, script, '--child', str(n), '--cycles', str(cycles)]
+                                  + (['--live'] if live else []) + passthrough,
+                                  cwd=tmp, env=env, capture_output=True, text=True, timeout=CHILD_TIMEOUT_S)
+        line = next((l for l in reversed(proc.stdout.splitlines()) if l.startswith('RESULT ')), None)
+        if proc.returncode != 0 or line is None:
+            print(f"  FAILED (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+            continue
+        row = json.loads(line[len('RESULT '):])
+        rows.append(row)
+        print("  " + " | ".join(f"{k} {v}" for k, v in row.items()))
+    server.shutdown()
+    print(f"\nMock calls: {server.calls} | 429s served: {server.throttled}")
+    return rows
+
+def save_csv(rows, path=RESULTS_FILE):
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results: {path}")
+
+def chart(rows, path=CHART_FILE):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed; skipping chart (see the CSV)")
+        return
+    tokens = [r['tokens'] for r in rows]
+    fig, axes = plt.subplots(1, 3, figsize=(16, 4.5))
+    for key in [k for k in rows[0] if k.endswith('_cycle_s')]:
+        axes[0].plot(tokens, [r.get(key) for r in rows], marker='o', label=key.replace('_cycle_s', ''))
+    axes[0].set_title('Fleet cycle time (s)')
+    axes[1].plot(tokens, [r['rss_mb'] for r in rows], marker='o', label='RSS')
+    axes[1].plot(tokens, [r['peak_rss_mb'] for r in rows], marker='o', label='peak RSS')
+    axes[1].plot(tokens, [r['candle_cache_mb'] for r in rows], marker='o', label='candle cache')
+    axes[1].set_title('Memory (MB)')
+    for key, label in [('order_p50_ms', 'round trip p50'), ('order_max_ms', 'round trip max'),
+                       ('bot_order_submit_p50_ms', 'bot order_submit p50')]:
+        if any(key in r for r in rows):
+            axes[2].plot(tokens, [r.get(key) for r in rows], marker='o', label=label)
+    axes[2].set_title('Order latency (ms)')
+    for ax in axes:
+        ax.set_xscale('log')
+        ax.set_xlabel('watchlist tokens')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=110)
+    print(f"Chart: {path}")
+
+def main():
+    cycles = int(arg_value('--cycles', CYCLES))
+    live = '--live' in sys.argv
+    if '--child' in sys.argv:
+        print("RESULT " + json.dumps(run_size(int(arg_value('--child')), cycles, live)))
+        return
+    if live and importlib.util.find_spec('binance') is None:
+        print("--live needs python-binance; running in paper mode (order latency from the probes only)")
+        live = False
+    sizes = [int(s) for s in arg_value('--sizes', ",".join(map(str, SIZES))).split(',')]
+    rows = run_all(sizes, cycles, live)
+    if rows:
+        save_csv(rows)
+        chart(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Chunked, concurrent CoinGecko /coins/markets fetch into a columnar snapshot.
+
+A single ids=... query stops working once the watchlist outgrows one page
+(results are capped at per_page and long URLs get rejected). fetch() splits
+the ids into CHUNK_SIZE batches, requests them concurrently (http_client's
+shared limiter still paces the actual calls) and merges every page into one
+MarketSnapshot: parallel price / ath / symbol columns plus an id -> row index.
+
+Failures are tracked per chunk: only chunks that errored or hit a 429 are
+retried, with a short capped backoff, and successful pages are never
+refetched. Ids CoinGecko simply doesn't return (delisted, typo) are not
+retried.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import http_client
+import telemetry
+from config import COINGECKO_API_URL
+
+MARKETS_URL = f"{COINGECKO_API_URL}/coins/markets"
+CHUNK_SIZE = 100         # ids per request (keeps the URL short; API caps per_page at 250)
+MAX_WORKERS = 4          # Concurrent pages; the coingecko limiter spaces the calls
+MAX_ROUNDS = 3           # Attempts per chunk
+MAX_BACKOFF = 30         # Seconds, cap for 429 Retry-After / exponential backoff
+
+class MarketSnapshot:
+    """Columnar /coins/markets result. snap[token_id] still yields a row dict."""
+    __slots__ = ('ids', 'price', 'ath', 'symbol', 'index')
+
+    def __init__(self, ids=(), price=(), ath=(), symbol=()):
+        self.ids = list(ids)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.ath = np.asarray(ath, dtype=np.float64)
+        self.symbol = list(symbol)
+        self.index = {tid: i for i, tid in enumerate(self.ids)}
+
+    @classmethod
+    def from_items(cls, items):
+        """Build from raw /coins/markets list items (missing numbers become NaN)."""
+        items = [it for it in items if it.get('id')]
+        return cls([it['id'] for it in items],
+                   [np.nan if it.get('current_price') is None else it['current_price'] for it in items],
+                   [np.nan if it.get('ath') is None else it['ath'] for it in items],
+                   [(it.get('symbol') or '').upper() for it in items])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from {token_id: {'price', 'ath', 'symbol'}}."""
+        ids = list(rows)
+        return cls(ids, [rows[t]['price'] for t in ids], [rows[t]['ath'] for t in ids],
+                   [rows[t]['symbol'] for t in ids])
+
+    @classmethod
+    def concat(cls, snapshots):
+        """Merge snapshots into one (first occurrence of an id wins)."""
+        ids, price, ath, symbol = [], [], [], []
+        seen = set()
+        for snap in snapshots:
+            for i, tid in enumerate(snap.ids):
+                if tid in seen:
+                    continue
+                seen.add(tid)
+                ids.append(tid)
+                price.append(snap.price[i])
+                ath.append(snap.ath[i])
+                symbol.append(snap.symbol[i])
+        return cls(ids, price, ath, symbol)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, token_id):
+        return token_id in self.index
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __getitem__(self, token_id):
+        i = self.index[token_id]
+        return {'price': float(self.price[i]), 'ath': float(self.ath[i]), 'symbol': self.symbol[i]}
+
+    def get(self, token_id, default=None):
+        return self[token_id] if token_id in self.index else default
+
+    def items(self):
+        for tid in self.ids:
+            yield tid, self[tid]
+
+    def prices(self):
+        """{token_id: price} for rows with a price (for price_snapshot.publish)."""
+        return {tid: float(p) for tid, p in zip(self.ids, self.price) if not np.isnan(p)}
+
+# --- FETCH ---
+def chunks(token_ids, size=CHUNK_SIZE):
+    token_ids = list(dict.fromkeys(token_ids))  # Dedup, keep order
+    return [token_ids[i:i + size] for i in range(0, len(token_ids), size)]
+
+def _backoff(response, attempt):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    try:
+        wait = float(retry_after)
+    except (TypeError, ValueError):
+        wait = 5 * 2 ** attempt
+    return min(wait, MAX_BACKOFF)
+
+def _fetch_chunk(ids, vs_currency):
+    """One page. Returns (MarketSnapshot, None) or (None, (error, response))."""
+    params = {'vs_currency': vs_currency, 'ids': ",".join(ids), 'per_page': len(ids), 'page': 1}
+    with telemetry.span("fetch_market_page", tokens=len(ids)) as sp:
+        try:
+            response = http_client.get(MARKETS_URL, params=params, timeout=15)
+        except Exception as e:
+            sp['status'] = 'error'
+            return None, (str(e), None)
+        sp['bytes'] = len(response.content)
+        sp['status'] = str(response.status_code)
+    if response.status_code != 200:
+        return None, (f"HTTP {response.status_code}", response)
+    try:
+        data = response.json()
+    except ValueError as e:
+        return None, (f"bad JSON: {e}", response)
+    if not isinstance(data, list):
+        return None, (f"API error: {data}", response)
+    return MarketSnapshot.from_items(data), None
+
+def fetch(token_ids, vs_currency='usd', chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS,
+          max_rounds=MAX_ROUNDS, log=print):
+    """
+    Fetch /coins/markets for any number of ids.
+    Returns: (MarketSnapshot, failed_ids) - failed_ids are ids whose chunk never succeeded.
+    """
+    pending = chunks(token_ids, chunk_size)
+    pages = []
+    for attempt in range(max_rounds):
+        if not pending:
+            break
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            results = list(pool.map(lambda ids: _fetch_chunk(ids, vs_currency), pending))
+        failed, wait = [], 0.0
+        for ids, (snap, err) in zip(pending, results):
+            if snap is not None:
+                pages.append(snap)
+                continue
+            failed.append(ids)
+            log(f"Market page ({len(ids)} ids) failed: {err[0]} (attempt {attempt + 1}/{max_rounds})")
+            wait = max(wait, _backoff(err[1], attempt))
+        pending = failed
+        if pending and attempt + 1 < max_rounds:
+            telemetry.sleep(wait)
+
+    failed_ids = [tid for ids in pending for tid in ids]
+    return MarketSnapshot.concat(pages), failed_ids
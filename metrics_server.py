@@ -0,0 +1,162 @@
+"""
+Local Prometheus-format metrics endpoint for the bot process.
+
+The bot calls start() once; a daemon thread then serves GET /metrics on
+127.0.0.1:METRICS_PORT from the counters and gauges in telemetry.
+check_status.py and the dashboard use fetch_metrics() to read it back, so
+liveness comes from the process itself instead of pgrep / log mtimes.
+
+The bot.py sniper serves its own counters (safety / price caches, on-chain
+prices, seen-pair index) the same way on SNIPER_METRICS_PORT, so both bots
+can run side by side.
+"""
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import telemetry
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("PIGEON_METRICS_PORT", "9108"))
+SNIPER_METRICS_PORT = int(os.getenv("PIGEON_SNIPER_METRICS_PORT", "9109"))  # bot.py
+PREFIX = "pigeon_"
+
+HELP = {
+    'up': ('gauge', "1 while the bot process is serving metrics"),
+    'start_time_seconds': ('gauge', "Unix time the bot process started"),
+    'cycles_total': ('counter', "Completed trading cycles"),
+    'last_cycle_timestamp_seconds': ('gauge', "Unix time the last cycle finished"),
+    'cycle_duration_seconds': ('gauge', "Wall-clock duration of the last cycle"),
+    'cycle_work_seconds': ('gauge', "Non-sleep time spent in the last cycle"),
+    'cycle_sleep_seconds': ('gauge', "Time spent sleeping (rate-limit buffers) in the last cycle"),
+    'cycle_tokens_evaluated': ('gauge', "Tokens run through get_signal in the last cycle"),
+    'tokens_evaluated_total': ('counter', "Tokens run through get_signal since start"),
+    'api_requests_total': ('counter', "Outbound API requests by upstream"),
+    'api_rate_limited_total': ('counter', "HTTP 429 responses by upstream"),
+    'api_cache_hits_total': ('counter', "GETs served from http_client's TTL cache by upstream"),
+    'account_snapshots_total': ('counter', "get_account calls (one per cycle expected)"),
+    'position_drift_assets': ('gauge', "Assets whose exchange balance disagrees with state positions"),
+    'replay_misses_total': ('counter', "Replayed requests with no recorded response (PIGEON_HTTP_MODE=replay)"),
+    'api_errors_total': ('counter', "Outbound requests that raised (timeouts, DNS...) by upstream"),
+    'candle_cache_hits_total': ('counter', "Candle history served from the in-process cache"),
+    'candle_cache_misses_total': ('counter', "Candle history fetched from the API"),
+    'candle_cache_hit_ratio': ('gauge', "hits / (hits + misses) since start"),
+    'candle_cache_evictions_total': ('counter', "Candle series evicted to stay under CANDLE_CACHE_MB"),
+    'candle_cache_bytes': ('gauge', "Bytes held by the candle series cache (incl. pinned)"),
+    'candle_cache_entries': ('gauge', "Entries in the candle series cache"),
+    'candle_store_hits_total': ('counter', "Hourly bars served from memory"),
+    'candle_store_misses_total': ('counter', "Hourly bars loaded from candles/*.npz"),
+    'candle_store_evictions_total': ('counter', "Hourly bar sets evicted to stay under CANDLE_STORE_MB"),
+    'candle_store_bytes': ('gauge', "Bytes held by in-memory hourly bars (incl. pinned)"),
+    'candle_store_entries': ('gauge', "Tokens with hourly bars in memory"),
+    'safety_cache_hits_total': ('counter', "bot.py safety verdicts served from the cache / negative set"),
+    'safety_checks_total': ('counter', "Honeypot.is lookups by verdict (safe / honeypot / error)"),
+    'dex_price_cache_hits_total': ('counter', "bot.py token prices served from the DexScreener price cache"),
+    'onchain_prices_total': ('counter', "bot.py on-chain price lookups by result (ok / missing / error)"),
+    'pair_index_hits_total': ('counter', "bot.py scan pairs that reused a seen-pair verdict, by verdict"),
+    'pair_index_misses_total': ('counter', "bot.py scan pairs not in the seen-pair index (analysed)"),
+    'pair_index_rechecks_total': ('counter', "bot.py seen pairs re-analysed because liquidity / volume moved"),
+    'state_write_latency_seconds': ('gauge', "save_state() latency over the last cycle"),
+    'open_positions': ('gauge', "Open positions by pool"),
+    'pool_cash_usd': ('gauge', "Free cash by pool"),
+}
+
+_STARTED = time.time()
+_server = None
+
+# --- RENDERING ---
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+def render():
+    """Prometheus text exposition of everything in telemetry."""
+    counters, gauges = telemetry.metrics_snapshot()
+
+    hits = sum(v for (n, _), v in counters.items() if n == 'candle_cache_hits_total')
+    misses = sum(v for (n, _), v in counters.items() if n == 'candle_cache_misses_total')
+    gauges[('up', ())] = 1
+    gauges[('start_time_seconds', ())] = _STARTED
+    if hits + misses:
+        gauges[('candle_cache_hit_ratio', ())] = hits / (hits + misses)
+
+    series = {}
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        series.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(series):
+        kind, text = HELP.get(name, ('counter' if any(k[0] == name for k in counters) else 'gauge', name))
+        lines.append(f"# HELP {PREFIX}{name} {text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in sorted(series[name]):
+            lines.append(f"{PREFIX}{name}{_fmt_labels(labels)} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of bot.log
+
+def start(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics in a daemon thread. Returns the server, or None if the port is taken."""
+    global _server
+    if _server:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        print(f"Metrics endpoint disabled ({host}:{port}): {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
+
+# --- CLIENT ---
+def fetch_metrics(host=METRICS_HOST, port=METRICS_PORT, timeout=1.0):
+    """Scrape the endpoint. Returns {name: [(labels_dict, value), ...]} or None if unreachable."""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=timeout) as r:
+            return parse(r.read().decode())
+    except Exception:
+        return None
+
+def parse(text):
+    """Minimal Prometheus text parser (enough for what render() emits). Strips PREFIX."""
+    metrics = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        name_part, value = line.rsplit(' ', 1)
+        labels = {}
+        if '{' in name_part:
+            name_part, raw = name_part[:-1].split('{', 1)
+            for pair in raw.split(','):
+                k, v = pair.split('=', 1)
+                labels[k] = v.strip('"')
+        if name_part.startswith(PREFIX):
+            name_part = name_part[len(PREFIX):]
+        metrics.setdefault(name_part, []).append((labels, float(value)))
+    return metrics
+
+def value(metrics, name, default=0.0, **labels):
+    """Single value (or sum over matching series) from a parsed scrape."""
+    matches = [v for lbl, v in metrics.get(name, []) if all(lbl.get(k) == str(val) for k, val in labels.items())]
+    return sum(matches) if matches else default
+
+def by_label(metrics, name, label):
+    """{label_value: value} for one metric, e.g. by_label(m, 'pool_cash_usd', 'pool')."""
+    return {lbl.get(label): v for lbl, v in metrics.get(name, [])}
@@ -0,0 +1,475 @@
+"""
+Local stand-in for the CoinGecko / Binance endpoints the bot uses, for load
+tests at watchlist sizes the free APIs would never allow.
+
+One threaded HTTP server, one path prefix per upstream:
+    /coingecko/api/v3/coins/markets, /coins/{id}, /coins/{id}/market_chart, /simple/price
+    /binance/api/v3/exchangeInfo, /klines, /ping, /time, /account, /order (POST + GET)
+    /futures/fapi/v1/premiumIndex
+    /bsc  (JSON-RPC eth_call: PancakeSwap factory getPair, pair getReserves, decimals)
+
+Data is synthetic but shaped like the real thing: every token gets a seeded
+hourly random walk (its own drift and volatility) ending at the current
+hour, so klines, daily market_chart points, /coins/markets prices and order
+fills all agree with each other and are identical from run to run. Token 0 is
+'bitcoin'; the rest are mock-00001... A `listed` share of them have a
+{SYMBOL}USDC pair in exchangeInfo (the rest exercise the CoinGecko fallback).
+
+Orders fill immediately at the current bar's close against an in-memory
+account (USDC / BNB to start), so account snapshots, get_order checks and
+balance reconciliation all work against it.
+
+The /bsc node gives every token (bitcoin aside) a TOKEN/WBNB pair at
+token_address(i) holding POOL_BNB of WBNB, with reserves priced off the same
+path, plus a USDT/WBNB pair at BNB_USD - enough for onchain_prices.py.
+
+    python mock_exchange.py --tokens 2000 --port 8765 --quota coingecko=30/60 --latency 0.05
+
+prints the PIGEON_*_URL variables that point config.py at it. Quotas use the
+http_replay.py rule syntax per upstream ('coingecko', 'binance',
+'binance_futures', 'bsc_rpc'); latency is added to every response, order_latency to
+order placement only.
+"""
+import json
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+import config
+import onchain_prices
+from http_replay import Quota, RETRY_AFTER, parse_rules
+
+DEFAULT_PORT = 8765
+DEFAULT_TOKENS = 2000
+SEED = 7
+HISTORY_HOURS = 400 * 24      # Covers candles.HISTORY_DAYS backfill + 365d highs
+FUTURE_HOURS = 30 * 24        # Bars keep coming for a month of server uptime
+LISTED_SHARE = 0.9            # Share of tokens with a USDC pair on the mock Binance
+KLINES_MAX = 1000
+START_BALANCES = {'USDC': 100_000.0, 'BNB': 10.0}
+BNB_USD = 600.0
+POOL_BNB = 250.0              # WBNB side of every mock PancakeSwap pair
+CHAIN_ID = 56
+
+PREFIXES = {'/coingecko/api/v3': 'coingecko', '/binance': 'binance', '/futures': 'binance_futures',
+            '/bsc': 'bsc_rpc'}
+
+def base_urls(root):
+    """Env vars pointing config.py at a server rooted at root (e.g. http://127.0.0.1:8765)."""
+    return {
+        'PIGEON_COINGECKO_URL': f"{root}/coingecko/api/v3",
+        'PIGEON_BINANCE_URL': f"{root}/binance",
+        'PIGEON_BINANCE_FUTURES_URL': f"{root}/futures",
+        'PIGEON_BSC_RPC_URL': f"{root}/bsc",
+    }
+
+# --- SYNTHETIC MARKET ---
+class Universe:
+    """n tokens with deterministic hourly paths anchored at `anchor` (an hour boundary)."""
+
+    def __init__(self, n_tokens=DEFAULT_TOKENS, seed=SEED, listed=LISTED_SHARE, anchor=None):
+        self.seed = seed
+        self.anchor = int((anchor or time.time()) // 3600 * 3600)
+        self.t0 = self.anchor - HISTORY_HOURS * 3600
+        rng = np.random.default_rng(seed)
+        self.ids = ['bitcoin'] + [f"mock-{i:05d}" for i in range(1, n_tokens)]
+        self.symbols = ['btc'] + [f"m{i:05d}" for i in range(1, n_tokens)]
+        self.index = {tid: i for i, tid in enumerate(self.ids)}
+        self.by_symbol = {s.upper(): i for i, s in enumerate(self.symbols)}
+        self.base_price = np.exp(rng.uniform(np.log(0.05), np.log(500), n_tokens))
+        self.base_price[0] = 60_000.0
+        self.vol = rng.uniform(0.004, 0.02, n_tokens)          # Hourly sigma
+        self.vol[0] = 0.005
+        self.drift = rng.normal(0, 0.00005, n_tokens)
+        self.mcap = np.exp(rng.uniform(np.log(3e8), np.log(6e10), n_tokens))
+        self.mcap[0] = 1.2e12
+        self.ath_mult = rng.uniform(1.0, 3.0, n_tokens)       # ATH set before the window
+        self.genesis_year = rng.integers(2015, 2024, n_tokens)
+        self.scores = rng.uniform(0, 100, (n_tokens, 3))      # dev / community / liquidity
+        self.listed = rng.random(n_tokens) < listed
+        self.listed[0] = True
+        self.pairs = {f"{s.upper()}USDC": i for i, s in enumerate(self.symbols) if self.listed[i]}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @lru_cache(maxsize=64)   # ~400KB per token; regenerating one costs about a millisecond
+    def path(self, i):
+        """(open, high, low, close, quote_volume) hourly arrays for token i, from t0."""
+        rng = np.random.default_rng((self.seed, i))
+        n = HISTORY_HOURS + FUTURE_HOURS
+        close = self.base_price[i] * np.exp(np.cumsum(rng.normal(self.drift[i], self.vol[i], n)))
+        open_ = np.concatenate(([close[0]], close[:-1]))
+        wick = np.abs(rng.normal(0, self.vol[i], (2, n)))
+        high = np.maximum(open_, close) * (1 + wick[0])
+        low = np.minimum(open_, close) * (1 - wick[1])
+        volume = self.mcap[i] * 0.03 / 24 * rng.lognormal(0, 0.5, n)
+        return open_, high, low, close, volume
+
+    def now_bar(self):
+        """Index of the current (still open) hourly bar."""
+        return min(int((time.time() - self.t0) // 3600), HISTORY_HOURS + FUTURE_HOURS - 1)
+
+    def price(self, i):
+        return float(self.path(i)[3][self.now_bar()])
+
+    def market_row(self, i):
+        _, high, _, close, volume = self.path(i)
+        k = self.now_bar()
+        price = float(close[k])
+        supply = self.mcap[i] / self.base_price[i]
+        change = lambda hours: float((price / close[max(k - hours, 0)] - 1) * 100)
+        return {
+            'id': self.ids[i],
+            'symbol': self.symbols[i],
+            'name': self.symbols[i].upper(),
+            'current_price': price,
+            'market_cap': float(price * supply),
+            'total_volume': float(volume[max(k - 23, 0):k + 1].sum()),
+            'ath': float(high[:k + 1].max() * self.ath_mult[i]),
+            'price_change_percentage_24h': change(24),
+            'price_change_percentage_14d_in_currency': change(14 * 24),
+            'price_change_percentage_30d_in_currency': change(30 * 24),
+            'price_change_percentage_200d_in_currency': change(200 * 24),
+        }
+
+    def daily_chart(self, i, days):
+        """CoinGecko market_chart: one point per day at 00:00 UTC plus the latest price."""
+        _, _, _, close, volume = self.path(i)
+        k = self.now_bar()
+        ts = self.t0 + np.arange(k + 1) * 3600
+        midnights = np.flatnonzero(ts % 86400 == 0)[-int(days):]
+        points = [(int(ts[j]) * 1000, float(close[j]), float(volume[max(j - 23, 0):j + 1].sum())) for j in midnights]
+        points.append((int(time.time() * 1000), float(close[k]), float(volume[max(k - 23, 0):k + 1].sum())))
+        return {
+            'prices': [[t, p] for t, p, _ in points],
+            'market_caps': [[t, p * self.mcap[i] / self.base_price[i]] for t, p, _ in points],
+            'total_volumes': [[t, v] for t, _, v in points],
+        }
+
+    def klines(self, i, start_ms=None, end_ms=None, limit=500):
+        """Binance 1h klines rows (closed bars plus the open one)."""
+        open_, high, low, close, volume = self.path(i)
+        k = self.now_bar()
+        first = 0 if start_ms is None else max(int(np.ceil((int(start_ms) / 1000 - self.t0) / 3600)), 0)
+        last = k if end_ms is None else min(int((int(end_ms) / 1000 - self.t0) // 3600), k)
+        rows = []
+        for j in range(first, min(last + 1, first + min(int(limit), KLINES_MAX))):
+            t = (self.t0 + j * 3600) * 1000
+            qv = float(volume[j])
+            rows.append([t, f"{open_[j]:.8f}", f"{high[j]:.8f}", f"{low[j]:.8f}", f"{close[j]:.8f}",
+                         f"{qv / close[j]:.4f}", t + 3600 * 1000 - 1, f"{qv:.4f}", 100, "0", "0", "0"])
+        return rows
+
+    def funding_rate(self, i):
+        return float(np.random.default_rng((self.seed, i, 1)).normal(0.0001, 0.0002))
+
+# --- ACCOUNT ---
+class Account:
+    """In-memory spot account: market orders fill in full at the current price."""
+
+    def __init__(self, universe, balances=None):
+        self.universe = universe
+        self.balances = dict(balances or START_BALANCES)
+        self.orders = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def snapshot(self):
+        with self._lock:
+            return {'balances': [{'asset': a, 'free': f"{v:.8f}", 'locked': "0.00000000"}
+                                 for a, v in self.balances.items()]}
+
+    def place(self, params):
+        """MARKET order -> (status, body) in Binance's FULL response shape."""
+        pair = params.get('symbol', '')
+        side = params.get('side', '').upper()
+        if pair not in self.universe.pairs:
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        if params.get('type', 'MARKET').upper() != 'MARKET':
+            return 400, {'code': -1013, 'msg': 'Only MARKET orders are mocked.'}
+        base = pair[:-len('USDC')]
+        price = self.universe.price(self.universe.pairs[pair])
+        with self._lock:
+            if 'quoteOrderQty' in params:
+                qty = float(params['quoteOrderQty']) / price
+            else:
+                qty = float(params.get('quantity', 0))
+            quote = qty * price
+            have = self.balances.get('USDC' if side == 'BUY' else base, 0.0)
+            if qty <= 0 or have < (quote if side == 'BUY' else qty) * 0.999999:
+                return 400, {'code': -2010, 'msg': 'Account has insufficient balance for requested action.'}
+            sign = 1 if side == 'BUY' else -1
+            self.balances['USDC'] = self.balances.get('USDC', 0.0) - sign * quote
+            self.balances[base] = max(self.balances.get(base, 0.0) + sign * qty, 0.0)
+            order = {
+                'symbol': pair, 'orderId': self._next_id, 'clientOrderId': f"mock{self._next_id}",
+                'transactTime': int(time.time() * 1000), 'price': "0.00000000",
+                'origQty': f"{qty:.8f}", 'executedQty': f"{qty:.8f}",
+                'cummulativeQuoteQty': f"{quote:.8f}", 'status': 'FILLED', 'timeInForce': 'GTC',
+                'type': 'MARKET', 'side': side,
+                'fills': [{'price': f"{price:.8f}", 'qty': f"{qty:.8f}",
+                           'commission': f"{quote * 0.00075 / self.universe.price(0):.8f}",
+                           'commissionAsset': 'BNB'}],
+            }
+            self.orders[self._next_id] = order
+            self._next_id += 1
+        return 200, order
+
+    def get(self, params):
+        order = self.orders.get(int(params.get('orderId', 0) or 0))
+        if order is None or order['symbol'] != params.get('symbol'):
+            return 400, {'code': -2013, 'msg': 'Order does not exist.'}
+        return 200, order
+
+# --- BSC NODE ---
+def token_address(i):
+    """Mock BEP-20 address of token i; odd / even sort below / above WBNB (both token0 layouts)."""
+    return f"0x{'a0' if i % 2 else 'c0'}{i:038x}"
+
+def pair_address(i):
+    return f"0xd0{i:038x}"
+
+class Chain:
+    """eth_call for the PancakeSwap V2 contracts onchain_prices.py reads. All tokens use 18 decimals."""
+
+    def __init__(self, universe):
+        self.universe = universe
+        self.wbnb = config.WBNB_ADDRESS.lower()
+        self.usdt = config.USDT_ADDRESS.lower()
+        self.tokens = {token_address(i): i for i in range(1, len(universe))}
+        self.tokens[self.usdt] = 0                # Pair 0 is USDT/WBNB
+        self.pairs = {pair_address(i): (addr, i) for addr, i in self.tokens.items()}
+
+    def reserves(self, token, i):
+        """(reserve0, reserve1) in wei, token0 = the lower address."""
+        price = 1.0 if token == self.usdt else self.universe.price(i)
+        wbnb_reserve = int(POOL_BNB * 10 ** 18)
+        token_reserve = int(POOL_BNB * BNB_USD / price * 10 ** 18)
+        return (token_reserve, wbnb_reserve) if int(token, 16) < int(self.wbnb, 16) else (wbnb_reserve, token_reserve)
+
+    def call(self, to, data):
+        """Hex return data, or None if the call reverts."""
+        to, selector = to.lower(), data[:10]
+        if to == config.PANCAKE_FACTORY_ADDRESS.lower() and selector == onchain_prices.GET_PAIR:
+            a, b = (onchain_prices.decode_address(w) for w in onchain_prices.words("0x" + data[10:])[:2])
+            token = b if a == self.wbnb else a if b == self.wbnb else None
+            pair = pair_address(self.tokens[token]) if token in self.tokens else onchain_prices.ZERO_ADDRESS
+            return "0x" + onchain_prices.encode_address(pair)
+        if selector == onchain_prices.DECIMALS and (to in self.tokens or to == self.wbnb):
+            return f"0x{18:064x}"
+        if selector == onchain_prices.GET_RESERVES and to in self.pairs:
+            reserve0, reserve1 = self.reserves(*self.pairs[to])
+            return f"0x{reserve0:064x}{reserve1:064x}{int(time.time()) % 2**32:064x}"
+        return None
+
+    def rpc(self, request):
+        """One JSON-RPC request or a batch of them -> reply / list of replies."""
+        if isinstance(request, list):
+            return [self.rpc(r) for r in request]
+        reply = {'jsonrpc': '2.0', 'id': request.get('id')}
+        method, params = request.get('method'), request.get('params') or []
+        if method == 'eth_chainId':
+            reply['result'] = hex(CHAIN_ID)
+        elif method == 'eth_blockNumber':
+            reply['result'] = hex(int(time.time()) // 3)
+        elif method == 'eth_call' and params:
+            result = self.call(params[0].get('to', ''), params[0].get('data', ''))
+            if result is None:
+                reply['error'] = {'code': -32000, 'message': 'execution reverted'}
+            else:
+                reply['result'] = result
+        else:
+            reply['error'] = {'code': -32601, 'message': f'method not mocked: {method}'}
+        return reply
+
+# --- ROUTES ---
+def _exchange_info(universe):
+    symbols = [{
+        'symbol': pair, 'status': 'TRADING', 'baseAsset': pair[:-len('USDC')], 'quoteAsset': 'USDC',
+        'filters': [{'filterType': 'LOT_SIZE', 'minQty': "0.00001000", 'maxQty': "9000000.00000000",
+                     'stepSize': "0.00001000"},
+                    {'filterType': 'NOTIONAL', 'minNotional': "5.00000000"}],
+    } for pair in universe.pairs]
+    return {'timezone': 'UTC', 'serverTime': int(time.time() * 1000), 'symbols': symbols}
+
+def _markets(universe, q):
+    if 'ids' in q:
+        rows = [universe.index[t] for t in q['ids'].split(',') if t in universe.index]
+    else:
+        rows = sorted(range(len(universe)), key=lambda i: -universe.mcap[i])  # market_cap_desc
+    per_page = min(int(q.get('per_page', 100)), 250)
+    page = max(int(q.get('page', 1)), 1)
+    return [universe.market_row(i) for i in rows[(page - 1) * per_page:page * per_page]]
+
+def _coin(universe, i):
+    row = universe.market_row(i)
+    dev, comm, liq = (float(s) for s in universe.scores[i])
+    return {
+        'id': row['id'], 'symbol': row['symbol'], 'name': row['name'],
+        'genesis_date': f"{universe.genesis_year[i]}-06-01",
+        'developer_score': dev, 'community_score': comm, 'liquidity_score': liq,
+        'categories': ['BNB Chain Ecosystem'],
+        'market_data': {'current_price': {'usd': row['current_price']},
+                        'market_cap': {'usd': row['market_cap']}, 'ath': {'usd': row['ath']}},
+    }
+
+def route(server, method, path, q, data=b""):
+    """(status, body) for one request; body is JSON-serialisable."""
+    u = server.universe
+    if path == '/bsc' and method == 'POST':
+        return 200, server.chain.rpc(json.loads(data))
+    if path.startswith('/coingecko/api/v3'):
+        path = path[len('/coingecko/api/v3'):]
+        if path == '/coins/markets':
+            return 200, _markets(u, q)
+        if path == '/simple/price':
+            out = {}
+            for tid in q.get('ids', '').split(','):
+                if tid in u.index:
+                    row = u.market_row(u.index[tid])
+                    out[tid] = {'usd': row['current_price'], 'usd_24h_change': row['price_change_percentage_24h']}
+            return 200, out
+        if path == '/ping':
+            return 200, {'gecko_says': '(V3) To the Moon!'}
+        parts = path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] == 'coins':
+            if parts[1] not in u.index:
+                return 404, {'error': 'coin not found'}
+            i = u.index[parts[1]]
+            if len(parts) == 2:
+                return 200, _coin(u, i)
+            if parts[2] == 'market_chart':
+                return 200, u.daily_chart(i, float(q.get('days', 30)))
+    elif path.startswith('/binance/api/v3'):
+        path = path[len('/binance/api/v3'):]
+        if path == '/ping':
+            return 200, {}
+        if path == '/time':
+            return 200, {'serverTime': int(time.time() * 1000)}
+        if path == '/exchangeInfo':
+            return 200, server.exchange_info
+        if path == '/klines':
+            i = u.pairs.get(q.get('symbol', ''))
+            if i is None:
+                return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+            return 200, u.klines(i, q.get('startTime'), q.get('endTime'), q.get('limit', 500))
+        if path == '/ticker/price':
+            i = u.pairs.get(q.get('symbol', ''))
+            if i is None:
+                return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+            return 200, {'symbol': q['symbol'], 'price': f"{u.price(i):.8f}"}
+        if path == '/account':
+            return 200, server.account.snapshot()
+        if path == '/order':
+            if server.order_latency:
+                time.sleep(server.order_latency)
+            return server.account.place(q) if method == 'POST' else server.account.get(q)
+    elif path == '/futures/fapi/v1/premiumIndex':
+        symbol = q.get('symbol', '')
+        i = u.by_symbol.get(symbol[:-len('USDT')]) if symbol.endswith('USDT') else None
+        if i is None:
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        return 200, {'symbol': symbol, 'markPrice': f"{u.price(i):.8f}",
+                     'lastFundingRate': f"{u.funding_rate(i):.8f}", 'time': int(time.time() * 1000)}
+    return 404, {'error': f'not mocked: {method} {path}'}
+
+# --- SERVER ---
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, like the real APIs behind http_client's Session
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def _serve(self, method):
+        parts = urlsplit(self.path)
+        q = dict(parse_qsl(parts.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length) if length else b""
+        if data and not parts.path.startswith('/bsc'):
+            q.update(parse_qsl(data.decode()))  # Signed POSTs send a form body
+        upstream = next((name for prefix, name in PREFIXES.items() if parts.path.startswith(prefix)), 'unknown')
+        server = self.server
+        with server.lock:
+            server.calls[upstream] = server.calls.get(upstream, 0) + 1
+            throttled = server.quota.throttled(upstream)
+        if server.latency:
+            time.sleep(server.latency)
+        if throttled:
+            with server.lock:
+                server.throttled[upstream] = server.throttled.get(upstream, 0) + 1
+            status, body = 429, {'status': {'error_code': 429, 'error_message': 'mock quota exceeded'}}
+        else:
+            try:
+                status, body = route(server, method, parts.path, q, data)
+            except (ValueError, KeyError) as e:
+                status, body = 400, {'code': -1100, 'msg': f'Illegal parameter: {e}'}
+        payload = json.dumps(body, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 429:
+            self.send_header('Retry-After', str(RETRY_AFTER))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._serve('GET')
+
+    def do_POST(self):
+        self._serve('POST')
+
+    def do_DELETE(self):
+        self._serve('DELETE')
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the load-test output
+
+def make_server(port=DEFAULT_PORT, tokens=DEFAULT_TOKENS, rules=None, latency=0.0, order_latency=0.0,
+                listed=LISTED_SHARE, host='127.0.0.1'):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.universe = Universe(tokens, listed=listed)
+    server.exchange_info = _exchange_info(server.universe)
+    server.account = Account(server.universe)
+    server.chain = Chain(server.universe)
+    server.quota = Quota(rules)
+    server.latency = latency
+    server.order_latency = order_latency
+    server.lock = threading.Lock()
+    server.calls = {}
+    server.throttled = {}
+    server.root = f"http://{host}:{server.server_address[1]}"
+    return server
+
+def start(**kwargs):
+    """make_server() running on a daemon thread (port=0 picks a free port). Returns the server."""
+    kwargs.setdefault('port', 0)
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-exchange", daemon=True).start()
+    return server
+
+def arg_value(flag, default=None):
+    if flag in sys.argv:
+        idx = sys.argv.index(flag)
+        if idx + 1 < len(sys.argv):
+            return sys.argv[idx + 1]
+    return default
+
+if __name__ == "__main__":
+    server = make_server(port=int(arg_value('--port', DEFAULT_PORT)),
+                         tokens=int(arg_value('--tokens', DEFAULT_TOKENS)),
+                         rules=parse_rules(arg_value('--quota')),
+                         latency=float(arg_value('--latency', 0)),
+                         order_latency=float(arg_value('--order-latency', 0)),
+                         listed=float(arg_value('--listed', LISTED_SHARE)))
+    print(f"Mock exchange: {len(server.universe)} tokens ({len(server.universe.pairs)} USDC pairs) on {server.root}")
+    for name, value in base_urls(server.root).items():
+        print(f"export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,224 @@
+"""
+Vectorized Monte Carlo engine for the backtest.py scenario simulation.
+
+Same scenario mix and per-step dynamics as backtest.generate_price_curve(),
+but every path of a chunk is generated in one (paths x steps) matrix from a
+seeded numpy Generator, and TP/SL/time exits are resolved with first-crossing
+index searches instead of a Python loop per price.
+
+Usage:
+    python monte_carlo.py               # 100k paths, strategy table + TP/SL sweep
+    python monte_carlo.py 1000000       # 1M paths (fixed memory via chunking)
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest import STEPS, PRICE_INTERVAL_HOURS, CAPITAL_PER_TOKEN
+
+# --- CONFIG ---
+SCENARIOS = ['rug', 'dump', 'pump_dump', 'moon', 'volatile']
+WEIGHTS = [30, 30, 20, 10, 10]
+CHUNK_SIZE = 2_000       # Paths per chunk (~26MB of float64 at 1620 steps)
+PRICE_FLOOR = 0.000001   # Same floor as generate_price_curve()
+
+RUG_PROB = 0.02          # Per-step chance of a -99% candle
+PUMP_PHASE = 0.1         # pump_dump pumps for the first 10% of steps
+
+# Exit reason codes (index into EXIT_REASONS)
+EXIT_REASONS = ['TIME', 'TP', 'SL', 'HODL']
+TIME, TP, SL, HODL = range(4)
+
+# Per-step (mu, sigma) of each scenario, in SCENARIOS order.
+# pump_dump uses PUMP_MU/PUMP_SIGMA during its pump phase, then these.
+SCENARIO_MU = np.array([0.0, -0.01, -0.05, 0.01, 0.0])
+SCENARIO_SIGMA = np.array([0.05, 0.05, 0.1, 0.05, 0.15])
+PUMP_MU, PUMP_SIGMA = 0.1, 0.1
+
+def generate_paths(n_paths, rng, steps=STEPS, weights=WEIGHTS):
+    """
+    Generate n_paths price curves starting at 1.0.
+    Returns: (prices[n_paths, steps + 1], scenario_idx[n_paths])
+    """
+    p = np.asarray(weights, dtype=float)
+    scenario = rng.choice(len(SCENARIOS), size=n_paths, p=p / p.sum())
+
+    change = rng.standard_normal((n_paths, steps))
+    change *= SCENARIO_SIGMA[scenario][:, None]
+    change += SCENARIO_MU[scenario][:, None]
+
+    pump_rows = np.flatnonzero(scenario == SCENARIOS.index('pump_dump'))
+    pump_steps = int(np.count_nonzero((np.arange(steps) + 1) < steps * PUMP_PHASE))
+    if len(pump_rows) and pump_steps:
+        z = rng.standard_normal((len(pump_rows), pump_steps))
+        change[pump_rows, :pump_steps] = PUMP_MU + PUMP_SIGMA * z
+
+    rug_rows = np.flatnonzero(scenario == SCENARIOS.index('rug'))
+    if len(rug_rows):
+        crash = rng.random((len(rug_rows), steps)) < RUG_PROB
+        change[rug_rows] = np.where(crash, -0.99, change[rug_rows])
+
+    # Multiplicative walk with a floor: l_t = max(l_{t-1} + g_t, log(floor)).
+    # In log space that's a reflected walk, so it has a closed form:
+    # l_t = S_t + max(0, max_{s<=t}(log(floor) - S_s)) with S the plain cumsum.
+    np.clip(change, -1.0 + 1e-15, None, out=change)
+    log_s = np.log1p(change, out=change)
+    np.cumsum(log_s, axis=1, out=log_s)
+    reflect = np.subtract(np.log(PRICE_FLOOR), log_s)
+    np.maximum.accumulate(reflect, axis=1, out=reflect)
+    np.maximum(reflect, 0.0, out=reflect)
+    log_s += reflect
+    del reflect
+
+    prices = np.empty((n_paths, steps + 1))
+    prices[:, 0] = 1.0
+    np.exp(log_s, out=prices[:, 1:])
+    return prices, scenario
+
+def hold_steps_for(hold_days, steps=STEPS):
+    return (hold_days * 24) // PRICE_INTERVAL_HOURS if hold_days else steps
+
+def first_crossings(mult, levels, above=True):
+    """
+    First step index (>= 1) where mult crosses each level.
+    Running max/min makes every row monotone, so the first crossing is just the
+    count of steps still on the wrong side. Returns int array [len(levels), n_paths];
+    a value of mult.shape[1] means 'never crossed'.
+    """
+    body = mult[:, 1:]
+    if above:
+        running = np.maximum.accumulate(body, axis=1)
+        return np.stack([np.count_nonzero(running < lvl, axis=1) + 1 for lvl in levels])
+    running = np.minimum.accumulate(body, axis=1)
+    return np.stack([np.count_nonzero(running > lvl, axis=1) + 1 for lvl in levels])
+
+def resolve_exits(mult, tp_idx, sl_idx, hold_steps):
+    """
+    Combine first-crossing indices into (exit_step, reason) with run_strategy()'s
+    priority: TIME is checked before TP, TP before SL.
+    tp_idx / sl_idx may be None (no TP / SL).
+    """
+    n_paths, length = mult.shape
+    never = length
+    t_idx = max(hold_steps, 1)
+    if t_idx >= length:
+        t_idx = never
+
+    tp = tp_idx if tp_idx is not None else np.full(n_paths, never)
+    sl = sl_idx if sl_idx is not None else np.full(n_paths, never)
+
+    exit_step = np.minimum(np.minimum(tp, sl), t_idx)
+    reason = np.where(exit_step == t_idx, TIME, np.where(exit_step == tp, TP, SL))
+    reason = np.where(exit_step == never, HODL, reason)
+
+    final_idx = np.minimum(exit_step, length - 1)
+    exit_mult = mult[np.arange(n_paths), final_idx]
+    pnl = (exit_mult * CAPITAL_PER_TOKEN) - CAPITAL_PER_TOKEN
+    return pnl, exit_step, reason
+
+def run_strategy_vec(prices, tp_mult, sl_mult, hold_days=None):
+    """Vectorized run_strategy() over every row of prices. Returns (pnl, exit_step, reason)."""
+    mult = prices / prices[:, :1]
+    tp_idx = first_crossings(mult, [tp_mult])[0] if tp_mult else None
+    sl_idx = first_crossings(mult, [sl_mult], above=False)[0] if sl_mult else None
+    return resolve_exits(mult, tp_idx, sl_idx, hold_steps_for(hold_days, mult.shape[1] - 1))
+
+def _chunks(n_paths, chunk_size):
+    while n_paths > 0:
+        size = min(chunk_size, n_paths)
+        yield size
+        n_paths -= size
+
+def _new_stats():
+    return {'paths': 0, 'pnl_sum': 0.0, 'pnl_sq': 0.0, 'wins': 0, 'reasons': np.zeros(len(EXIT_REASONS), dtype=np.int64)}
+
+def _accumulate(stats, pnl, reason):
+    stats['paths'] += len(pnl)
+    stats['pnl_sum'] += float(pnl.sum())
+    stats['pnl_sq'] += float(np.square(pnl).sum())
+    stats['wins'] += int((pnl > 0).sum())
+    stats['reasons'] += np.bincount(reason, minlength=len(EXIT_REASONS))
+
+def _summarize(stats):
+    n = max(stats['paths'], 1)
+    mean = stats['pnl_sum'] / n
+    var = max(stats['pnl_sq'] / n - mean ** 2, 0.0)
+    row = {
+        'Paths': stats['paths'],
+        'Mean PnL': mean,
+        'PnL Std': var ** 0.5,
+        'ROI %': (mean / CAPITAL_PER_TOKEN) * 100,
+        'Win Rate %': (stats['wins'] / n) * 100,
+    }
+    for code, name in enumerate(EXIT_REASONS):
+        row[f"{name} %"] = (stats['reasons'][code] / n) * 100
+    return row
+
+def simulate(strategies, n_paths, seed=42, chunk_size=CHUNK_SIZE, weights=WEIGHTS):
+    """
+    Evaluate each strategy ({'name', 'tp', 'sl', 'hold'} like backtest.main) on the
+    same n_paths paths. Memory is bounded by chunk_size.
+    Returns: DataFrame with one row per strategy.
+    """
+    rng = np.random.default_rng(seed)
+    stats = {s['name']: _new_stats() for s in strategies}
+
+    for size in _chunks(n_paths, chunk_size):
+        prices, _ = generate_paths(size, rng, weights=weights)
+        for strat in strategies:
+            pnl, _, reason = run_strategy_vec(prices, strat['tp'], strat['sl'], strat['hold'])
+            _accumulate(stats[strat['name']], pnl, reason)
+
+    return pd.DataFrame([{'Strategy': name, **_summarize(s)} for name, s in stats.items()])
+
+def sweep(tp_grid, sl_grid, n_paths, hold_days=None, seed=42, chunk_size=CHUNK_SIZE, weights=WEIGHTS):
+    """
+    Grid search tp_mult x sl_mult on shared paths.
+    Each chunk does one crossing pass per TP level and per SL level; every
+    (tp, sl) cell is then an O(paths) combine, not another pass over the steps.
+    Returns: DataFrame with one row per (tp, sl), best ROI first.
+    """
+    rng = np.random.default_rng(seed)
+    stats = {(tp, sl): _new_stats() for tp in tp_grid for sl in sl_grid}
+
+    for size in _chunks(n_paths, chunk_size):
+        prices, _ = generate_paths(size, rng, weights=weights)
+        mult = prices / prices[:, :1]
+        hold = hold_steps_for(hold_days, mult.shape[1] - 1)
+        tp_idx = first_crossings(mult, tp_grid)
+        sl_idx = first_crossings(mult, sl_grid, above=False)
+        for i, tp in enumerate(tp_grid):
+            for j, sl in enumerate(sl_grid):
+                pnl, _, reason = resolve_exits(mult, tp_idx[i], sl_idx[j], hold)
+                _accumulate(stats[(tp, sl)], pnl, reason)
+        del prices, mult
+
+    rows = [{'TP': tp, 'SL': sl, **_summarize(s)} for (tp, sl), s in stats.items()]
+    return pd.DataFrame(rows).sort_values('ROI %', ascending=False).reset_index(drop=True)
+
+def main():
+    n_paths = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"--- MONTE CARLO: {n_paths:,} PATHS x {STEPS} STEPS (chunk {CHUNK_SIZE:,}) ---")
+
+    strategies = [
+        {'name': '2x / -20%',   'tp': 2.0, 'sl': 0.8, 'hold': None},
+        {'name': '3x / -30%',   'tp': 3.0, 'sl': 0.7, 'hold': None},
+        {'name': 'Hold 90 Days','tp': None,'sl': None,'hold': 90}
+    ]
+
+    start = time.perf_counter()
+    report = simulate(strategies, n_paths)
+    print(f"\n=== STRATEGY COMPARISON ({time.perf_counter() - start:.1f}s) ===")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    tp_grid = [1.5, 2.0, 3.0, 5.0, 10.0]
+    sl_grid = [0.5, 0.7, 0.8, 0.9]
+    start = time.perf_counter()
+    grid = sweep(tp_grid, sl_grid, n_paths)
+    print(f"\n=== TP/SL SWEEP: {len(tp_grid) * len(sl_grid)} cells ({time.perf_counter() - start:.1f}s) ===")
+    print(grid[['TP', 'SL', 'ROI %', 'Win Rate %', 'TP %', 'SL %']].head(10).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+if __name__ == "__main__":
+    main()
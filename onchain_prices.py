@@ -0,0 +1,147 @@
+"""
+On-chain PancakeSwap V2 prices for bot.py positions, read from pair reserves.
+
+DexScreener costs one API call per BATCH_SIZE tokens against a shared quota.
+The BSC node can answer for every position at once: a monitor tick sends a
+single JSON-RPC batch to config.BSC_RPC_URL with one getReserves() eth_call
+per held token's TOKEN/WBNB pair, plus the USDT/WBNB pair for the BNB price:
+
+    prices = onchain_prices.get_prices(list(positions))   # 50 positions -> 1 round trip
+
+    price_usd = (reserve_wbnb / 1e18) / (reserve_token / 10**decimals) * bnb_usd
+
+Pair addresses and decimals never change, so they are resolved once per token
+(factory getPair + decimals in one extra batch the first time a token is
+seen) and kept in memory. token0 is the lower of the two addresses (V2 pairs
+sort them), so it needs no call. Only "no WBNB pair" (getPair returned the
+zero address) is remembered; a lookup that errored is retried on the next
+call. Tokens without a price come back as None and bot.py falls back to
+DexScreener for those.
+
+Calldata is ABI-encoded by hand (fixed selectors, 32-byte address words), so
+web3 isn't imported. Any node that accepts JSON-RPC batches works, including
+a local stand-in for tests:
+
+    python mock_exchange.py                      # serves /bsc, see PIGEON_BSC_RPC_URL
+    anvil --fork-url https://bsc-dataseed.binance.org/   # PIGEON_BSC_RPC_URL=http://127.0.0.1:8545
+"""
+import threading
+
+import config
+import http_client
+import telemetry
+
+# Function selectors (first 4 bytes of keccak256 of the signature)
+GET_PAIR = "0xe6a43905"      # getPair(address,address)
+GET_RESERVES = "0x0902f1ac"  # getReserves()
+DECIMALS = "0x313ce567"      # decimals()
+ZERO_ADDRESS = "0x" + "0" * 40
+WBNB_DECIMALS = 18
+RPC_TIMEOUT = 10
+
+_lock = threading.Lock()
+_pairs = {}              # token (lower-case) -> (pair, token_is_token0, decimals) | None = no WBNB pair
+
+# --- ABI ---
+def encode_address(address):
+    return address.lower()[2:].rjust(64, "0")
+
+def words(result):
+    """0x-prefixed return data -> list of uint256 words."""
+    data = result[2:]
+    return [int(data[i:i + 64], 16) for i in range(0, len(data) - 63, 64)]
+
+def decode_address(word):
+    return f"0x{word:040x}"
+
+# --- RPC ---
+def rpc_batch(calls, rpc_url=None):
+    """
+    eth_call every (to, data) in one JSON-RPC batch.
+    Returns hex results in call order; reverted calls are None.
+    """
+    if not calls:
+        return []
+    payload = [{'jsonrpc': '2.0', 'id': i, 'method': 'eth_call', 'params': [{'to': to, 'data': data}, 'latest']}
+               for i, (to, data) in enumerate(calls)]
+    response = http_client.post(rpc_url or config.BSC_RPC_URL, json=payload, timeout=RPC_TIMEOUT)
+    replies = response.json()
+    if not isinstance(replies, list):
+        # Rate limits and nodes without batch support answer with a single error object
+        raise RuntimeError(f"RPC batch rejected (HTTP {response.status_code}): {replies}")
+    results = [None] * len(calls)
+    for reply in replies:
+        i, result = reply.get('id'), reply.get('result')
+        if isinstance(i, int) and 0 <= i < len(calls) and result and result != "0x":
+            results[i] = result
+    return results
+
+def _resolve(tokens):
+    """Look up the WBNB pair and decimals of tokens not seen before (one batch)."""
+    with _lock:
+        new = [t for t in dict.fromkeys(tokens) if t not in _pairs]
+    if not new:
+        return
+    wbnb = config.WBNB_ADDRESS.lower()
+    calls = []
+    for token in new:
+        calls.append((config.PANCAKE_FACTORY_ADDRESS, GET_PAIR + encode_address(token) + encode_address(wbnb)))
+        calls.append((token, DECIMALS))
+    results = rpc_batch(calls)
+    with _lock:
+        for k, token in enumerate(new):
+            pair_result, decimals_result = results[2 * k], results[2 * k + 1]
+            if not pair_result:
+                continue  # Errored / rate-limited reply: retry next batch
+            pair = decode_address(words(pair_result)[0])
+            if pair == ZERO_ADDRESS:
+                _pairs[token] = None
+            elif decimals_result:
+                _pairs[token] = (pair, int(token, 16) < int(wbnb, 16), words(decimals_result)[0])
+
+# --- PRICES ---
+def get_prices(token_addresses):
+    """
+    {address: USD price or None} keyed as given.
+    Costs one RPC round trip once every token's pair is known.
+    """
+    keys = {address: address.lower() for address in dict.fromkeys(token_addresses)}
+    if not keys:
+        return {}
+    usdt = config.USDT_ADDRESS.lower()
+    try:
+        _resolve(list(keys.values()) + [usdt])
+        with _lock:
+            pairs = {t: _pairs[t] for t in set(keys.values()) | {usdt} if _pairs.get(t)}
+        if usdt not in pairs:
+            raise RuntimeError("no USDT/WBNB pair for the BNB price")
+        tokens = list(pairs)
+        with telemetry.span("onchain_prices", tokens=len(tokens)):
+            results = rpc_batch([(pairs[t][0], GET_RESERVES) for t in tokens])
+
+        in_bnb = {}
+        for token, result in zip(tokens, results):
+            if not result:
+                continue
+            reserve0, reserve1 = words(result)[:2]
+            _, is_token0, decimals = pairs[token]
+            token_reserve, wbnb_reserve = (reserve0, reserve1) if is_token0 else (reserve1, reserve0)
+            if token_reserve and wbnb_reserve:
+                in_bnb[token] = (wbnb_reserve / 10 ** WBNB_DECIMALS) / (token_reserve / 10 ** decimals)
+        if usdt not in in_bnb:
+            raise RuntimeError("USDT/WBNB reserves unavailable")
+        bnb_usd = 1 / in_bnb[usdt]
+    except Exception as e:
+        print(f"Error fetching on-chain prices for {len(keys)} tokens: {e}")
+        telemetry.incr('onchain_prices_total', len(keys), result='error')
+        return {address: None for address in keys}
+
+    prices = {address: in_bnb[t] * bnb_usd if t in in_bnb else None for address, t in keys.items()}
+    found = sum(p is not None for p in prices.values())
+    telemetry.incr('onchain_prices_total', found, result='ok')
+    if found < len(prices):
+        telemetry.incr('onchain_prices_total', len(prices) - found, result='missing')
+    return prices
+
+def get_price(token_address):
+    return get_prices([token_address])[token_address]
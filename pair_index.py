@@ -0,0 +1,120 @@
+"""
+Seen-pair index for the bot.py scanner, keyed by DexScreener pair address.
+
+Every scan returns mostly the same pairs as the last one, and each used to be
+re-filtered (and its token re-queued for safety screening) every minute. The
+index remembers the outcome per pair (lower-cased address):
+
+    address -> [verdict, reason, token, liquidity, volume, checked_at]
+
+    PASSED    -> passed the filters (and safety, if screened): still a candidate
+    REJECTED  -> failed a chain / liquidity / volume filter
+    UNSAFE    -> its token failed the safety check
+
+An entry is reused while it is younger than its verdict's TTL and the pair's
+liquidity and 24h volume are both within RECHECK_CHANGE of the values it was
+judged on; otherwise the pair is analysed again. So a scan only does real work
+for new pairs and pairs whose metrics moved. (A pair just under a filter limit
+is re-checked once it moves RECHECK_CHANGE or its entry expires.)
+
+The index persists to INDEX_FILE (temp file + os.replace) so a restart starts
+warm; expired entries are dropped on save.
+"""
+import json
+import os
+import threading
+import time
+
+import safety
+import telemetry
+
+INDEX_FILE = "pair_index.json"
+PASSED, REJECTED, UNSAFE = "passed", "rejected", "unsafe"
+RECHECK_CHANGE = 0.2     # Relative liquidity / volume move that forces a re-check
+TTLS = {
+    PASSED: safety.PASS_TTL,
+    REJECTED: 10 * 60,
+    UNSAFE: 6 * 60 * 60,  # Safety errors expire with safety.ERROR_TTL instead (see _ttl)
+}
+
+_lock = threading.Lock()
+_entries = None          # address -> [verdict, reason, token, liquidity, volume, checked_at]
+_dirty = False
+
+def _load():
+    global _entries
+    if _entries is not None:
+        return
+    try:
+        with open(INDEX_FILE, 'r') as f:
+            _entries = json.load(f)
+    except (OSError, ValueError):
+        _entries = {}
+
+def _ttl(entry):
+    verdict, reason = entry[0], entry[1]
+    if verdict == UNSAFE and reason != safety.HONEYPOT:
+        return safety.ERROR_TTL
+    return TTLS[verdict]
+
+def _moved(old, new):
+    return abs(new - old) > RECHECK_CHANGE * max(old, 1.0)
+
+def lookup(pair_address, liquidity, volume, now=None):
+    """(verdict, reason) if the pair was judged recently on similar metrics, else None."""
+    with _lock:
+        _load()
+        entry = _entries.get((pair_address or "").lower())
+    if entry is None:
+        telemetry.incr('pair_index_misses_total')
+        return None
+    verdict, reason, _, old_liquidity, old_volume, checked_at = entry
+    if (now or time.time()) - checked_at >= _ttl(entry):
+        return None
+    if _moved(old_liquidity, liquidity) or _moved(old_volume, volume):
+        telemetry.incr('pair_index_rechecks_total')
+        return None
+    telemetry.incr('pair_index_hits_total', verdict=verdict)
+    return verdict, reason
+
+def record(pair_address, token_address, verdict, reason, liquidity, volume, now=None):
+    global _dirty
+    if not pair_address:
+        return
+    with _lock:
+        _load()
+        _entries[pair_address.lower()] = [verdict, reason, (token_address or "").lower(),
+                                          liquidity, volume, round(now or time.time(), 1)]
+        _dirty = True
+
+def record_safety(verdicts):
+    """Mark the pairs of tokens that failed safety.check_many() as UNSAFE, then save."""
+    global _dirty
+    failed = {a.lower(): reason for a, (is_safe, reason) in verdicts.items() if not is_safe}
+    if failed:
+        now = round(time.time(), 1)
+        with _lock:
+            _load()
+            for entry in _entries.values():
+                if entry[2] in failed:
+                    entry[0], entry[1], entry[5] = UNSAFE, failed[entry[2]], now
+                    _dirty = True
+    save()
+
+def save():
+    """Drop expired entries and write the index if anything changed."""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        now = time.time()
+        for address in [a for a, e in _entries.items() if now - e[5] >= _ttl(e)]:
+            del _entries[address]
+        tmp = f"{INDEX_FILE}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(_entries, f, separators=(',', ':'))
+            os.replace(tmp, INDEX_FILE)
+            _dirty = False
+        except OSError as e:
+            print(f"Pair index write failed: {e}")
@@ -0,0 +1,99 @@
+"""
+Shared mark-to-market price snapshot.
+
+The bot publishes the prices it already fetched each cycle to SNAPSHOT_FILE
+(written to a temp file, then os.replace'd, so readers never see a partial
+write). Read-only tools (check_status, the dashboard, the circuit breaker,
+the balance check) value positions from it with zero network calls.
+
+Format (compact JSON):
+    {"ts": 1700000000.0, "prices": {"<token_id>": [price, ts, "source"], ...}}
+"""
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_FILE = "price_snapshot.json"
+MAX_AGE = 6 * 3600   # Older marks fall back to entry price
+
+_lock = threading.Lock()
+_cache = {'mtime': None, 'prices': {}}
+
+# --- WRITING ---
+def publish(prices, source="coingecko", path=SNAPSHOT_FILE):
+    """
+    Merge {token_id: price} into the snapshot and atomically replace the file.
+    Tokens not in `prices` keep their previous mark (other pools, other cycles).
+    """
+    now = round(time.time(), 3)
+    with _lock:
+        current = load(path)
+        for token_id, price in prices.items():
+            if price:
+                current[token_id] = [float(price), now, source]
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({'ts': now, 'prices': current}, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Price snapshot write failed: {e}")
+            return current
+        _cache.update(mtime=os.path.getmtime(path), prices=current)
+    return current
+
+# --- READING ---
+def load(path=SNAPSHOT_FILE):
+    """{token_id: [price, ts, source]}. Re-parsed only when the file changes."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if mtime == _cache['mtime']:
+        return dict(_cache['prices'])
+    try:
+        with open(path, "r") as f:
+            prices = json.load(f).get('prices', {})
+    except (OSError, ValueError):
+        return {}
+    _cache.update(mtime=mtime, prices=prices)
+    return dict(prices)
+
+def mark(token_id, pos, prices, max_age=MAX_AGE, now=None):
+    """
+    Current price for a position.
+    Returns: (price, age_seconds) or (entry_price, None) if there is no fresh mark.
+    """
+    entry = prices.get(token_id)
+    now = now or time.time()
+    if entry and now - entry[1] <= max_age:
+        return entry[0], now - entry[1]
+    return pos['entry_price'], None
+
+def value_positions(positions, prices, max_age=MAX_AGE):
+    """
+    Mark a pool's positions to market.
+    Returns: (total_value, rows, unpriced) where rows = [{token, amount, entry, price, value, pnl_pct, age_s}]
+    and unpriced counts positions that fell back to entry price.
+    """
+    total = 0.0
+    rows = []
+    unpriced = 0
+    now = time.time()
+    for token_id, pos in positions.items():
+        price, age = mark(token_id, pos, prices, max_age, now)
+        value = price * pos['amount']
+        total += value
+        if age is None:
+            unpriced += 1
+        rows.append({
+            'token': token_id,
+            'amount': pos['amount'],
+            'entry': pos['entry_price'],
+            'price': price,
+            'value': value,
+            'pnl_pct': (price / pos['entry_price'] - 1) * 100 if pos['entry_price'] else 0.0,
+            'age_s': age,
+        })
+    return total, rows, unpriced
@@ -0,0 +1,150 @@
+"""
+Cached, concurrent Honeypot.is safety checks for the bot.py scanner.
+
+The scanner used to call the API for every filtered pair, one at a time with
+a 1s sleep, and again for the same tokens on every 60s scan. Verdicts are
+now cached per token address (lower-cased) with separate lifetimes:
+
+    SAFE          -> reused for PASS_TTL (owners can still flip a token later)
+    API error     -> retried after ERROR_TTL (transient; stays rejected until then)
+    HONEYPOT      -> kept in a negative set for HONEYPOT_TTL: rejected in O(1), not re-checked
+
+check_many() screens a whole scan batch: cached verdicts are served
+directly, and only new / expired addresses hit the API, MAX_WORKERS at a
+time. Verdicts persist to CACHE_FILE (temp file + os.replace), so a restart
+doesn't re-check everything either. The negative set keeps at most
+MAX_HONEYPOTS addresses (oldest dropped first), so the file stays bounded.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import http_client
+import telemetry
+
+CACHE_FILE = "safety_cache.json"
+PASS_TTL = 30 * 60
+ERROR_TTL = 5 * 60
+HONEYPOT_TTL = 30 * 24 * 3600   # Dead scam tokens stop showing up in scans long before this
+MAX_HONEYPOTS = 20000
+MAX_WORKERS = 4          # Concurrent Honeypot.is calls per batch
+HONEYPOT = "HONEYPOT DETECTED"
+
+_lock = threading.Lock()
+_verdicts = None         # address -> [is_safe, reason, checked_at]
+_honeypots = None        # Negative set: confirmed honeypot address -> flagged_at
+
+# --- API ---
+def check(token_address):
+    """
+    One uncached Honeypot.is lookup.
+    Returns: (is_safe, reason)
+    """
+    try:
+        url = f"{config.HONEYPOT_API_URL}?address={token_address}&chainID=56"
+        response = http_client.get(url, timeout=10)
+        data = response.json()
+
+        # Honeypot.is returns 'honeypotResult' key
+        # If 'isHoneypot' is True, it's unsafe.
+        if "honeypotResult" in data:
+            if data["honeypotResult"].get("isHoneypot"):
+                return False, HONEYPOT
+            return True, "SAFE"
+        # If API fails or data is weird, assume unsafe to be cautious
+        return False, f"UNKNOWN/API ERROR. Data keys: {list(data.keys())}"
+    except Exception as e:
+        return False, f"CHECK FAILED: {e}"
+
+# --- CACHE ---
+def _load():
+    global _verdicts, _honeypots
+    if _verdicts is not None:
+        return
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            cached = json.load(f)
+        _verdicts, _honeypots = cached['verdicts'], cached['honeypots']
+        if isinstance(_honeypots, list):  # Older caches stored a bare list
+            _honeypots = dict.fromkeys(_honeypots, round(time.time(), 1))
+    except (OSError, ValueError, KeyError):
+        _verdicts, _honeypots = {}, {}
+
+def _save():
+    tmp = f"{CACHE_FILE}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump({'verdicts': _verdicts, 'honeypots': _honeypots}, f, separators=(',', ':'))
+        os.replace(tmp, CACHE_FILE)
+    except OSError as e:
+        print(f"Safety cache write failed: {e}")
+
+def cached(token_address, now=None):
+    """(is_safe, reason) if a verdict is still valid, else None."""
+    addr = token_address.lower()
+    with _lock:
+        _load()
+        if addr in _honeypots:
+            return False, HONEYPOT
+        entry = _verdicts.get(addr)
+    if entry is None:
+        return None
+    is_safe, reason, checked_at = entry
+    ttl = PASS_TTL if is_safe else ERROR_TTL
+    return (is_safe, reason) if (now or time.time()) - checked_at < ttl else None
+
+def _store(results):
+    now = round(time.time(), 1)
+    with _lock:
+        _load()
+        for addr, (is_safe, reason) in results.items():
+            if reason == HONEYPOT:
+                _honeypots[addr] = now
+                _verdicts.pop(addr, None)
+            else:
+                _verdicts[addr] = [is_safe, reason, now]
+        # Drop verdicts that can't be served any more
+        for addr in [a for a, v in _verdicts.items() if now - v[2] >= max(PASS_TTL, ERROR_TTL)]:
+            del _verdicts[addr]
+        for addr in [a for a, flagged_at in _honeypots.items() if now - flagged_at >= HONEYPOT_TTL]:
+            del _honeypots[addr]
+        if len(_honeypots) > MAX_HONEYPOTS:
+            for addr in sorted(_honeypots, key=_honeypots.get)[:len(_honeypots) - MAX_HONEYPOTS]:
+                del _honeypots[addr]
+        _save()
+
+# --- BATCH ---
+def check_many(token_addresses, max_workers=MAX_WORKERS):
+    """
+    Verdicts for a scan batch: {address: (is_safe, reason)} keyed as given.
+    Only addresses without a valid cached verdict are checked, concurrently.
+    """
+    now = time.time()
+    results, pending = {}, []
+    for address in dict.fromkeys(token_addresses):
+        hit = cached(address, now)
+        if hit is None:
+            pending.append(address)
+        else:
+            results[address] = hit
+            telemetry.incr('safety_cache_hits_total')
+
+    if pending:
+        with telemetry.span("safety_checks", tokens=len(pending)):
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix="safety") as pool:
+                fresh = dict(zip(pending, pool.map(check, pending)))
+        for is_safe, reason in fresh.values():
+            verdict = 'safe' if is_safe else 'honeypot' if reason == HONEYPOT else 'error'
+            telemetry.incr('safety_checks_total', verdict=verdict)
+        _store({a.lower(): v for a, v in fresh.items()})
+        results.update(fresh)
+    return results
+
+def is_honeypot(token_address):
+    """O(1) negative-set lookup (no API call)."""
+    with _lock:
+        _load()
+        return token_address.lower() in _honeypots
@@ -1,7 +1,10 @@
-import requests
+import http_client
+from config import COINGECKO_API_URL
 import datetime
 import time
 
+import numpy as np
+
 # --- CONFIG ---
 MIN_AGE_YEARS = 2
 MIN_VOLUME_USD = 300_000 # Loosened for Testing (was 1M)
@@ -11,7 +14,7 @@ MAX_CANDIDATES = 20 # Limit to avoid hitting rate limits too hard during demo
 
 def get_bnb_tokens():
     """Fetch top BNB Chain tokens by market cap."""
-    url = "https://api.coingecko.com/api/v3/coins/markets"
+    url = f"{COINGECKO_API_URL}/coins/markets"
     params = {
         'vs_currency': 'usd',
         'category': 'binance-smart-chain',
@@ -22,7 +25,7 @@ def get_bnb_tokens():
         'price_change_percentage': '14d,30d,200d' # Fetch recent changes
     }
     try:
-        response = requests.get(url, params=params, timeout=15)
+        response = http_client.get(url, params=params, timeout=15)
         if response.status_code == 200:
             return response.json()
         else:
@@ -34,7 +37,7 @@ def get_bnb_tokens():
 
 def get_coin_details(coin_id):
     """Fetch specific details (Genesis Date) for a coin."""
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}"
+    url = f"{COINGECKO_API_URL}/coins/{coin_id}"
     params = {
         'localization': 'false',
         'tickers': 'false',
@@ -43,7 +46,7 @@ def get_coin_details(coin_id):
         'developer_data': 'true'
     }
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params, timeout=10)
         if response.status_code == 429:
             print("Rate limit hit. Sleeping 60s...")
             time.sleep(60)
@@ -57,10 +60,10 @@ def get_coin_details(coin_id):
 
 def get_market_chart(coin_id, days=30):
     """Fetch OHLCV history for advanced calculation."""
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
+    url = f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart"
     params = {'vs_currency': 'usd', 'days': days, 'interval': 'daily'}
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_client.get(url, params=params, timeout=10)
         if response.status_code == 429:
             time.sleep(60)
             return get_market_chart(coin_id, days)
@@ -91,6 +94,56 @@ def classify_tier(mcap):
     elif mcap > 1_000_000_000: return 'lower_mid'
     else: return 'small'
 
+# --- COLUMNAR SCREENING ---
+# The same rules as get_min_volume / classify_tier / score_candidate, applied
+# to whole columns at once so a screen over thousands of coins is a handful of
+# numpy operations instead of a Python loop per coin.
+TIERS = np.array(['large', 'upper_mid', 'core_mid', 'lower_mid', 'small'])
+TIER_BONUS = {'core_mid': 30, 'upper_mid': 30, 'large': 20}
+
+def columns(coins, keys):
+    """Float columns (missing / None -> 0) from a list of dicts, one row per key."""
+    return np.array([[c.get(k) or 0 for c in coins] for k in keys], dtype=np.float64).reshape(len(keys), -1)
+
+def min_volumes(mcap):
+    """get_min_volume() for an array of market caps."""
+    return np.select([mcap > 10_000_000_000, mcap > 1_000_000_000], [5_000_000, 1_000_000], 500_000)
+
+def classify_tiers(mcap):
+    """classify_tier() for an array of market caps."""
+    return np.select([mcap > 10_000_000_000, mcap > 5_000_000_000, mcap > 2_000_000_000, mcap > 1_000_000_000],
+                     TIERS[:4], TIERS[4])
+
+def score_candidates(candidates):
+    """score_candidate() for every candidate at once (same arithmetic order, so identical floats)."""
+    bonus = np.array([TIER_BONUS.get(c['tier'], 0) for c in candidates], dtype=np.float64)
+    dip = np.array([c['dip_pct'] for c in candidates], dtype=np.float64)
+    dev, liq, flash, age = columns(candidates, ('dev_score', 'liq_score', 'is_flash_crash', 'age_years'))
+    score = 100 + bonus
+    score += dip * 0.5
+    score += dev * 0.2
+    score += liq * 0.2
+    score += 50 * flash
+    score -= 10 * (age < 3.0)
+    return score
+
+def top_n(scores, n):
+    """
+    Indices of the n highest scores, best first, via argpartition (no full sort).
+    Equal scores keep their input order, exactly like the stable sort it replaces.
+    """
+    count = len(scores)
+    if n <= 0 or not count:
+        return np.empty(0, dtype=np.intp)
+    if n < count:
+        kth = scores[np.argpartition(-scores, n - 1)[:n]].min()   # n-th best score
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:n - len(above)]    # Earliest ties fill the last slots
+        picked = np.concatenate([above, ties])
+    else:
+        picked = np.arange(count)
+    return picked[np.lexsort((picked, -scores[picked]))]
+
 def score_candidate(coin):
     """Rank candidates to ensure we always get the best 20 available."""
     score = 100 # Base score
@@ -122,15 +175,18 @@ def balance_watchlist(candidates):
     OLD: Enforced strict tier % (Rejected valid tokens).
     NEW: Returns Top N candidates by Score.
     """
-    # 1. Score every candidate
-    for c in candidates:
-        c['signal_score'] = score_candidate(c)
+    if not candidates:
+        return []
+
+    # 1. Score every candidate (one vectorized pass)
+    scores = score_candidates(candidates)
         
-    # 2. Sort by Score (Highest first)
-    candidates.sort(key=lambda x: x['signal_score'], reverse=True)
-    
-    # 3. Return Top N (Ensures we never return an empty list if ANY candidates exist)
-    final_list = candidates[:MAX_CANDIDATES]
+    # 2. Top N by Score, highest first (partial sort; ties keep screening order)
+    # Ensures we never return an empty list if ANY candidates exist
+    final_list = []
+    for i in top_n(scores, MAX_CANDIDATES).tolist():
+        candidates[i]['signal_score'] = float(scores[i])
+        final_list.append(candidates[i])
     
     # Log the scores for debugging
     print(f"DEBUG: Top Candidate Score: {final_list[0]['signal_score']:.1f} ({final_list[0]['symbol']})")
@@ -145,38 +201,30 @@ def screen_candidates():
     
     valid_candidates = []
     
-    for coin in candidates:
+    # 1-3. Market cap, dynamic volume and dip for every coin at once
+    # (missing numbers count as 0, which fails the filters)
+    mcap, vol, ath, current_price, change_14d = columns(candidates, (
+        'market_cap', 'total_volume', 'ath', 'current_price', 'price_change_percentage_14d_in_currency'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dip_pct = ((ath - current_price) / ath) * 100
+    passed = (mcap >= MIN_MCAP) & (mcap <= MAX_MCAP) & (vol >= min_volumes(mcap)) & (ath != 0)
+    passed &= (dip_pct >= MIN_DIP_PERCENT) | (change_14d < -15.0)   # Others can't pass the dip filter below
+    tiers = classify_tiers(mcap)
+    check_expert = change_14d < -15.0
+    
+    for idx in np.flatnonzero(passed).tolist():
+        coin = candidates[idx]
         symbol = coin['symbol'].upper()
         coin_id = coin['id']
-        mcap = coin.get('market_cap', 0)
-        vol = coin.get('total_volume', 0)
-        
-        # 1. Market Cap Filter
-        if not (MIN_MCAP <= mcap <= MAX_MCAP):
-            continue
-            
-        # 2. Dynamic Volume Filter
-        if vol < get_min_volume(mcap):
-            continue
-            
-        # 3. Dip Check
-        ath = coin.get('ath', 0)
-        if ath == 0: continue
-        current_price = coin.get('current_price', 0)
-        dip_pct = ((ath - current_price) / ath) * 100
+        coin['dip_pct'] = float(dip_pct[idx])
+        coin['tier'] = str(tiers[idx])
         
-        coin['dip_pct'] = dip_pct
-        coin['tier'] = classify_tier(mcap)
-        
-        # 4. Expert Flash Crash Logic
+        # 4. Expert Flash Crash Logic (needs the coin's chart, so per coin)
         is_flash_crash = False
-        change_14d = coin.get('price_change_percentage_14d_in_currency')
-        should_check_expert = (change_14d and change_14d < -15.0)
-        
         expert_reason = ""
         
-        if should_check_expert:
-            print(f"  [CHECK] {symbol} ({coin['tier']}) volatile ({change_14d:.1f}%). Fetching Chart...")
+        if check_expert[idx]:
+            print(f"  [CHECK] {symbol} ({coin['tier']}) volatile ({change_14d[idx]:.1f}%). Fetching Chart...")
             chart = get_market_chart(coin_id)
             
             if chart and 'prices' in chart and 'total_volumes' in chart:
@@ -209,7 +257,7 @@ def screen_candidates():
         coin['is_flash_crash'] = is_flash_crash
         
         # Filter Logic
-        if (dip_pct < MIN_DIP_PERCENT) and (not is_flash_crash):
+        if (coin['dip_pct'] < MIN_DIP_PERCENT) and (not is_flash_crash):
              continue
 
         # Add to valid list (without details yet)
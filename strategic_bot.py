@@ -1,39 +1,63 @@
+import math
 import time
 import schedule
-import requests
+import http_client
 import json
 import os
 from datetime import datetime
-import pandas as pd
-import sys
 import sys
+import threading
+import atexit
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from config import (
     PAPER_MODE, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, WATCHLIST_FILE,
-    BSC_RPC_URL, WBNB_ADDRESS, PANCAKE_ROUTER_ADDRESS, TRADE_AMOUNT_BNB
+    BSC_RPC_URL, WBNB_ADDRESS, PANCAKE_ROUTER_ADDRESS, TRADE_AMOUNT_BNB,
+    POOLS, INITIAL_CAPITAL, COINGECKO_API_URL, BINANCE_FUTURES_URL
 )
-import screener
 import gc
-from strategies.aamr import AAMRStrategy
-from strategies.echo import EchoStrategy
-from strategies.nia import NIAStrategy
-from indicators import calculate_indicators
+import telemetry
+import event_feed
+import candles
+import market_snapshot
+import price_snapshot
+import exchange_info
+import account
+import coordinator
+import metrics_server
+import strategies
 
 # --- GLOBAL VARIABLES ---
-TOKENS = {}
-NIA_TOKENS = {}
+WATCHLISTS = {}   # {universe: {token_id: []}} - filled by update_watchlist
 TOKEN_METADATA = {}
+METADATA_FIELDS = ('symbol', 'dev_score', 'age_years', 'categories', 'is_flash_crash')
 market_data = {}
-CANDLE_CACHE = {} # Memory cache: {token_id: (timestamp, df)}
+# Memory cache: candles.py's series cache ({(token_id, timeframe): CandleSeries}, 1h TTL,
+# LRU under CANDLE_CACHE_MB), shared so each series is held and counted once.
+# Tokens with open positions are pinned (see pin_open_positions).
+CANDLE_CACHE = candles.SERIES_CACHE
+MARKET_CACHE = {} # Shared across pool workers: {token_id: (timestamp, row)}
+MARKET_TTL = 120
+SOLD_HISTORY = {} # Cooldown tracker: {symbol: sold_at}
 
-# --- STRATEGY INITIALIZATION ---
-strategy = AAMRStrategy()
+_state_lock = threading.RLock()  # Serializes every state read-modify-write
+SHARDED = False   # --sharded: split the watchlist across workers via coordinator.py
 
+# --- STRATEGY INITIALIZATION ---
 def get_strategy_for_mode(mode):
-    if mode == 'echo':
-        return EchoStrategy()
-    elif mode == 'nia':
-        return NIAStrategy()
-    return AAMRStrategy()
+    # Resolved through the registry: strategy modules load on first use
+    return strategies.get_strategy(mode if mode in ('echo', 'nia') else 'aamr')
+
+def pool_config(name):
+    for cfg in POOLS:
+        if cfg['name'] == name:
+            return cfg
+    return None
+
+def pool_names(state):
+    """Configured pools first, then any legacy pool still in the state file."""
+    names = [cfg['name'] for cfg in POOLS]
+    return names + [k for k, v in state.items() if isinstance(v, dict) and 'cash' in v and k not in names]
 
 # --- LOGGING ---
 STATE_FILE = "strategic_state.json"
@@ -45,6 +69,7 @@ def log_msg(msg):
     print(entry)
     with open(LOG_FILE, "a") as f:
         f.write(entry + "\n")
+    event_feed.emit('log', msg)
 
 def send_telegram_msg(msg):
     """Send message to Telegram if configured"""
@@ -54,7 +79,7 @@ def send_telegram_msg(msg):
     try:
         url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
         data = {"chat_id": TELEGRAM_CHAT_ID, "text": msg}
-        requests.post(url, data=data, timeout=5)
+        http_client.post(url, data=data, timeout=5)
     except Exception as e:
         print(f"Telegram Error: {e}")
 
@@ -72,12 +97,7 @@ def check_bnb_balance():
     """Check if sub-account has sufficient BNB for fees (> 0.01 BNB)."""
     if PAPER_MODE: return True
     try:
-        from binance.client import Client
-        from dotenv import load_dotenv
-        load_dotenv()
-        client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
-        bnb = client.get_asset_balance(asset='BNB')
-        return float(bnb['free']) > 0.01
+        return account.free('BNB') > 0.01  # Per-cycle snapshot, no extra call
     except:
         return False
 
@@ -95,10 +115,7 @@ def verify_order_execution(order, symbol):
     """Verify order was actually executed on Binance."""
     if PAPER_MODE: return True
     try:
-        from binance.client import Client
-        from dotenv import load_dotenv
-        load_dotenv()
-        client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
+        client = account.get_client()
         
         # Determine ID
         oid = order.get('orderId')
@@ -116,33 +133,79 @@ def verify_order_execution(order, symbol):
         return False
 
 # --- STATE MANAGEMENT ---
+def default_pool(cfg):
+    return {'cash': round(INITIAL_CAPITAL * cfg['allocation'], 2), 'positions': {}}
+
 def load_state():
+    state = {}
     if os.path.exists(STATE_FILE):
         try:
             with open(STATE_FILE, 'r') as f:
                 state = json.load(f)
-                if 'echo' not in state:
-                    log_msg("Initializing Unified State: 70/30 Split")
-                    state = {
-                        'echo': {'cash': 700.0, 'positions': {}},
-                        'nia': {'cash': 300.0, 'positions': {}}
-                    }
-                # Backfill NIA if upgrading from single-strategy
-                elif 'nia' not in state:
-                    log_msg("Upgrading State: Adding NIA Pool (30% Allocation assumed vacant)")
-                    state['nia'] = {'cash': 300.0, 'positions': {}}
-                    
-                return state
         except:
-            pass
-    return {
-        'echo': {'cash': 700.0, 'positions': {}},
-        'nia': {'cash': 300.0, 'positions': {}}
-    }
+            state = {}
+    if not any(isinstance(v, dict) and 'cash' in v for v in state.values()):
+        if state:
+            log_msg("Initializing Unified State: " + " / ".join(f"{c['allocation']:.0%} {c['name'].upper()}" for c in POOLS))
+        state = {}
+    # Backfill pools added to config since the state was written
+    upgrading = bool(state)
+    for cfg in POOLS:
+        if cfg['name'] not in state:
+            if upgrading:
+                log_msg(f"Upgrading State: Adding {cfg['name'].upper()} Pool ({cfg['allocation']:.0%} Allocation assumed vacant)")
+            state[cfg['name']] = default_pool(cfg)
+    return state
 
 def save_state(state):
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=4)
+    with _state_lock, telemetry.span("save_state"):
+        # Temp file + replace: the dashboard and check_status never read a half-written file
+        tmp = f"{STATE_FILE}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp, STATE_FILE)
+    publish_pool_gauges(state)
+
+@contextmanager
+def state_guard():
+    """In-process lock, plus a cross-process one when sharded workers share the state file."""
+    with _state_lock:
+        if SHARDED:
+            with coordinator.mutex("state"):
+                yield
+        else:
+            yield
+
+def commit_pool(name, pool):
+    """
+    Single writer for pool updates. Pool workers run concurrently, so each
+    merges only its own section into the latest state on disk.
+    """
+    with state_guard():
+        state = load_state()
+        # Keep trailing highs raised by other workers since this pool was loaded
+        on_disk = state.get(name, {}).get('positions', {})
+        for token_id, pos in pool['positions'].items():
+            if token_id in on_disk:
+                pos['highest_price'] = max(pos.get('highest_price', 0), on_disk[token_id].get('highest_price', 0))
+        state[name] = pool
+        save_state(state)
+
+def raise_high(name, token_id, price):
+    """Persist a new trailing high for one position without touching the rest of the pool."""
+    with state_guard():
+        state = load_state()
+        pos = state.get(name, {}).get('positions', {}).get(token_id)
+        if pos and price > pos.get('highest_price', 0):
+            pos['highest_price'] = price
+            save_state(state)
+
+def publish_pool_gauges(state):
+    """Pool cash / open positions for the metrics endpoint."""
+    for pool_name, pool in state.items():
+        if isinstance(pool, dict) and 'cash' in pool:
+            telemetry.set_gauge('pool_cash_usd', pool['cash'], pool=pool_name)
+            telemetry.set_gauge('open_positions', len(pool.get('positions', {})), pool=pool_name)
 
 # --- MARKET CONTEXT FUNCTIONS ---
 def fetch_btc_regime():
@@ -153,9 +216,10 @@ def fetch_btc_regime():
     Neutral -> 1.0x
     """
     try:
-        url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+        url = f"{COINGECKO_API_URL}/coins/bitcoin/market_chart"
         params = {'vs_currency': 'usd', 'days': 35, 'interval': 'daily'}
-        r = requests.get(url, params=params, timeout=5)
+        with telemetry.span("fetch_btc_regime"):
+            r = http_client.get(url, params=params, timeout=5, cache_ttl=600)  # Shared by all pools
         if r.status_code == 200:
             data = r.json()
             prices = [p[1] for p in data['prices']]
@@ -170,8 +234,6 @@ def fetch_btc_regime():
                     return "BEAR", 0.5
                 else:
                     return "NEUTRAL", 1.0
-        # --- RATE LIMIT BUFFER (Increased to 5s) ---
-        time.sleep(5)
     except Exception as e:
         log_msg(f"Error fetching BTC regime: {e}")
     
@@ -180,15 +242,17 @@ def fetch_btc_regime():
 def fetch_btc_trend():
     """Returns True if BTC > 21-Week EMA"""
     try:
-        url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+        url = f"{COINGECKO_API_URL}/coins/bitcoin/market_chart"
         params = {'vs_currency': 'usd', 'days': 160, 'interval': 'daily'}
-        r = requests.get(url, params=params, timeout=5)
+        with telemetry.span("fetch_btc_trend"):
+            r = http_client.get(url, params=params, timeout=5, cache_ttl=600)
         if r.status_code == 200:
             data = r.json()
             prices = [p[1] for p in data['prices']]
             if len(prices) < 147:
                 return True
             
+            import pandas as pd  # Lazy: keeps bot startup light
             s = pd.Series(prices)
             ema_21w = s.ewm(span=147, adjust=False).mean().iloc[-1]
             current = prices[-1]
@@ -203,9 +267,10 @@ def fetch_funding_rate(symbol):
     """Returns True if funding rate < 0.01%"""
     try:
         binance_symbol = f"{symbol}USDT"
-        url = "https://fapi.binance.com/fapi/v1/premiumIndex"
+        url = f"{BINANCE_FUTURES_URL}/fapi/v1/premiumIndex"
         params = {'symbol': binance_symbol}
-        r = requests.get(url, params=params, timeout=5)
+        with telemetry.span("fetch_funding_rate"):
+            r = http_client.get(url, params=params, timeout=5, cache_ttl=300)
         if r.status_code == 200:
             data = r.json()
             if 'lastFundingRate' in data:
@@ -240,11 +305,18 @@ def get_fallback_watchlist():
     ]
 
 def update_watchlist():
-    """Update TOKENS (Echo) and NIA_TOKENS (NIA) from screener"""
+    """Update WATCHLISTS (one per screener universe: 'echo', 'nia') from screener"""
     log_msg("Updating watchlist...")
-    global TOKENS, NIA_TOKENS, TOKEN_METADATA
+    global WATCHLISTS, TOKEN_METADATA, _watchlist_version
+    
+    # Sharded: one elected worker runs the screener, the rest reuse its result
+    if SHARDED and not coordinator.acquire_lease("watchlist"):
+        if sync_watchlist(force=True):
+            return
+        log_msg("No shared watchlist published yet. Screening locally.")
     
     try:
+        import screener  # Lazy: pandas + CoinGecko helpers, only needed weekly
         results = screener.screen_candidates()
         
         # Unpack
@@ -264,8 +336,8 @@ def update_watchlist():
             # Enrich Fallback
             try:
                 ids = ",".join([c['id'] for c in echo_list])
-                url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies=usd&include_24hr_change=true"
-                r = requests.get(url, timeout=10)
+                url = f"{COINGECKO_API_URL}/simple/price?ids={ids}&vs_currencies=usd&include_24hr_change=true"
+                r = http_client.get(url, timeout=10)
                 if r.status_code == 200:
                     data = r.json()
                     for c in echo_list:
@@ -276,44 +348,59 @@ def update_watchlist():
             except Exception as e:
                 log_msg(f"Error enriching fallback metrics: {e}")
             
-        TOKENS = {}     # Reset Echo
-        NIA_TOKENS = {} # Reset NIA
-        TOKEN_METADATA = {} # Reset Metadata
-
-        # Populate ECHO
-        for c in echo_list:
-            TOKENS[c['id']] = [] # Strategy state holder (Legacy format: list of strats, unused now but strict type)
-            TOKEN_METADATA[c['id']] = c
+        # Pre-filter to tokens with a tradeable USDC pair before any signal work.
+        # Open positions always stay so they can still be exited.
+        state = load_state()
+        held = {pid for name in pool_names(state) for pid in state[name]['positions']}
+        echo_list, dropped_echo = exchange_info.filter_tradeable(echo_list, held)
+        nia_list, dropped_nia = exchange_info.filter_tradeable(nia_list, held)
+        if dropped_echo or dropped_nia:
+            log_msg(f"Dropped {len(dropped_echo) + len(dropped_nia)} tokens with no {exchange_info.QUOTE_ASSET} pair: {', '.join(dropped_echo + dropped_nia)}")
             
-        # Populate NIA
-        for c in nia_list:
-            NIA_TOKENS[c['id']] = []
-            TOKEN_METADATA[c['id']] = c # Metadata shared map (assuming unique IDs)
+        watchlists = {'echo': {}, 'nia': {}}
+        metadata = {}
+
+        # Populate each universe (list value is a legacy strategy-state holder, unused)
+        for universe, candidates in [('echo', echo_list), ('nia', nia_list)]:
+            for c in candidates:
+                watchlists[universe][c['id']] = []
+                # Metadata shared map (assuming unique IDs); only the fields signals read
+                metadata[c['id']] = {k: c[k] for k in METADATA_FIELDS if k in c}
+        
+        # Swap in whole dicts so concurrent pool workers never see a half-built list
+        WATCHLISTS, TOKEN_METADATA = watchlists, metadata
+        # Rotated-out tokens: drop their market rows (candles age out of the LRU)
+        for tid in [t for t in MARKET_CACHE if t not in metadata]:
+            MARKET_CACHE.pop(tid, None)
             
-        log_msg(f"Watchlist updated: {len(TOKENS)} Echo tokens, {len(NIA_TOKENS)} NIA tokens")
+        log_msg(f"Watchlist updated: {len(WATCHLISTS['echo'])} Echo tokens, {len(WATCHLISTS['nia'])} NIA tokens")
         
         # Dump current whitelist to file for inspection
         with open("watchlist.json", "w") as f:
             # Combine for viewing
             combined = echo_list + nia_list
             json.dump(combined, f, indent=4)
+        
+        if SHARDED:
+            coordinator.put("watchlist", {'watchlists': WATCHLISTS, 'metadata': TOKEN_METADATA})
+            _, _watchlist_version = coordinator.get("watchlist")
             
     except Exception as e:
         log_msg(f"Error updating watchlist: {e}")
         
         # --- API RESILIENCE HOTFIX (Phase 30) ---
-        # If API fails (e.g. 429), we MUST still populate TOKENS with:
+        # If API fails (e.g. 429), we MUST still populate the watchlist with:
         # 1. Existing Positions (So we can sell them)
         # 2. Fallback Watchlist (So we can buy if possible)
         # Otherwise the bot is blind.
         
         log_msg("⚠️ API ERROR: Engaging Emergency Fallback Protocol.")
-        TOKENS = {}
+        tokens = {}
         
         # 1. Add Fallback List (For Buying)
         fb = get_fallback_watchlist()
         for c in fb:
-            TOKENS[c['id']] = ['echo', 'nia']
+            tokens[c['id']] = ['echo', 'nia']
             
         # 2. Add Open Positions (For Selling)
         # We need to read state manually since we are outside the loop
@@ -328,70 +415,101 @@ def update_watchlist():
              if os.path.exists(STATE_FILE):
                 with open(STATE_FILE, 'r') as f:
                     st = json.load(f)
-                    for pool_name in ['echo', 'nia']:
+                    for pool_name in pool_names(st):
                         if pool_name in st and 'positions' in st[pool_name]:
                             for pid in st[pool_name]['positions']:
-                                if pid not in TOKENS:
-                                    TOKENS[pid] = ['echo'] # Default to echo logic for exit
+                                if pid not in tokens:
+                                    tokens[pid] = ['echo'] # Default to echo logic for exit
                                     log_msg(f"  + Rescued position: {pid}")
         except Exception as ex:
              log_msg(f"Could not rescue positions: {ex}")
-             
-        log_msg(f"Emergency Watchlist engaged: {len(TOKENS)} tokens.")
+        
+        WATCHLISTS = {'echo': tokens, 'nia': {}}
+        log_msg(f"Emergency Watchlist engaged: {len(tokens)} tokens.")
 
 # --- MARKET DATA ---
 def fetch_market_data(token_ids):
-    """Fetch current price/ATH for list of tokens with Retry"""
-    ids_str = ",".join(token_ids)
-    url = "https://api.coingecko.com/api/v3/coins/markets"
-    params = {'vs_currency': 'usd', 'ids': ids_str}
+    """
+    Current price/ATH for a list of tokens as a MarketSnapshot (columnar,
+    snap[token_id] -> {'price', 'ath', 'symbol'}). Rows fetched by any pool
+    worker in the last MARKET_TTL seconds are reused; only the rest hit the API.
+    """
+    now = time.time()
+    cached = {tid: MARKET_CACHE[tid][1] for tid in token_ids
+              if tid in MARKET_CACHE and now - MARKET_CACHE[tid][0] < MARKET_TTL}
+    missing = [tid for tid in token_ids if tid not in cached]
+    if not missing:
+        return market_snapshot.MarketSnapshot.from_rows(cached)
     
-    retries = 3
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, params=params, timeout=15)
-            
-            if response.status_code == 429:
-                log_msg(f"Wait... API Rate Limit (Attempt {attempt+1})")
-                time.sleep(60 * (attempt + 1)) # Backoff: 60s, 120s, 180s
-                continue
-                
-            data = response.json()
-            
-            market_map = {}
-            if isinstance(data, list):
-                for item in data:
-                    market_map[item['id']] = {
-                        'price': item['current_price'],
-                        'ath': item['ath'],
-                        'symbol': item['symbol'].upper()
-                    }
-                return market_map
-            else:
-                log_msg(f"API Error: {data}")
-                
-        except Exception as e:
-            log_msg(f"Error fetching market data: {e}")
-            time.sleep(10)
-            
-    return None
+    fetched = _fetch_market_data(missing)
+    for tid, row in fetched.items():
+        MARKET_CACHE[tid] = (now, row)
+    snap = market_snapshot.MarketSnapshot.concat([fetched, market_snapshot.MarketSnapshot.from_rows(cached)])
+    return snap if len(snap) else None
+
+def _fetch_market_data(token_ids):
+    """Fetch current price/ATH in page-sized chunks; failed chunks are retried on their own."""
+    with telemetry.span("fetch_market_data", tokens=len(token_ids)):
+        snap, failed = market_snapshot.fetch(token_ids, log=log_msg)
+    if failed:
+        log_msg(f"Market data missing for {len(failed)}/{len(token_ids)} tokens after retries")
+    return snap
 
 # ... (skip to fetch_candle_history) ...
 
-def fetch_candle_history(token_id):
-    """Fetch 250 days OHLCV + calculate indicators (with caching)"""
-    
+def fetch_candle_history(token_id, timeframe="1d", symbol=None):
+    """
+    OHLCV history at the strategy's timeframe + indicators (with caching).
+    Tokens with a Binance pair get real hourly candles resampled by candles.py;
+    the rest (or a failed ingest) fall back to CoinGecko daily closes.
+    """
+    with telemetry.span("fetch_candle_history", timeframe=timeframe) as sp:
+        return _fetch_candle_history(token_id, timeframe, symbol, sp)
+
+def _fetch_candle_history(token_id, timeframe, symbol, sp):
     # 1. Check Cache (1 Hour TTL)
-    if token_id in CANDLE_CACHE:
-        cache_time, cached_df = CANDLE_CACHE[token_id]
-        if time.time() - cache_time < 3600:
-            return cached_df
+    cached_series = candles.cached_series(token_id, timeframe)  # Counts candle_cache hits / misses
+    if cached_series is not None:
+        sp['cache'] = 'hit'
+        return cached_series
+
+    sp['cache'] = 'miss'
+    
+    series = None
+    if symbol and exchange_info.is_tradeable(exchange_info.pair_for(symbol)):
+        try:
+            candles.ingest(token_id, symbol)
+            series = candles.get_series(token_id, timeframe)
+            sp['source'] = 'candles'
+        except Exception as e:
+            log_msg(f"Candle ingest failed for {symbol}: {e}")
+    if series is None:
+        if timeframe != "1d":
+            return None  # CoinGecko only has daily closes to offer
+        df = _fetch_coingecko_daily(token_id, sp)
+        if df is None:
+            return None
+        series = candles.CandleSeries.from_frame(df)
+        sp['source'] = 'coingecko'
+    
+    # 2. Update Cache (compact arrays; strategies compute their own indicators
+    # on a to_frame() copy, so none are stored here). get_series already
+    # cached the Binance-backed series.
+    if sp.get('source') == 'coingecko':
+        candles.put_series(token_id, timeframe, series)
+    
+    return series
 
-    url = f"https://api.coingecko.com/api/v3/coins/{token_id}/market_chart"
+def _fetch_coingecko_daily(token_id, sp):
+    """250 daily closes from CoinGecko (Cloud Paper Mode: High=Low=Open=Close)."""
+    import pandas as pd
+    url = f"{COINGECKO_API_URL}/coins/{token_id}/market_chart"
     params = {'vs_currency': 'usd', 'days': 250, 'interval': 'daily'}
     
     try:
-        r = requests.get(url, params=params, timeout=10)
+        r = http_client.get(url, params=params, timeout=10)
+        sp['bytes'] = len(r.content)
+        sp['status'] = str(r.status_code)
         if r.status_code == 200:
             data = r.json()
             
@@ -421,12 +539,6 @@ def fetch_candle_history(token_id):
             df['open'] = df['price']
             df['close'] = df['price']
             
-            # Indicators
-            df = calculate_indicators(df)
-            
-            # 2. Update Cache
-            CANDLE_CACHE[token_id] = (time.time(), df)
-            
             return df
             
         elif r.status_code == 429:
@@ -436,10 +548,10 @@ def fetch_candle_history(token_id):
     
     return None
 
-def fetch_candle_history_with_retry(token_id, max_retries=2):
+def fetch_candle_history_with_retry(token_id, timeframe="1d", symbol=None, max_retries=2):
     """Fetch candle history with retry on rate limit (Exponential Backoff)"""
     for attempt in range(max_retries + 1):
-        df = fetch_candle_history(token_id)
+        df = fetch_candle_history(token_id, timeframe, symbol)
         
         if df is not None:
             return df
@@ -448,43 +560,79 @@ def fetch_candle_history_with_retry(token_id, max_retries=2):
         if attempt < max_retries:
             wait_time = 30 * (attempt + 1)  # 30s, 60s
             log_msg(f"Rate Limited on {token_id}. Retrying in {wait_time}s...")
-            time.sleep(wait_time)
+            telemetry.sleep(wait_time)
     
     log_msg(f"Failed to fetch {token_id} history after {max_retries} retries")
     return None
 
 # --- BOT LOGIC ---
 def run_job(mode="echo"):
-    start_time = time.time()
+    """Run one pool. Opens its own telemetry cycle unless run_fleet already has one."""
+    owns_cycle = telemetry.begin_cycle(mode)
+    if owns_cycle:
+        account.invalidate()  # First balance read of the cycle fetches one get_account
+    try:
+        with telemetry.span(f"pool.{mode}"):
+            _run_pool(mode)
+    finally:
+        if owns_cycle:
+            finish_cycle()
+
+def finish_cycle():
+    summary = telemetry.end_cycle()
+    if summary:
+        log_msg(telemetry.format_summary(summary))
+    pin_open_positions()
+    for line in candles.cache_summaries():
+        log_msg(line)
+
+def pin_open_positions(state=None):
+    """Exempt tokens with open positions from candle cache eviction (exits must never miss data)."""
+    state = state or load_state()
+    held = {tid for name in pool_names(state) for tid in state[name]['positions']}
+    candles.pin(held)
+
+def _run_pool(mode):
     log_msg(f"Running {mode.upper()} pool...")
     
     state = load_state()
     pool = state.get(mode)
+    cfg = pool_config(mode)
     
-    if not pool:
+    if not pool or not cfg:
         log_msg(f"Error: Pool {mode} not found")
         return
     
-    # Select strategy
-    global strategy
-    strategy = get_strategy_for_mode(mode)
+    # Select strategy (local: pool workers run concurrently)
+    kind = cfg['strategy']
+    strategy = get_strategy_for_mode(kind)
     
     # BTC context - GLOBAL SAFETY for ALL modes (Option B)
     # Echo: Modulates risk (0.5x vs 1.5x)
     # NIA:  Macro Stop (Don't buy knives)
     global_btc_context = fetch_btc_trend()
     
-    # Init Cooldown Tracker if missing
-    global SOLD_HISTORY
-    if 'SOLD_HISTORY' not in globals():
-        SOLD_HISTORY = {}
-    
     # Fetch market data
-    target_tokens = NIA_TOKENS if mode == 'nia' else TOKENS
+    target_tokens = WATCHLISTS.get(cfg['universe'], {})
     if not target_tokens:
         log_msg(f"No tokens for {mode}")
         return
 
+    # Sharded: evaluate only this worker's slice; only the pool's execution
+    # owner places orders, everyone else queues intents for it.
+    is_executor = True
+    if SHARDED:
+        coordinator.heartbeat()
+        is_executor = coordinator.acquire_lease(f"executor:{mode}")
+        mine = set(coordinator.shard(list(target_tokens)))
+        log_msg(f"Shard {coordinator.WORKER_ID}: {len(mine)}/{len(target_tokens)} {mode.upper()} tokens"
+                f"{' | execution owner' if is_executor else ''}")
+        target_tokens = {tid: v for tid, v in target_tokens.items() if tid in mine}
+        if not target_tokens:
+            if is_executor:
+                drain_intents(mode)
+            return
+
     token_ids = list(target_tokens.keys())
     
     current_market_data = fetch_market_data(token_ids)
@@ -494,38 +642,43 @@ def run_job(mode="echo"):
     
     log_msg(f"Processing {len(current_market_data)} tokens")
     
+    # Publish marks for check_status / dashboard / circuit breaker (no extra API calls)
+    price_snapshot.publish(current_market_data.prices())
+    
     # Process tokens
-    for token_id, strategies in target_tokens.items():
+    for token_id, token_strategies in target_tokens.items():
         if token_id not in current_market_data:
             continue
             
         token_symbol = current_market_data[token_id]['symbol']
         
         # COOLDOWN CHECK (24h)
-        if token_symbol in SOLD_HISTORY:
-            last_sold = SOLD_HISTORY[token_symbol]
+        last_sold = SOLD_HISTORY.get(token_symbol)
+        if last_sold is not None:
             if (time.time() - last_sold) < 86400: # 24 hours
                 # Silent skip to avoid log spam, or debug log
                 # log_msg(f"⏳ Cooldown: {token_symbol}")
                 continue
             else:
-                del SOLD_HISTORY[token_symbol] # Expired
+                SOLD_HISTORY.pop(token_symbol, None) # Expired
         
         price = current_market_data[token_id]['price']
+        if not math.isfinite(price):
+            continue  # CoinGecko sent no price: never trade or trail on NaN
         
         # Fetch history with RETRY
-        df_hist = fetch_candle_history_with_retry(token_id)
+        df_hist = fetch_candle_history_with_retry(token_id, strategy.timeframe, token_symbol)
         
         # NIA targets (YoungSpec) often have short history. Echo requires 200d.
-        min_history = 30 if mode == 'nia' else 200
+        # (Counted in bars of strategy.timeframe)
+        min_history = cfg['min_history']
         
         if df_hist is None or len(df_hist) < min_history:
             continue
         
         # --- RATE LIMIT PROTECTION ---
-        # Sleep 2s between tokens to prevent API spam (30 calls/min limit)
-        # We have 20 tokens, so this adds ~40s to loop which is fine for hourly job.
-        time.sleep(2)
+        # CoinGecko pacing (30 calls/min) is enforced by http_client's shared
+        # limiter across all pool workers, so no fixed per-token sleep here.
         
         # Position state
         current_pos = pool['positions'].get(token_id)
@@ -543,8 +696,7 @@ def run_job(mode="echo"):
                 current_pos['highest_price'] = price
                 
                 # CRITICAL: Persist immediately
-                state[mode] = pool
-                save_state(state)
+                raise_high(mode, token_id, price)
                 log_msg(f"  {token_symbol}: New High ${price:.4f} (was ${old_high:.4f})")
                 
             highest_price = current_pos['highest_price']
@@ -555,246 +707,340 @@ def run_job(mode="echo"):
             'entry_timestamp': current_pos.get('timestamp') if current_pos else None
         }
         
-        if mode == 'echo':
+        if kind == 'echo':
             ctx['btc_bullish'] = global_btc_context
             ctx['funding_ok'] = fetch_funding_rate(token_symbol)
-        if mode == 'nia':
+        if kind == 'nia':
             if token_id in TOKEN_METADATA:
                 ctx.update(TOKEN_METADATA[token_id])
         
         # Get signal
-        signal = strategy.get_signal(df_hist, current_pos_price, highest_price, mode, context=ctx)
+        with telemetry.span("get_signal", mode=mode):
+            signal = strategy.get_signal(df_hist, current_pos_price, highest_price, kind, context=ctx)
         
-        # Execute BUY
-        if signal == 'BUY' and not current_pos:
-            pool_cash = pool['cash']
-            risk_cap = 0.05 if mode == 'echo' else 0.10
-            
-            # Regime Detection logic
-            regime, multiplier = fetch_btc_regime()
-            
-            # Max positions
-            max_pos = 10 if mode == 'echo' else 5
-            
-            # EMERGENCY EXIT: If maxed out, force exit oldest position?
-            # User requested explicitly. However, simple fix #1 and #2 might clear naturally.
-            # But "Option B" was listed... let's stick to core fix first.
-            
-            if len(pool['positions']) >= max_pos:
-                continue
-            # ALLOCATION STRATEGY (7% Risk per trade for small accounts)
-            allocation_pct = 0.07 # Increased from 0.05 to ensure >$5 min order
-            
-            # Adjust allocation based on regime
-            if regime == "BULL": 
-                allocation_pct *= 1.2 # Bull market aggression
-            elif regime == "BEAR":
-                allocation_pct *= 0.5 # Bear market defense
-            
-            bet_size = pool_cash * allocation_pct * multiplier
-            
-            # SMALL ACCOUNT BOOSTER
-            # If bet < $11 (Binance Min), boost it if we have cash.
-            MIN_TRADE = 11.0 
-            if bet_size < MIN_TRADE:
-                if pool_cash >= MIN_TRADE:
-                    bet_size = MIN_TRADE # Force minimum trade
-                else:
-                    # Not enough cash for even a min trade
-                    # log_msg(f"Skipping {token_symbol}: Insufficient Cash (${pool_cash:.2f}) for min trade (${MIN_TRADE})")
-                    continue
-            
-            # Dust filter (Redundant now but safe)
-            if bet_size < 5:
-                continue
-            
-            # Fees
-            EST_FEE = 0.004
-            total_cost = bet_size * (1 + EST_FEE)
-            
-            # --- FEE AWARE EXECUTION ---
-            has_bnb = check_bnb_balance()
-            safe_usdc = calculate_buy_amount_with_fees(bet_size, use_bnb_fees=has_bnb)
-            
-            # Binance Min Order is usually $5-$10. We enforce $10 in logic above (bet_size < 10 continue).
-            # But safe_usdc might dip below.
-            if safe_usdc < 5.0:
-                continue
+        if signal in ('BUY', 'SELL'):
+            if is_executor:
+                execute_signal(signal, mode, pool, token_id, token_symbol, price)
+            elif (signal == 'BUY' and not current_pos) or (signal == 'SELL' and current_pos):
+                if coordinator.submit_intent(mode, token_id, signal, symbol=token_symbol, price=price):
+                    log_msg(f"  -> {signal} {token_symbol} queued for the {mode.upper()} execution owner")
+    
+    if SHARDED and is_executor:
+        drain_intents(mode)
+        pool = load_state()[mode]
+    
+    log_msg(f"{mode.upper()} complete. Cash: ${pool['cash']:.1f}")
 
-            # EXECUTE
-            filled_qty = 0
-            filled_price = price
-            
-            if PAPER_MODE:
-                filled_qty = safe_usdc / price
-                log_msg(f"[PAPER] BUY {token_symbol} @ ${price:.2f} | Size: ${safe_usdc:.2f}")
+# --- SHARDED MODE ---
+_watchlist_version = None
+
+def drain_intents(mode):
+    """Execution owner: place the BUY/SELL intents shard workers queued for this pool."""
+    intents = coordinator.claim_intents(mode)
+    if not intents:
+        return 0
+    log_msg(f"{mode.upper()}: executing {len(intents)} queued intent(s)")
+    market = fetch_market_data([i['token_id'] for i in intents]) or {}
+    for intent in intents:
+        token_id, side, payload = intent['token_id'], intent['side'], intent['payload']
+        # Cooldowns live in the executor's process; shard workers can't see them
+        last_sold = SOLD_HISTORY.get(payload['symbol'])
+        if side == 'BUY' and last_sold is not None and time.time() - last_sold < 86400:
+            coordinator.finish_intent(intent['id'], 'skipped', 'cooldown')
+            continue
+        price = market[token_id]['price'] if token_id in market else payload['price']
+        try:
+            execute_signal(side, mode, load_state()[mode], token_id, payload['symbol'], price)
+            coordinator.finish_intent(intent['id'], 'done')
+        except Exception as e:
+            log_msg(f"❌ Intent {intent['id']} ({side} {payload['symbol']}) failed: {e}")
+            coordinator.finish_intent(intent['id'], 'failed', str(e))
+    return len(intents)
+
+def sync_watchlist(force=False):
+    """Followers adopt the watchlist published by the screener leader. True if one is available."""
+    global WATCHLISTS, TOKEN_METADATA, _watchlist_version
+    published, updated = coordinator.get("watchlist")
+    if published is None:
+        return False
+    if force or updated != _watchlist_version:
+        WATCHLISTS, TOKEN_METADATA = published['watchlists'], published['metadata']
+        _watchlist_version = updated
+        log_msg(f"Synced shared watchlist: " + ", ".join(f"{len(v)} {k.upper()}" for k, v in WATCHLISTS.items()))
+    return True
+
+def coordinator_tick():
+    """Sharded mode, every minute: heartbeat (renews leases), drain intents for pools we own."""
+    try:
+        coordinator.heartbeat()
+        for cfg in POOLS:
+            if coordinator.acquire_lease(f"executor:{cfg['name']}"):
+                drain_intents(cfg['name'])
+        sync_watchlist()
+    except Exception as e:
+        log_msg(f"Coordinator tick failed: {e}")
+
+def execute_signal(signal, mode, pool, token_id, token_symbol, price):
+    """
+    Act on a BUY/SELL signal for one pool: size it, place it (paper or live),
+    update the pool and commit it. Called inline by the pool worker, or by the
+    pool's execution owner for intents submitted by shard workers.
+    """
+    cfg = pool_config(mode)
+    kind = cfg['strategy']
+    current_pos = pool['positions'].get(token_id)
+    
+    # Execute BUY
+    if signal == 'BUY' and not current_pos:
+        pool_cash = pool['cash']
+        risk_cap = 0.05 if kind == 'echo' else 0.10
+        
+        # Regime Detection logic
+        regime, multiplier = fetch_btc_regime()
+        
+        # Max positions
+        max_pos = cfg['max_positions']
+        
+        # EMERGENCY EXIT: If maxed out, force exit oldest position?
+        # User requested explicitly. However, simple fix #1 and #2 might clear naturally.
+        # But "Option B" was listed... let's stick to core fix first.
+        
+        if len(pool['positions']) >= max_pos:
+            return
+        # ALLOCATION STRATEGY (7% Risk per trade for small accounts)
+        allocation_pct = 0.07 # Increased from 0.05 to ensure >$5 min order
+        
+        # Adjust allocation based on regime
+        if regime == "BULL": 
+            allocation_pct *= 1.2 # Bull market aggression
+        elif regime == "BEAR":
+            allocation_pct *= 0.5 # Bear market defense
+        
+        bet_size = pool_cash * allocation_pct * multiplier
+        
+        # SMALL ACCOUNT BOOSTER
+        # If bet < $11 (Binance Min), boost it if we have cash.
+        MIN_TRADE = 11.0 
+        if bet_size < MIN_TRADE:
+            if pool_cash >= MIN_TRADE:
+                bet_size = MIN_TRADE # Force minimum trade
             else:
-                # LIVE EXECUTION
-                try:
-                    from binance.client import Client
-                    from dotenv import load_dotenv
-                    load_dotenv()
-                    client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
-                    
-                    # Symbol must be exact e.g. "BTCUSDT"
-                    # token_symbol is from CoinGecko, usually matches but verify?
-                    # We store 'symbol' in market_data (Upper case).
-                    pair = f"{token_symbol}USDC"
-                    
-                    log_msg(f"🚀 LIVE BUY: {pair} | Amount: ${safe_usdc:.2f} | BNB Fees: {has_bnb}")
-                    
-                    # Market Order via QuoteQty (Spend X USDC)
-                    order = client.order_market_buy(symbol=pair, quoteOrderQty=round(safe_usdc, 2))
-                    
-                    if verify_order_execution(order, pair):
-                        filled_qty = float(order['executedQty'])
-                        filled_price = float(order['cummulativeQuoteQty']) / filled_qty
-                        log_msg(f"✅ FILLED: {filled_qty:.4f} {token_symbol} @ ${filled_price:.4f}")
-                    else:
-                        log_msg("❌ Order unverified. Skipping state update.")
-                        continue
-                        
-                except Exception as e:
-                    # Handle "Invalid Symbol" (Not on Binance) explicitly
-                    if "Invalid symbol" in str(e) or '"code":-1121' in str(e):
-                        log_msg(f"⚠️ Skipped {token_symbol}: Pair {pair} not found on Binance.")
-                        continue
-                    
-                    log_msg(f"❌ LIVE TRADE FAILED: {e}")
-                    continue
+                # Not enough cash for even a min trade
+                # log_msg(f"Skipping {token_symbol}: Insufficient Cash (${pool_cash:.2f}) for min trade (${MIN_TRADE})")
+                return
+        
+        # Dust filter (Redundant now but safe)
+        if bet_size < 5:
+            return
+        
+        # Fees
+        EST_FEE = 0.004
+        total_cost = bet_size * (1 + EST_FEE)
+        
+        # --- FEE AWARE EXECUTION ---
+        has_bnb = check_bnb_balance()
+        safe_usdc = calculate_buy_amount_with_fees(bet_size, use_bnb_fees=has_bnb)
+        
+        # Binance Min Order is usually $5-$10. We enforce $10 in logic above (bet_size < 10 return).
+        # But safe_usdc might dip below.
+        if safe_usdc < 5.0:
+            return
 
-            # UPDATE STATE
-            if pool_cash >= safe_usdc:
-                pool['cash'] -= safe_usdc
+        # EXECUTE
+        filled_qty = 0
+        filled_price = price
+        
+        if PAPER_MODE:
+            filled_qty = safe_usdc / price
+            log_msg(f"[PAPER] BUY {token_symbol} @ ${price:.2f} | Size: ${safe_usdc:.2f}")
+        else:
+            # LIVE EXECUTION
+            try:
+                client = account.get_client()
+                
+                # Symbol must be exact e.g. "BTCUSDT"
+                # token_symbol is from CoinGecko, usually matches but verify?
+                # We store 'symbol' in market_data (Upper case).
+                pair = exchange_info.pair_for(token_symbol)
+                if not exchange_info.is_tradeable(pair):
+                    log_msg(f"⚠️ Skipped {token_symbol}: Pair {pair} not found on Binance.")
+                    return
+                problem = exchange_info.check_order(pair, safe_usdc / price, price)
+                if problem:
+                    log_msg(f"⚠️ Skipped {token_symbol}: {problem}")
+                    return
+                
+                log_msg(f"🚀 LIVE BUY: {pair} | Amount: ${safe_usdc:.2f} | BNB Fees: {has_bnb}")
                 
-                pool['positions'][token_id] = {
-                    'entry_price': filled_price,
-                    'highest_price': filled_price,
-                    'amount': filled_qty,
-                    'timestamp': time.time(),
-                    'regime_at_entry': regime,
-                    'use_bnb_fees': has_bnb
-                }
+                # Market Order via QuoteQty (Spend X USDC)
+                with telemetry.span("order_submit", side='BUY'):
+                    order = client.order_market_buy(symbol=pair, quoteOrderQty=round(safe_usdc, 2))
+                
+                with telemetry.span("order_verify", side='BUY'):
+                    verified = verify_order_execution(order, pair)
+                if verified:
+                    filled_qty = float(order['executedQty'])
+                    filled_price = float(order['cummulativeQuoteQty']) / filled_qty
+                    account.apply_fill(token_symbol.upper(), filled_qty)
+                    account.apply_fill(exchange_info.QUOTE_ASSET, -float(order['cummulativeQuoteQty']))
+                    log_msg(f"✅ FILLED: {filled_qty:.4f} {token_symbol} @ ${filled_price:.4f}")
+                else:
+                    log_msg("❌ Order unverified. Skipping state update.")
+                    return
+                    
+            except Exception as e:
+                # Handle "Invalid Symbol" (Not on Binance) explicitly
+                if "Invalid symbol" in str(e) or '"code":-1121' in str(e):
+                    log_msg(f"⚠️ Skipped {token_symbol}: Pair {pair} not found on Binance.")
+                    return
                 
-                send_alert(f"BUY {token_symbol} ({mode}) Size: ${safe_usdc:.1f}")
-                state[mode] = pool
-                save_state(state)
-        
-        # Execute SELL
-        elif signal == 'SELL' and current_pos:
-            amount = current_pos['amount']
-            token_symbol = current_pos.get('symbol', token_symbol) # Fallback if stored
+                log_msg(f"❌ LIVE TRADE FAILED: {e}")
+                return
+
+        # UPDATE STATE
+        if pool_cash >= safe_usdc:
+            pool['cash'] -= safe_usdc
             
-            # --- LIVE EXECUTION ---
-            realized_usdc = 0
+            pool['positions'][token_id] = {
+                'entry_price': filled_price,
+                'highest_price': filled_price,
+                'amount': filled_qty,
+                'timestamp': time.time(),
+                'regime_at_entry': regime,
+                'use_bnb_fees': has_bnb,
+                'symbol': token_symbol
+            }
             
-            if PAPER_MODE:
-                gross_proceeds = amount * price
-                EST_FEE = 0.004
-                realized_usdc = gross_proceeds * (1 - EST_FEE)
-                log_msg(f"[PAPER] SELL {token_symbol} @ ${price:.2f} | AMT: {amount:.4f}")
-            else:
-                try:
-                    from binance.client import Client
-                    from dotenv import load_dotenv
-                    load_dotenv()
-                    client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
-                    
-                    pair = f"{token_symbol}USDC"
-                    log_msg(f"🚀 LIVE SELL: {pair} | Amount: {amount:.4f}")
-                    
-                    # Rounding: Binance expects precision handling. 
-                    # For safety, we sell 99.9% of tracked amount to avoid "Insufficient Balance" rounding errors?
-                    # Or we fetch actual balance first?
-                    # FETCH BALANCE FIRST IS SAFEST.
-                    
-                    asset = token_symbol.upper()
-                    bal = client.get_asset_balance(asset=asset)
-                    free_amt = float(bal['free'])
+            event_feed.emit('trade', side='BUY', pool=mode, token=token_id, symbol=token_symbol,
+                            price=filled_price, qty=filled_qty, usd=round(safe_usdc, 2), paper=PAPER_MODE)
+            send_alert(f"BUY {token_symbol} ({mode}) Size: ${safe_usdc:.1f}")
+            commit_pool(mode, pool)
+    
+    # Execute SELL
+    elif signal == 'SELL' and current_pos:
+        amount = current_pos['amount']
+        token_symbol = current_pos.get('symbol', token_symbol) # Fallback if stored
+        
+        # --- LIVE EXECUTION ---
+        realized_usdc = 0
+        
+        if PAPER_MODE:
+            gross_proceeds = amount * price
+            EST_FEE = 0.004
+            realized_usdc = gross_proceeds * (1 - EST_FEE)
+            log_msg(f"[PAPER] SELL {token_symbol} @ ${price:.2f} | AMT: {amount:.4f}")
+        else:
+            try:
+                client = account.get_client()
+                
+                pair = exchange_info.pair_for(token_symbol)
+                log_msg(f"🚀 LIVE SELL: {pair} | Amount: {amount:.4f}")
+                
+                # Rounding: Binance expects precision handling. 
+                # For safety, we sell 99.9% of tracked amount to avoid "Insufficient Balance" rounding errors?
+                # Or we fetch actual balance first?
+                # FETCH BALANCE FIRST IS SAFEST.
+                
+                asset = token_symbol.upper()
+                free_amt = account.free(asset)  # From this cycle's account snapshot
+                
+                # If we think we have 10.5 but only have 10.499, use 10.499
+                # Then floor to the pair's LOT_SIZE step so the order isn't rejected
+                sell_qty = exchange_info.round_qty(pair, min(amount, free_amt))
+                
+                # Check dust
+                if sell_qty * price < 1.0:
+                     log_msg("⚠️ Sell amount is dust (< $1). Skipping/Holding.")
+                     return
+                problem = exchange_info.check_order(pair, sell_qty, price)
+                if problem:
+                     log_msg(f"⚠️ Sell blocked locally: {problem}. Holding.")
+                     return
+                
+                # MARKET SELL
+                with telemetry.span("order_submit", side='SELL'):
+                    order = client.order_market_sell(symbol=pair, quantity=sell_qty)
+                
+                with telemetry.span("order_verify", side='SELL'):
+                    verified = verify_order_execution(order, pair)
+                if verified:
+                    # cummulativeQuoteQty is the actual USDT received (gross)
+                    gross_proceeds = float(order['cummulativeQuoteQty'])
                     
-                    # If we think we have 10.5 but only have 10.499, use 10.499
-                    sell_qty = min(amount, free_amt)
+                    # Fees: If BNB used, gross = net (mostly). If USDT fee, gross - fee = net.
+                    # Actually order returns 'commission' in fills.
+                    # Simpler: cummulativeQuoteQty IS what the buyer paid.
+                    # Realized is gross. Fees are separate expense.
+                    # But for Cash tracking, we want Net.
                     
-                    # Check dust
-                    if sell_qty * price < 1.0:
-                         log_msg("⚠️ Sell amount is dust (< $1). Skipping/Holding.")
-                         continue
+                    # Commission logic is complex. 
+                    # APPROXIMATION:
+                    # If BNB used, Net = Gross. (Fee deducted from BNB stack).
+                    # If USDT dedcuted, Net = Gross - Fee.
                     
-                    # MARKET SELL
-                    order = client.order_market_sell(symbol=pair, quantity=sell_qty)
+                    # We stored 'use_bnb_fees' in current_pos!
+                    use_bnb = current_pos.get('use_bnb_fees', False)
                     
-                    if verify_order_execution(order, pair):
-                        # cummulativeQuoteQty is the actual USDT received (gross)
-                        gross_proceeds = float(order['cummulativeQuoteQty'])
-                        
-                        # Fees: If BNB used, gross = net (mostly). If USDT fee, gross - fee = net.
-                        # Actually order returns 'commission' in fills.
-                        # Simpler: cummulativeQuoteQty IS what the buyer paid.
-                        # Realized is gross. Fees are separate expense.
-                        # But for Cash tracking, we want Net.
-                        
-                        # Commission logic is complex. 
-                        # APPROXIMATION:
-                        # If BNB used, Net = Gross. (Fee deducted from BNB stack).
-                        # If USDT dedcuted, Net = Gross - Fee.
-                        
-                        # We stored 'use_bnb_fees' in current_pos!
-                        use_bnb = current_pos.get('use_bnb_fees', False)
-                        
-                        if use_bnb:
-                            realized_usdc = gross_proceeds
-                        else:
-                            realized_usdc = gross_proceeds * 0.999 # 0.1% est fee deduction
-                            
-                        log_msg(f"✅ SOLD: {sell_qty:.4f} {token_symbol} -> ${realized_usdc:.2f}")
+                    if use_bnb:
+                        realized_usdc = gross_proceeds
                     else:
-                        log_msg("❌ Sell Order unverified. Keeping position.")
-                        continue
+                        realized_usdc = gross_proceeds * 0.999 # 0.1% est fee deduction
                         
-                except Exception as e:
-                    log_msg(f"❌ LIVE SELL FAILED: {e}")
-                    continue
-
-            # UPDATE STATE
-            # Simple PnL calc
-            entry_val = amount * current_pos['entry_price']
-            pnl = realized_usdc - entry_val
-            
-            pool['cash'] += realized_usdc
-            del pool['positions'][token_id]
-            
-            # Record Sell for Cooldown
-            SOLD_HISTORY[token_symbol] = time.time()
-            
-            log_msg(f"  PnL: ${pnl:.2f}")
-            send_alert(f"SELL {token_symbol} ({mode}) PnL: ${pnl:.2f}")
-            
-            state[mode] = pool
-            save_state(state)
+                    account.apply_fill(asset, -sell_qty)
+                    account.apply_fill(exchange_info.QUOTE_ASSET, gross_proceeds)
+                    log_msg(f"✅ SOLD: {sell_qty:.4f} {token_symbol} -> ${realized_usdc:.2f}")
+                else:
+                    log_msg("❌ Sell Order unverified. Keeping position.")
+                    return
+                    
+            except Exception as e:
+                log_msg(f"❌ LIVE SELL FAILED: {e}")
+                return
+
+        # UPDATE STATE
+        # Simple PnL calc
+        entry_val = amount * current_pos['entry_price']
+        pnl = realized_usdc - entry_val
         
-        # Update highest price
-        if current_pos and price > current_pos['highest_price']:
-            save_state(state)
+        pool['cash'] += realized_usdc
+        del pool['positions'][token_id]
         
-        time.sleep(5)
-    
-    log_msg(f"{mode.upper()} complete. Cash: ${pool['cash']:.1f}")
+        # Record Sell for Cooldown
+        SOLD_HISTORY[token_symbol] = time.time()
+        
+        log_msg(f"  PnL: ${pnl:.2f}")
+        event_feed.emit('trade', side='SELL', pool=mode, token=token_id, symbol=token_symbol,
+                        price=price, qty=amount, usd=round(realized_usdc, 2), pnl=round(pnl, 2),
+                        pnl_pct=round(pnl / entry_val * 100, 2) if entry_val else 0.0, paper=PAPER_MODE)
+        send_alert(f"SELL {token_symbol} ({mode}) PnL: ${pnl:.2f}")
+        
+        commit_pool(mode, pool)
 
 def run_fleet():
-    log_msg(">>> FLEET: 70% ECHO | 30% NIA <<<")
-    run_job(mode="echo")
-    
-    # Hotfix 3: Inter-Strategy Buffer
-    # Hotfix 3: Inter-Strategy Buffer (Stabilization)
-    # Echo uses API calls. Give CoinGecko 90s to recover quota.
-    log_msg("Buffer: Sleeping 90s before NIA to refill API quota...")
-    time.sleep(90)
-    
-    run_job(mode="nia")
-    log_msg(">>> FLEET COMPLETE <<<")
+    telemetry.begin_cycle("fleet")
+    account.invalidate()  # One get_account for the whole fleet cycle
+    try:
+        log_msg(">>> FLEET: " + " | ".join(f"{c['allocation']:.0%} {c['name'].upper()}" for c in POOLS) + " <<<")
+        
+        # One worker per pool. They share the market-data / candle caches and
+        # http_client's rate limiter, and write state through commit_pool().
+        with ThreadPoolExecutor(max_workers=len(POOLS), thread_name_prefix="pool") as executor:
+            futures = {executor.submit(run_job, mode=c['name']): c['name'] for c in POOLS}
+        for future, name in futures.items():
+            if future.exception():
+                log_msg(f"❌ {name.upper()} pool crashed: {future.exception()}")
+        
+        # Reuses the cycle's account snapshot. Sharded: only a worker that places orders.
+        if not SHARDED or any(coordinator.lease_owner(f"executor:{c['name']}") == coordinator.WORKER_ID for c in POOLS):
+            verify_position_sync()
+        log_msg(">>> FLEET COMPLETE <<<")
+    finally:
+        finish_cycle()
 
 def main():
     log_msg("--- BOT STARTED ---")
+    if metrics_server.start():
+        log_msg(f"Metrics endpoint: http://{metrics_server.METRICS_HOST}:{metrics_server.METRICS_PORT}/metrics")
     
     MODE = "echo"
     MODE = "echo" # Fallback
@@ -809,11 +1055,19 @@ def main():
         elif arg == "mixed":
             IS_FLEET = True
     
+    global SHARDED
+    SHARDED = "--sharded" in sys.argv or os.getenv("PIGEON_SHARDED") == "1"
+    if SHARDED:
+        coordinator.heartbeat()
+        atexit.register(coordinator.leave)  # Hand our shard and leases back right away
+        log_msg(f"Sharded mode: worker {coordinator.WORKER_ID}, {len(coordinator.live_workers())} live worker(s) in {coordinator.COORD_DB}")
+    
     # Initial run
     # 1. Hotfix: Ensure State File Exists & Normalized
     # Always load and save on startup to ensure format migration persists
     log_msg("Verifying state integrity...")
-    save_state(load_state())
+    save_state(load_state())  # Also seeds the pool gauges
+    pin_open_positions()
 
     update_watchlist()
     
@@ -831,6 +1085,8 @@ def main():
         schedule.every(1).hours.do(lambda: run_job(mode=MODE))
     
     schedule.every().monday.do(update_watchlist)
+    if SHARDED:
+        schedule.every(1).minutes.do(coordinator_tick)
     
     while True:
         schedule.run_pending()
@@ -839,27 +1095,22 @@ def main():
 # --- DEPLOYMENT SAFETY CHECKS ---
 def validate_binance_balance():
     """Verify Binance balance matches expected state before trading."""
-    from binance.client import Client
-    from dotenv import load_dotenv
-    
-    load_dotenv()
-    
     try:
         if PAPER_MODE:
             return True
 
-        client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
-        usdc_balance = client.get_asset_balance(asset='USDC')
-        binance_free = float(usdc_balance['free'])
+        binance_free = account.free(exchange_info.QUOTE_ASSET)
         
         state = load_state()
-        internal_cash = state['echo']['cash'] + state['nia']['cash']
+        pools = pool_names(state)
+        internal_cash = sum(state[name]['cash'] for name in pools)
         
-        # Calculate total value of positions
+        # Mark positions to market from the bot's last price snapshot
+        prices = price_snapshot.load()
         internal_positions_value = 0
-        for pool in ['echo', 'nia']:
-            for symbol, pos in state[pool]['positions'].items():
-                internal_positions_value += pos['entry_price'] * pos['amount']
+        for pool in pools:
+            value, _, _ = price_snapshot.value_positions(state[pool]['positions'], prices)
+            internal_positions_value += value
         
         internal_total = internal_cash + internal_positions_value
         
@@ -878,13 +1129,19 @@ def validate_binance_balance():
         return False
 
 def check_circuit_breaker(state, initial_capital=150.0):
-    """Emergency stop if losses exceed 20% of starting capital."""
-    total_cash = state['echo']['cash'] + state['nia']['cash']
+    """Emergency stop if losses exceed 20% of starting capital (positions marked to market)."""
+    pools = pool_names(state)
+    total_cash = sum(state[name]['cash'] for name in pools)
     
+    prices = price_snapshot.load()
     total_position_value = 0
-    for pool in ['echo', 'nia']:
-        for symbol, pos in state[pool]['positions'].items():
-            total_position_value += pos['entry_price'] * pos['amount']
+    unpriced = 0
+    for pool in pools:
+        value, _, missing = price_snapshot.value_positions(state[pool]['positions'], prices)
+        total_position_value += value
+        unpriced += missing
+    if unpriced:
+        log_msg(f"⚠️ Circuit breaker: {unpriced} position(s) have no fresh mark, valued at entry.")
     
     current_portfolio = total_cash + total_position_value
     loss_pct = ((initial_capital - current_portfolio) / initial_capital) * 100
@@ -897,34 +1154,30 @@ def check_circuit_breaker(state, initial_capital=150.0):
     
     return True
 
+def position_symbol(token_id, pos):
+    """Exchange asset for a position: stored symbol, else watchlist metadata, else the id."""
+    if pos.get('symbol'):
+        return pos['symbol']
+    if token_id in TOKEN_METADATA:
+        return TOKEN_METADATA[token_id]['symbol']
+    return token_id
+
 def verify_position_sync():
-    """Audit position alignment every 10 cycles"""
-    if PAPER_MODE: return
-    
-    from binance.client import Client
-    from dotenv import load_dotenv
-    load_dotenv()
+    """Reconcile every pool position against this cycle's account snapshot. Returns drift rows."""
+    if PAPER_MODE: return []
     
     try:
-        client = Client(os.getenv('BINANCE_API_KEY'), os.getenv('BINANCE_SECRET'))
-        account = client.get_account()
-        binance_balances = {b['asset']: float(b['free']) for b in account['balances'] if float(b['free']) > 0}
-        
-        state = load_state()
-        
-        # Rough Mapper
-        for pool in ['echo', 'nia']:
-            for coingecko_id, pos in state[pool]['positions'].items():
-                # Heuristic: Most symbols are uppercase version of part of ID
-                # We need the SYMBOL stored in position data preferably.
-                # Currently we store 'entry_price', 'amount'. We assume ID.
-                # We should look up symbol from TOKENS dictionary if available?
-                # For now, simplistic check: 
-                # If we have a position, we expect SOME non-zero balance on Binance.
-                pass 
-                
+        drift = account.reconcile(load_state(), position_symbol)
     except Exception as e:
         log_msg(f"Sync check failed: {e}")
+        return []
+    
+    telemetry.set_gauge('position_drift_assets', len(drift))
+    for d in drift:
+        log_msg(f"⚠️ DRIFT {d['asset']} ({'/'.join(d['pools'])}): state {d['expected']:.6f} vs exchange {d['actual']:.6f} ({d['diff']:+.6f})")
+    if not drift:
+        log_msg("Position sync OK: state matches exchange balances.")
+    return drift
 
 if __name__ == "__main__":
     # PRE-FLIGHT CHECK
@@ -0,0 +1,36 @@
+"""
+Strategy registry.
+
+Strategies are resolved by name and their module is imported on first use,
+so importing the package (or the live bot) doesn't load pandas/numpy and
+every strategy module up front:
+
+    from strategies import get_strategy
+    strategy = get_strategy('echo')
+"""
+import importlib
+
+# name -> (module, class)
+REGISTRY = {
+    'echo': ('strategies.echo', 'EchoStrategy'),
+    'nia': ('strategies.nia', 'NIAStrategy'),
+    'aamr': ('strategies.aamr', 'AAMRStrategy'),
+    'ler': ('strategies.ler', 'LERStrategy'),
+    'lvp': ('strategies.lvp', 'LVPStrategy'),
+    'phoenix': ('strategies.phoenix', 'PhoenixStrategy'),
+    'dip_buy': ('strategies.dip_buy', 'DipBuyStrategy'),
+    'rsi': ('strategies.rsi_strategy', 'RSIStrategy'),
+}
+
+def names():
+    return list(REGISTRY)
+
+def strategy_class(name):
+    """The strategy class registered under name (imports its module on first call)."""
+    if name not in REGISTRY:
+        raise KeyError(f"Unknown strategy '{name}'. Known: {', '.join(REGISTRY)}")
+    module, cls = REGISTRY[name]
+    return getattr(importlib.import_module(module), cls)
+
+def get_strategy(name, **params):
+    return strategy_class(name)(**params)
@@ -1,4 +1,5 @@
 from .base import BaseStrategy
+from indicators import true_range
 import pandas as pd
 import numpy as np
 
@@ -34,9 +35,9 @@ class AAMRStrategy(BaseStrategy):
         df['bb_lower'] = df['bb_mid'] - (2.0 * df['bb_std'])
         df['bb_upper'] = df['bb_mid'] + (2.0 * df['bb_std'])
         
-        # --- EXPERT: ATR (Approximate using Close-to-Close) ---
-        # Since we might not have High/Low, we use abs(diff)
-        df['tr'] = df['price'].diff().abs()
+        # --- EXPERT: ATR ---
+        # True range when High/Low exist, else close-to-close abs(diff)
+        df['tr'] = true_range(df, 'price')
         df['atr'] = df['tr'].rolling(window=14).mean()
         
         return df
@@ -126,7 +127,7 @@ class AAMRStrategy(BaseStrategy):
         if len(df) < self.slow_sma:
             return 'HOLD' # Not enough data
             
-        df = self.calculate_indicators(df)
+        df = self.calculate_indicators(self.as_frame(df))
         row = df.iloc[-1]
         
         # Current Price
@@ -2,10 +2,19 @@ from abc import ABC, abstractmethod
 import pandas as pd
 
 class BaseStrategy(ABC):
+    # Bar size get_signal expects (candles.TIMEFRAMES); the live bot resamples
+    # the hourly candle store to it. min_history in config.POOLS counts these bars.
+    timeframe = "1d"
+
     def __init__(self, name, capital=100.0):
         self.name = name
         self.capital = capital
 
+    @staticmethod
+    def as_frame(df):
+        """Private DataFrame to compute on: a copy, or to_frame() of a compact candles.CandleSeries."""
+        return df.copy() if isinstance(df, pd.DataFrame) else df.to_frame()
+
     @abstractmethod
     def run(self, df):
         """
@@ -1,4 +1,5 @@
 from .base import BaseStrategy
+from indicators import true_range
 import pandas as pd
 import numpy as np
 
@@ -25,7 +26,7 @@ class EchoStrategy(BaseStrategy):
         df['bb_width_rank'] = df['bb_width'].rolling(window=180).rank(pct=True)
         
         # 2. ATR (Volatility)
-        df['tr'] = df['price'].diff().abs()
+        df['tr'] = true_range(df, 'price')
         df['atr'] = df['tr'].rolling(window=self.atr_period).mean()
         
         # 3. Volume Trend (Hardened Check)
@@ -55,7 +56,7 @@ class EchoStrategy(BaseStrategy):
         """
         if len(df) < 20: return 'HOLD' # Use 20 for logic, handled by df length check
         
-        df = self.calculate_indicators(df.copy())
+        df = self.calculate_indicators(self.as_frame(df))
         row = df.iloc[-1]
         price = row['price']
         symbol = context.get('symbol', 'UNKNOWN')
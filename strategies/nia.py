@@ -57,7 +57,7 @@ class NIAStrategy(BaseStrategy):
         # Allow very short history for young speculative plays, but require SOME data
         if len(df) < 20: return 'HOLD'
         
-        df = self.calculate_indicators(df.copy())
+        df = self.calculate_indicators(self.as_frame(df))
         row = df.iloc[-1]
         price = row['price']
         
@@ -0,0 +1,185 @@
+"""
+Per-cycle timing spans and process-wide counters for the live trading loop.
+
+Wrap a stage in `with telemetry.span("stage"):` and sleep through
+`telemetry.sleep()`. Between begin_cycle() and end_cycle() every span is
+collected; end_cycle() aggregates them into per-stage percentiles and appends
+one compact JSON line to METRICS_FILE. Time spent sleeping inside a span is
+subtracted from that span and reported separately.
+
+incr()/set_gauge() keep lifetime counters and gauges (API calls, cache hits,
+pool cash...) that metrics_server exposes in Prometheus format.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_FILE = "cycle_metrics.jsonl"
+
+_lock = threading.Lock()
+_local = threading.local()
+_cycle = None       # {'name', 'start', 'spans': {stage: [work_s, ...]}, 'attrs': {stage: {...}}, 'sleep', 'work'}
+last_cycle = None   # Summary of the most recently finished cycle
+
+_counters = {}      # (name, ((label, value), ...)) -> float
+_gauges = {}
+
+# --- COUNTERS / GAUGES ---
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+def incr(name, value=1, **labels):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def clear_gauges(name):
+    """Drop every labelled series of a gauge (e.g. pools that no longer exist)."""
+    with _lock:
+        for key in [k for k in _gauges if k[0] == name]:
+            del _gauges[key]
+
+def metrics_snapshot():
+    """Returns (counters, gauges) copies, safe to iterate while the bot runs."""
+    with _lock:
+        return dict(_counters), dict(_gauges)
+
+def _thread_state():
+    if not hasattr(_local, 'slept'):
+        _local.slept = 0.0
+        _local.depth = 0
+    return _local
+
+def begin_cycle(name="fleet"):
+    """Start collecting spans. Returns False if a cycle is already open (nested call)."""
+    global _cycle
+    with _lock:
+        if _cycle is not None:
+            return False
+        _cycle = {'name': name, 'start': time.time(), 'perf': time.perf_counter(),
+                  'spans': {}, 'attrs': {}, 'sleep': 0.0, 'work': 0.0}
+        return True
+
+def sleep(seconds):
+    """time.sleep() that is booked as sleep, not work."""
+    start = time.perf_counter()
+    time.sleep(seconds)
+    slept = time.perf_counter() - start
+    _thread_state().slept += slept
+    with _lock:
+        if _cycle is not None:
+            _cycle['sleep'] += slept
+
+@contextmanager
+def span(stage, **attrs):
+    """
+    Time a stage. Yields a dict the caller can add attributes to
+    (e.g. attrs['cache'] = 'hit', attrs['bytes'] = 1234).
+    Numeric attributes are summed per stage, string attributes are counted.
+    """
+    local = _thread_state()
+    slept_before = local.slept
+    local.depth += 1
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        elapsed = time.perf_counter() - start
+        local.depth -= 1
+        work = max(elapsed - (local.slept - slept_before), 0.0)
+        _record(stage, work, attrs, root=(local.depth == 0))
+
+def _record(stage, work, attrs, root):
+    with _lock:
+        if _cycle is None:
+            return
+        _cycle['spans'].setdefault(stage, []).append(work)
+        if root:
+            _cycle['work'] += work
+        agg = _cycle['attrs'].setdefault(stage, {})
+        for key, value in attrs.items():
+            if isinstance(value, bool) or isinstance(value, str):
+                key = f"{key}={value}"
+                agg[key] = agg.get(key, 0) + 1
+            elif isinstance(value, (int, float)):
+                agg[key] = agg.get(key, 0) + value
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+def end_cycle(metrics_file=METRICS_FILE):
+    """Close the cycle, append its summary to metrics_file and return it."""
+    global _cycle, last_cycle
+    with _lock:
+        cycle, _cycle = _cycle, None
+    if cycle is None:
+        return None
+
+    stages = {}
+    for stage, works in cycle['spans'].items():
+        entry = {
+            'n': len(works),
+            'total_ms': _ms(sum(works)),
+            'p50_ms': _ms(percentile(works, 50)),
+            'p90_ms': _ms(percentile(works, 90)),
+            'p99_ms': _ms(percentile(works, 99)),
+            'max_ms': _ms(max(works)),
+        }
+        for key, value in cycle['attrs'].get(stage, {}).items():
+            entry[key] = round(value, 3) if isinstance(value, float) else value
+        stages[stage] = entry
+
+    summary = {
+        'ts': datetime.fromtimestamp(cycle['start']).strftime("%Y-%m-%d %H:%M:%S"),
+        'cycle': cycle['name'],
+        'wall_s': round(time.perf_counter() - cycle['perf'], 3),
+        'work_s': round(cycle['work'], 3),
+        'sleep_s': round(cycle['sleep'], 3),
+        'stages': stages,
+    }
+    try:
+        with open(metrics_file, "a") as f:
+            f.write(json.dumps(summary, separators=(',', ':')) + "\n")
+    except OSError as e:
+        print(f"Telemetry write failed: {e}")
+
+    _publish_cycle(summary)
+    last_cycle = summary
+    return summary
+
+def _publish_cycle(summary):
+    """Mirror the finished cycle into gauges/counters for the metrics endpoint."""
+    stages = summary['stages']
+    evaluated = stages.get('get_signal', {}).get('n', 0)
+    incr('cycles_total')
+    incr('tokens_evaluated_total', evaluated)
+    set_gauge('last_cycle_timestamp_seconds', time.time())
+    set_gauge('cycle_duration_seconds', summary['wall_s'])
+    set_gauge('cycle_work_seconds', summary['work_s'])
+    set_gauge('cycle_sleep_seconds', summary['sleep_s'])
+    set_gauge('cycle_tokens_evaluated', evaluated)
+    writes = stages.get('save_state')
+    if writes:
+        set_gauge('state_write_latency_seconds', writes['p50_ms'] / 1000, quantile='0.5')
+        set_gauge('state_write_latency_seconds', writes['p90_ms'] / 1000, quantile='0.9')
+        set_gauge('state_write_latency_seconds', writes['max_ms'] / 1000, quantile='1')
+
+def format_summary(summary, top=4):
+    """One-line human summary: wall/work/sleep plus the most expensive stages."""
+    ranked = sorted(summary['stages'].items(), key=lambda kv: kv[1]['total_ms'], reverse=True)
+    parts = [f"{name} {s['total_ms'] / 1000:.1f}s (n={s['n']}, p90 {s['p90_ms']:.0f}ms)" for name, s in ranked[:top]]
+    return (f"CYCLE {summary['cycle']}: wall {summary['wall_s']:.1f}s | work {summary['work_s']:.1f}s | "
+            f"sleep {summary['sleep_s']:.1f}s | " + " | ".join(parts))
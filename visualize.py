@@ -1,8 +1,75 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import re
+import json
+import os
+import event_feed
 
-LOG_FILE = 'trade_log.txt'
+LOG_FILE = 'trade_log.txt'              # Legacy text log (pre event feed)
+TRADE_FEED = 'trade_events.jsonl'       # Written by bot.py
+CURSOR_FILE = 'visualize_cursor.json'   # Feed offset + running totals + chart curve (the trades stay in the feed)
+CURVE_POINTS = 500                      # Max points kept for the cumulative profit chart
+
+def empty_stats():
+    # curve: [trade #, cumulative profit %] every `stride` sells, downsampled to stay under CURVE_POINTS
+    return {'buys': 0, 'sells': 0, 'wins': 0, 'profit_sum': 0.0, 'best': None, 'worst': None,
+            'curve': [], 'stride': 1}
+
+def trade_from_event(event):
+    """Map a bot.py trade event onto the row shape parse_log() produces."""
+    if event.get('side') == 'BUY':
+        return {'type': 'buy', 'symbol': event.get('symbol', 'UNKNOWN'), 'addr': event.get('addr'), 'price': event['price']}
+    return {'type': 'sell', 'symbol': event.get('symbol'), 'price': event['price'],
+            'profit_pct': event['profit_pct'], 'action': event.get('action')}
+
+def add_trades(stats, trades):
+    """Fold trades into running totals and the chart curve (empty_stats() shape)."""
+    for t in trades:
+        if t['type'] == 'buy':
+            stats['buys'] += 1
+            continue
+        profit = t['profit_pct']
+        stats['sells'] += 1
+        stats['wins'] += int(profit > 0)
+        stats['profit_sum'] += profit
+        stats['best'] = profit if stats['best'] is None else max(stats['best'], profit)
+        stats['worst'] = profit if stats['worst'] is None else min(stats['worst'], profit)
+        if stats['sells'] % stats['stride'] == 0:
+            stats['curve'].append([stats['sells'], round(stats['profit_sum'], 4)])
+            if len(stats['curve']) > CURVE_POINTS:
+                # Halve the resolution: keep every other point, sample half as often from now on
+                stats['stride'] *= 2
+                stats['curve'] = [p for p in stats['curve'] if p[0] % stats['stride'] == 0]
+    return stats
+
+def load_stats():
+    """
+    Running trade totals, folding in only the events appended to the feed
+    since the last run. Falls back to trade_log.txt if there is no feed yet.
+    """
+    if not os.path.exists(TRADE_FEED):
+        return add_trades(empty_stats(), parse_log())
+
+    cursor = {'offset': 0, **empty_stats()}
+    try:
+        with open(CURSOR_FILE, 'r') as f:
+            saved = json.load(f)
+        if set(saved) == set(cursor):  # Older cursor layouts are rebuilt from the start of the feed
+            cursor = saved
+    except (OSError, ValueError):
+        pass
+    if cursor['offset'] > os.path.getsize(TRADE_FEED):
+        cursor = {'offset': 0, **empty_stats()}  # Feed was rotated
+
+    events, offset = event_feed.read_since(cursor['offset'], TRADE_FEED)
+    new_trades = [trade_from_event(e) for e in events if e.get('kind') == 'trade']
+    add_trades(cursor, new_trades)
+    cursor['offset'] = offset
+    tmp = f"{CURSOR_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(cursor, f)
+    os.replace(tmp, CURSOR_FILE)
+    print(f"Read {len(events)} new events ({len(new_trades)} trades) from {TRADE_FEED}.")
+    return cursor
 
 def parse_log():
     trades = []
@@ -65,44 +132,44 @@ def parse_log():
     return trades
 
 def visualize():
-    trades = parse_log()
-    df = pd.DataFrame(trades)
+    stats = load_stats()
     
-    if df.empty:
+    if not stats['buys'] and not stats['sells']:
         print("No trades found to visualize.")
         return
 
-    print(f"Parsed {len(df)} trade events.")
-    print(df.head())
+    print(f"Tracked {stats['buys'] + stats['sells']} trade events ({stats['buys']} buys, {stats['sells']} sells).")
 
-    sells = df[df['type'] == 'sell']
-    if not sells.empty:
-        # Plot Cumulative Profit
+    if stats['sells']:
+        # Plot Cumulative Profit from the cursor's curve (plus the latest sell if it fell between samples)
+        curve = stats['curve']
+        if not curve or curve[-1][0] != stats['sells']:
+            curve = curve + [[stats['sells'], stats['profit_sum']]]
         plt.figure(figsize=(10, 6))
-        sells['profit_pct'].cumsum().plot(kind='line', title='Cumulative Profit % (Paper Trading)', marker='o')
+        plt.plot([p[0] for p in curve], [p[1] for p in curve], marker='o')
+        plt.title('Cumulative Profit % (Paper Trading)')
         plt.xlabel('Trade #')
         plt.ylabel('Cumulative Profit %')
         plt.grid(True)
         plt.savefig('profits.png')
         print("\nProfit chart saved to 'profits.png'.")
         
-        # Metrics
-        total_trades = len(sells)
-        wins = len(sells[sells['profit_pct'] > 0])
-        win_rate = (wins / total_trades) * 100
-        avg_profit = sells['profit_pct'].mean()
+        # Metrics (running totals from the cursor)
+        total_trades = stats['sells']
+        win_rate = (stats['wins'] / total_trades) * 100
+        avg_profit = stats['profit_sum'] / total_trades
         
         print("\n--- PERFORMANCE METRICS ---")
         print(f"Total Completed Trades: {total_trades}")
         print(f"Win Rate: {win_rate:.1f}%")
         print(f"Average Profit per Trade: {avg_profit:.2f}%")
-        print(f"Best Trade: +{sells['profit_pct'].max():.2f}%")
-        print(f"Worst Trade: {sells['profit_pct'].min():.2f}%")
+        print(f"Best Trade: +{stats['best']:.2f}%")
+        print(f"Worst Trade: {stats['worst']:.2f}%")
         
     else:
         print("No completed SELL trades found yet.")
-        if not df[df['type']=='buy'].empty:
-            print(f"Found {len(df[df['type']=='buy'])} active BUY positions.")
+        if stats['buys']:
+            print(f"Found {stats['buys']} active BUY positions.")
 
 if __name__ == "__main__":
     visualize()
@@ -0,0 +1,215 @@
+"""
+Walk-forward / out-of-sample evaluation.
+
+Splits each token's history into rolling train/test folds, tunes each
+strategy's parameters on the train window and scores the winner on the
+unseen test window. Folds run in parallel across a process pool; the data is
+loaded once in the parent and handed to each worker once (not per fold).
+
+Usage:
+    python walk_forward.py                        # data/*_history.csv, all cores
+    python walk_forward.py --train 120 --test 30  # Fold sizes in bars (days)
+    python walk_forward.py --workers 1            # Serial (debugging)
+"""
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest_system import load_all_data
+from strategies.dip_buy import DipBuyStrategy
+from strategies.rsi_strategy import RSIStrategy
+from strategies.echo import EchoStrategy
+from strategies.ler import LERStrategy
+from strategies.aamr import AAMRStrategy
+
+# --- CONFIG ---
+TRAIN_BARS = 120
+TEST_BARS = 30
+STEP_BARS = None         # Default: step by TEST_BARS (non-overlapping test windows)
+WARMUP_BARS = 200        # History prepended to every window so indicators are primed
+RESULTS_FILE = "walk_forward_results.csv"
+
+# Parameter grids tuned on each train window. NIA is excluded: it needs real
+# high/low data, which the history CSVs don't have.
+STRATEGY_GRIDS = {
+    'Dip Buy': (DipBuyStrategy, {
+        'dip_threshold': [0.4, 0.5, 0.6],
+        'take_profit': [0.1, 0.2, 0.3],
+    }),
+    'RSI Mean-Reversion': (RSIStrategy, {
+        'buy_threshold': [25, 30, 35],
+        'sell_threshold': [65, 70, 75],
+    }),
+    'Echo Liquidity Rebound': (EchoStrategy, {
+        'bb_period': [14, 20, 30],
+        'atr_period': [7, 14],
+    }),
+    'Liquidity Erosion Reversal': (LERStrategy, {
+        'vol_lookback': [10, 20, 30],
+    }),
+    'AAMR (Adaptive)': (AAMRStrategy, {
+        'fast_sma': [20, 50],
+        'slow_sma': [100, 200],
+    }),
+}
+
+# --- FOLDS ---
+def make_folds(n_rows, train=TRAIN_BARS, test=TEST_BARS, step=STEP_BARS):
+    """Rolling (train_start, test_start, test_end) row positions."""
+    step = step or test
+    folds = []
+    start = 0
+    while start + train + test <= n_rows:
+        folds.append((start, start + train, start + train + test))
+        start += step
+    return folds
+
+def param_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+# --- SCORING ---
+def max_drawdown(equity):
+    """Largest peak-to-trough drop of an equity array, as a positive %."""
+    if len(equity) == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(equity)
+    dd = (peaks - equity) / np.where(peaks > 0, peaks, 1)
+    return float(dd.max()) * 100
+
+def score_window(strat, df, start, end):
+    """
+    Run strat over [start, end) with up to WARMUP_BARS of prior history, and
+    score only the window itself. ROI comes from the equity curve, so every
+    strategy is on the same % scale regardless of what its run() reports.
+    Returns: (roi_pct, max_drawdown_pct)
+    """
+    warm = max(0, start - WARMUP_BARS)
+    _, equity = strat.run(df.iloc[warm:end])
+    equity = np.asarray(equity, dtype=float)[start - warm:]
+    if len(equity) == 0 or equity[0] <= 0:
+        return 0.0, 0.0
+    roi = (equity[-1] / equity[0] - 1) * 100
+    return float(roi), max_drawdown(equity)
+
+# --- WORKERS ---
+_DATA = {}
+
+def _init_worker(data):
+    """Pool initializer: each worker receives the loaded frames exactly once."""
+    global _DATA
+    _DATA = data
+
+def run_fold(task):
+    """Tune on train, score on test. task = (symbol, strategy_name, fold_idx, (train_start, test_start, test_end))."""
+    symbol, strat_name, fold_idx, (train_start, test_start, test_end) = task
+    df = _DATA[symbol]
+    cls, grid = STRATEGY_GRIDS[strat_name]
+
+    best_params, best_train = None, -np.inf
+    for params in param_grid(grid):
+        try:
+            roi, _ = score_window(cls(**params), df, train_start, test_start)
+        except Exception:
+            continue
+        if roi > best_train:
+            best_params, best_train = params, roi
+
+    row = {
+        'Token': symbol,
+        'Strategy': strat_name,
+        'Fold': fold_idx,
+        'Test Start': str(df.index[test_start].date()),
+        'Params': best_params,
+        'Train ROI': best_train if best_params else np.nan,
+        'Test ROI': np.nan,
+        'Test DD': np.nan,
+    }
+    prices = df['price'].values
+    row['Hold ROI'] = (prices[test_end - 1] / prices[test_start] - 1) * 100
+
+    if best_params is not None:
+        try:
+            row['Test ROI'], row['Test DD'] = score_window(cls(**best_params), df, test_start, test_end)
+        except Exception as e:
+            row['Error'] = str(e)
+    return row
+
+# --- RUNNER ---
+def build_tasks(data, strategies, train, test, step):
+    tasks = []
+    for symbol, df in data.items():
+        for fold_idx, fold in enumerate(make_folds(len(df), train, test, step)):
+            for name in strategies:
+                tasks.append((symbol, name, fold_idx, fold))
+    return tasks
+
+def run_walk_forward(data=None, strategies=None, train=TRAIN_BARS, test=TEST_BARS, step=STEP_BARS, workers=None):
+    """Returns a DataFrame with one row per (token, strategy, fold)."""
+    data = data if data is not None else load_all_data()
+    strategies = strategies or list(STRATEGY_GRIDS)
+    tasks = build_tasks(data, strategies, train, test, step)
+    workers = workers or os.cpu_count() or 1
+    print(f"Walk-forward: {len(data)} tokens, {len(strategies)} strategies, {len(tasks)} folds on {workers} worker(s)")
+
+    if workers == 1:
+        _init_worker(data)
+        rows = [run_fold(t) for t in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            rows = list(pool.map(run_fold, tasks, chunksize=chunksize))
+    return pd.DataFrame(rows)
+
+def summarize(results):
+    """Aggregate out-of-sample stats per strategy."""
+    ok = results.dropna(subset=['Test ROI'])
+    compounded = ok.groupby(['Strategy', 'Token'])['Test ROI'].apply(
+        lambda r: (np.prod(1 + r / 100) - 1) * 100
+    ).groupby('Strategy').mean()
+
+    summary = ok.groupby('Strategy').agg(
+        Folds=('Test ROI', 'size'),
+        Mean_OOS_ROI=('Test ROI', 'mean'),
+        Median_OOS_ROI=('Test ROI', 'median'),
+        Win_Folds_Pct=('Test ROI', lambda r: (r > 0).mean() * 100),
+        Mean_DD=('Test DD', 'mean'),
+        Worst_DD=('Test DD', 'max'),
+        Mean_Hold_ROI=('Hold ROI', 'mean'),
+    )
+    summary['Compounded_OOS_ROI'] = compounded
+    return summary.sort_values('Mean_OOS_ROI', ascending=False)
+
+def _arg(flag, default, cast=int):
+    if flag in sys.argv:
+        return cast(sys.argv[sys.argv.index(flag) + 1])
+    return default
+
+def main():
+    train = _arg('--train', TRAIN_BARS)
+    test = _arg('--test', TEST_BARS)
+    step = _arg('--step', STEP_BARS)
+    workers = _arg('--workers', None)
+
+    data = load_all_data()
+    start = time.perf_counter()
+    results = run_walk_forward(data, train=train, test=test, step=step, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    print("\n=== PER-FOLD OUT-OF-SAMPLE (first 20) ===")
+    cols = ['Token', 'Strategy', 'Fold', 'Test Start', 'Train ROI', 'Test ROI', 'Test DD', 'Hold ROI']
+    print(results[cols].head(20).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    print(f"\n=== AGGREGATE OUT-OF-SAMPLE ({elapsed:.1f}s) ===")
+    print(summarize(results).to_string(float_format=lambda v: f"{v:.2f}"))
+
+    results.to_csv(RESULTS_FILE, index=False)
+    print(f"\nSaved {len(results)} fold results to {RESULTS_FILE}")
+
+if __name__ == "__main__":
+    main()